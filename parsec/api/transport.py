@@ -2,7 +2,9 @@
 # cspell: ignore wsmsg
 from __future__ import annotations
 
-from typing import Type, Union
+import struct
+from itertools import count
+from typing import Dict, Type, Union
 from uuid import uuid4
 
 import trio
@@ -25,13 +27,27 @@ from wsproto.utilities import LocalProtocolError, RemoteProtocolError
 
 from parsec._version import __version__
 
-__all__ = ("TransportError", "Transport")
+__all__ = (
+    "TransportError",
+    "Transport",
+    "PIPELINING_SUBPROTOCOL",
+    "PIPELINING_HEADER",
+    "PIPELINING_MAX_IN_FLIGHT",
+)
 
 
 logger = get_logger()
 WEBSOCKET_HANDSHAKE_TIMEOUT = 3.0
 TRANSPORT_TARGET = "/ws"
 USER_AGENT = f"parsec/{__version__}"
+# WebSocket subprotocol negotiated to send several requests concurrently on a
+# single connection. In this mode, each message (request or response) is
+# prefixed by the id of the request it corresponds to.
+PIPELINING_SUBPROTOCOL = "parsec-pipelining"
+PIPELINING_HEADER = struct.Struct("!Q")
+# Maximum number of requests in flight on a pipelined connection, enforced
+# by both the client and the server
+PIPELINING_MAX_IN_FLIGHT = 8
 
 
 class TransportError(Exception):
@@ -56,6 +72,16 @@ class Transport:
         self.conn_id = uuid4().hex
         self.logger = logger.bind(conn_id=self.conn_id)
         self._ws_events = ws.events()
+        self._send_lock = trio.Lock()
+        self._recv_buffer = bytearray()
+        # Pipelining state
+        self.pipelined = False
+        self.broken = False
+        self._pipelining_limiter = trio.Semaphore(PIPELINING_MAX_IN_FLIGHT)
+        self._request_ids = count(1)
+        self._pending_reps: Dict[int, bytes | None] = {}
+        self._receiving = False
+        self._received = trio.Event()
 
     async def _next_ws_event(self) -> Event:
         try:
@@ -87,7 +113,9 @@ class Transport:
 
     async def _net_send(self, wsmsg: Event) -> None:
         try:
-            await self.stream.send_all(self.ws.send(wsmsg))
+            # Keepalive pings can be sent while a request is being sent
+            async with self._send_lock:
+                await self.stream.send_all(self.ws.send(wsmsg))
 
         except BrokenResourceError as exc:
             raise TransportError(*exc.args) from exc
@@ -104,6 +132,7 @@ class Transport:
         stream: Stream,
         host: str,
         keepalive: int | None = None,
+        pipelining: bool = False,
     ) -> "Transport":
         ws = WSConnection(ConnectionType.CLIENT)
         transport = cls(stream, ws, keepalive)
@@ -115,6 +144,7 @@ class Transport:
                 host=host,
                 target=TRANSPORT_TARGET,
                 extra_headers=[(b"User-Agent", USER_AGENT.encode())],
+                subprotocols=[PIPELINING_SUBPROTOCOL] if pipelining else [],
             )
         )
 
@@ -123,6 +153,8 @@ class Transport:
 
         if isinstance(event, AcceptConnection):
             transport.logger.debug("WebSocket negotiation complete", ws_event=event)
+            # Older servers ignore the subprotocol
+            transport.pipelined = event.subprotocol == PIPELINING_SUBPROTOCOL
 
         else:
             transport.logger.warning("Unexpected event during WebSocket handshake", ws_event=event)
@@ -186,7 +218,9 @@ class Transport:
         Raises:
             TransportError
         """
-        data = bytearray()
+        # The partially received message is kept across calls so this
+        # method can be cancelled safely
+        data = self._recv_buffer
         while True:
             if self.keepalive:
                 with trio.move_on_after(self.keepalive) as cancel_scope:
@@ -208,10 +242,11 @@ class Transport:
                 raise TransportClosedByPeer("Peer has closed connection")
 
             elif isinstance(event, BytesMessage):
-                # TODO: check that data doesn't go over MAX_BIN_LEN (1 MB)
+                # TODO: check that data doesn't go over MAX_BIN_LEN (5 MB)
                 # Msgpack will refuse to unpack it so we should fail early on if that happens
                 data += event.data
                 if event.message_finished:
+                    self._recv_buffer = bytearray()
                     return data
 
             elif isinstance(event, Ping):
@@ -225,3 +260,70 @@ class Transport:
             else:
                 self.logger.warning("Unexpected event", ws_event=event)
                 raise TransportError(f"Unexpected event: {event}")
+
+    async def request(self, msg: bytes) -> bytes:
+        """
+        Send a request and wait for its response. On a pipelined transport,
+        this can be called concurrently by different tasks.
+
+        Raises:
+            TransportError
+        """
+        if not self.pipelined:
+            await self.send(msg)
+            return await self.recv()
+
+        async with self._pipelining_limiter:
+            self._check_not_broken()
+            request_id = next(self._request_ids)
+            self._pending_reps[request_id] = None
+            try:
+                try:
+                    await self.send(PIPELINING_HEADER.pack(request_id) + msg)
+                except BaseException:
+                    # The request may have been partially sent
+                    self.broken = True
+                    raise
+                while True:
+                    rep = self._pending_reps[request_id]
+                    if rep is not None:
+                        return rep
+                    await self._receive_pipelined_rep()
+            finally:
+                del self._pending_reps[request_id]
+
+    def _check_not_broken(self) -> None:
+        if self.broken:
+            raise TransportError("Transport broken by a previous request")
+
+    async def _receive_pipelined_rep(self) -> None:
+        # A single task receives at a time and dispatches the responses
+        if self._receiving:
+            await self._received.wait()
+            self._check_not_broken()
+            return
+
+        self._receiving = True
+        try:
+            raw_rep = await self.recv()
+        except TransportError:
+            self.broken = True
+            raise
+        finally:
+            # Wake up the other tasks, one of them is going to take over the receiving
+            self._receiving = False
+            self._received.set()
+            self._received = trio.Event()
+
+        if len(raw_rep) < PIPELINING_HEADER.size:
+            self.broken = True
+            raise TransportError("Invalid pipelined response")
+        (request_id,) = PIPELINING_HEADER.unpack_from(raw_rep)
+        if request_id == 0:
+            # Request ids start at 1, the peer couldn't tell which request it
+            # answers so the pending ones may never get their response
+            self.broken = True
+            raise TransportError("Invalid pipelined response")
+        # The response is ignored if its request has been cancelled
+        if request_id in self._pending_reps:
+            self._pending_reps[request_id] = bytes(raw_rep[PIPELINING_HEADER.size :])
@@ -26,9 +26,10 @@ from parsec.backend.templates import JINJA_ENV_CONFIG
 T = TypeVar("T")
 
 
-# Max size for HTTP body, 1Mo seems plenty given our API never upload big chunk of data
-# (biggest request should be the `block_create` command with typically ~512Ko of data)
-MAX_CONTENT_LENGTH = 1 * 1024**2
+# Max size for HTTP body, our API never upload big chunk of data (biggest request
+# should be the `block_create` command with typically ~512Ko of data, up to 4Mo for
+# workspaces with a custom block size)
+MAX_CONTENT_LENGTH = 5 * 1024**2
 
 
 class BackendQuartTrio(QuartTrio):
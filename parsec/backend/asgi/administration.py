@@ -240,6 +240,13 @@ async def administration_organization_stat(raw_organization_id: str) -> Response
     )
 
 
+@administration_bp.route("/administration/blockstore/metrics", methods=["GET"])
+@administration_authenticated
+async def administration_blockstore_metrics() -> Response:
+    backend: "BackendApp" = g.backend
+    return jsonify(backend.blockstore.get_metrics())
+
+
 @administration_bp.route("/administration/stats", methods=["GET"])
 @administration_authenticated
 async def administration_server_stats() -> Response:
@@ -13,6 +13,7 @@ from quart.wrappers.response import ResponseBody
 
 from parsec._parsec import ClientType, DateTime
 from parsec.api.protocol import (
+    BlockID,
     DeviceID,
     IncompatibleAPIVersionsError,
     OrganizationID,
@@ -20,6 +21,7 @@ from parsec.api.protocol import (
 )
 from parsec.api.version import API_V2_VERSION, API_V3_VERSION, ApiVersion
 from parsec.backend.app import BackendApp
+from parsec.backend.block import BlockAccessError, BlockInMaintenanceError, BlockNotFoundError
 from parsec.backend.client_context import AnonymousClientContext, AuthenticatedClientContext
 from parsec.backend.organization import (
     Organization,
@@ -31,6 +33,7 @@ from parsec.backend.user_type import Device, User
 from parsec.serde import SerdePackingError, packb, unpackb
 
 CONTENT_TYPE_MSGPACK = "application/msgpack"
+CONTENT_TYPE_OCTET_STREAM = "application/octet-stream"
 ACCEPT_TYPE_SSE = "text/event-stream"
 AUTHORIZATION_PARSEC_ED25519 = "PARSEC-SIGN-ED25519"
 SUPPORTED_API_VERSIONS = (
@@ -341,7 +344,7 @@ class SSEResponseIterableBody(ResponseBody):
                 while True:
                     with trio.move_on_after(backend.config.sse_keepalive) as scope:
                         try:
-                            event = await client_ctx.receive_events_channel.receive()
+                            event = await client_ctx.receive_event()
                         except trio.EndOfChannel:
                             break
                         sse_payload = b"data:" + b64encode(event.dump()) + b"\n\n"
@@ -356,40 +359,43 @@ class SSEResponseIterableBody(ResponseBody):
             async with trio.open_nursery() as nursery:
 
                 with backend.event_bus.connection_context() as client_ctx.event_bus_ctx:
-                    await backend.events.connect_events(client_ctx)
-
-                    nursery.start_soon(_events_into_sse_payloads)
-
-                    # Note we don't use `with self._sse_payload_receiver:` context manager
-                    # here.
-                    # This is because `client_ctx.cancel_scope` gets closed as soon as
-                    # the yield returns, hence `_events_into_sse_payloads` only have to
-                    # deal with `trio.Cancelled` (while closing `self._sse_payload_receiver`
-                    # would cause `trio.BrokenResourceError` on top of that)
-
-                    yield
-
-                    # Once here, Quart has decided to stop pulling for body lines, this
-                    # could means three things:
-                    #
-                    # 1) Backpressure has caused the cancellation of the request
-                    # 2) There is no more events to pull (i.e.
-                    #    `self._sse_payload_receiver.close()` has been called)
-                    # 3) Quart has decided to cancel the request (e.g. the server is
-                    #    shutting down). Or an unhandled exception is bubbling up.
-                    #
-                    # In case of 1), `client_ctx.cancel_scope` has been cancelled so we
-                    # have a `trio.Cancelled` exception propagating and doing a clean
-                    # teardown for us.
-                    #
-                    # Case 2) is not possible given our query pull for events forever,
-                    # however we play safe here and fallback to case 1) handling by
-                    # explicitly cancel `client_ctx.cancel_scope` once the yield returns.
-                    #
-                    # Case 3) is similar to case 1) in that an exception gets propagated
-                    # (the only difference is it won't stop once `client_ctx.cancel_scope`
-                    # is reached), so we still have a clean teardown.
-                    client_ctx.cancel_scope.cancel()
+                    try:
+                        await backend.events.connect_events(client_ctx)
+
+                        nursery.start_soon(_events_into_sse_payloads)
+
+                        # Note we don't use `with self._sse_payload_receiver:` context manager
+                        # here.
+                        # This is because `client_ctx.cancel_scope` gets closed as soon as
+                        # the yield returns, hence `_events_into_sse_payloads` only have to
+                        # deal with `trio.Cancelled` (while closing `self._sse_payload_receiver`
+                        # would cause `trio.BrokenResourceError` on top of that)
+
+                        yield
+
+                        # Once here, Quart has decided to stop pulling for body lines, this
+                        # could means three things:
+                        #
+                        # 1) Backpressure has caused the cancellation of the request
+                        # 2) There is no more events to pull (i.e.
+                        #    `self._sse_payload_receiver.close()` has been called)
+                        # 3) Quart has decided to cancel the request (e.g. the server is
+                        #    shutting down). Or an unhandled exception is bubbling up.
+                        #
+                        # In case of 1), `client_ctx.cancel_scope` has been cancelled so we
+                        # have a `trio.Cancelled` exception propagating and doing a clean
+                        # teardown for us.
+                        #
+                        # Case 2) is not possible given our query pull for events forever,
+                        # however we play safe here and fallback to case 1) handling by
+                        # explicitly cancel `client_ctx.cancel_scope` once the yield returns.
+                        #
+                        # Case 3) is similar to case 1) in that an exception gets propagated
+                        # (the only difference is it won't stop once `client_ctx.cancel_scope`
+                        # is reached), so we still have a clean teardown.
+                        client_ctx.cancel_scope.cancel()
+                    finally:
+                        backend.events.disconnect_events(client_ctx)
 
     async def __aenter__(self) -> AsyncIterable[bytes]:
         await self._contextmanager.__aenter__()
@@ -442,3 +448,107 @@ async def authenticated_events_api(raw_organization_id: str) -> Response:
     # SSE are long lasting query, so we must disable Quart DOS protection here
     response.timeout = None
     return response
+
+
+def _parse_range_header(raw_range: str | None, block_size: int) -> Tuple[int, int] | None:
+    """
+    Only a single range is supported, return `None` if the whole block should be
+    returned (no range or unsupported range) or raise `ValueError` if the range
+    cannot be satisfied
+    """
+    if not raw_range:
+        return None
+    unit, _, raw_spec = raw_range.partition("=")
+    if unit.strip() != "bytes" or "," in raw_spec:
+        return None
+    raw_start, sep, raw_end = raw_spec.strip().partition("-")
+    if not sep:
+        return None
+    try:
+        start = int(raw_start) if raw_start else None
+        end = int(raw_end) if raw_end else None
+    except ValueError:
+        return None
+    if start is None:
+        # Suffix range (i.e. the last `end` bytes)
+        if end is None:
+            return None
+        if end <= 0:
+            raise ValueError("Unsatisfiable range")
+        start = max(block_size - end, 0)
+        end = block_size - 1
+    elif end is None:
+        end = block_size - 1
+    if start >= block_size:
+        raise ValueError("Unsatisfiable range")
+    if start > end:
+        return None
+    return start, min(end, block_size - 1)
+
+
+def _block_read_error_rep(status: int, reason: str, api_version: ApiVersion) -> Response:
+    # Unlike the RPC commands, the error is encoded in the HTTP status so it
+    # cannot be mistaken for the block data
+    return Response(
+        response=packb({"status": reason}),
+        status=status,
+        content_type=CONTENT_TYPE_MSGPACK,
+        headers={"Api-Version": str(api_version)},
+    )
+
+
+@rpc_bp.route("/authenticated/<raw_organization_id>/block/<raw_block_id>", methods=["GET"])
+async def authenticated_block_read_api(raw_organization_id: str, raw_block_id: str) -> Response:
+    """
+    Streamed alternative to the `block_read` command: the block is sent as raw
+    bytes (with support for the `Range` header) instead of being embedded in a
+    msgpack response, so neither the server nor the client have to keep it
+    entirely in memory.
+    """
+    backend: BackendApp = g.backend
+
+    api_version, _, organization_id, _, _, device = await _do_handshake(
+        raw_organization_id=raw_organization_id,
+        backend=backend,
+        allow_missing_organization=False,
+        check_authentication=True,
+        # We don't care of Content-Type given the request has no body
+        expected_content_type=None,
+        expected_accept_type=None,
+    )
+    assert device is not None
+
+    try:
+        block_id = BlockID.from_hex(raw_block_id)
+        block_size = await backend.block.read_size(organization_id, device.device_id, block_id)
+    except (ValueError, BlockNotFoundError):
+        return _block_read_error_rep(404, "not_found", api_version)
+    except BlockAccessError:
+        return _block_read_error_rep(403, "not_allowed", api_version)
+    except BlockInMaintenanceError:
+        return _block_read_error_rep(503, "in_maintenance", api_version)
+
+    headers = {
+        "Api-Version": str(api_version),
+        "Content-Type": CONTENT_TYPE_OCTET_STREAM,
+        "Accept-Ranges": "bytes",
+    }
+    try:
+        block_range = _parse_range_header(request.headers.get("Range"), block_size)
+    except ValueError:
+        headers["Content-Range"] = f"bytes */{block_size}"
+        return Response(response="", status=416, headers=headers)
+
+    if block_range:
+        start, end = block_range
+        headers["Content-Range"] = f"bytes {start}-{end}/{block_size}"
+        status = 206
+    else:
+        start, end = 0, block_size - 1
+        status = 200
+    headers["Content-Length"] = str(end - start + 1)
+
+    # Note a blockstore error while streaming aborts the response, the client
+    # then notices the body is shorter than the announced length
+    body = backend.blockstore.iter_read(organization_id, block_id, start, end - start + 1)
+    return current_app.response_class(response=body, status=status, headers=headers)
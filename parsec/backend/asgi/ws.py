@@ -2,7 +2,7 @@
 from __future__ import annotations
 
 from functools import partial
-from typing import Awaitable, Callable, NoReturn, TypeVar, Union
+from typing import Awaitable, Callable, TypeVar, Union
 
 import trio
 from quart import Blueprint, Websocket, g, websocket
@@ -20,6 +20,11 @@ from parsec.api.protocol import (
     unpackb,
 )
 from parsec.api.protocol.base import MessageSerializationError
+from parsec.api.transport import (
+    PIPELINING_HEADER,
+    PIPELINING_MAX_IN_FLIGHT,
+    PIPELINING_SUBPROTOCOL,
+)
 from parsec.backend.app import BackendApp
 from parsec.backend.backend_events import BackendEvent
 from parsec.backend.client_context import (
@@ -47,6 +52,12 @@ async def handle_ws() -> None:
 
     # TODO: try/except on TransportError & MessageSerializationError ?
 
+    # 0) Protocol negotiation, clients that don't request pipelining (or older
+    # clients) get the classic one request at a time protocol
+    pipelining = PIPELINING_SUBPROTOCOL in websocket.requested_subprotocols
+    if pipelining:
+        await websocket.accept(subprotocol=PIPELINING_SUBPROTOCOL)
+
     # 1) Handshake
 
     client_ctx, error_infos = await do_handshake(backend, websocket)
@@ -104,7 +115,10 @@ async def handle_ws() -> None:
                 )
 
                 # 3) Serve commands
-                await _handle_client_websocket_loop(api_cmds, websocket, client_ctx)
+                try:
+                    await _handle_client_websocket_loop(api_cmds, websocket, client_ctx, pipelining)
+                finally:
+                    backend.events.disconnect_events(client_ctx)
 
     else:
         assert isinstance(client_ctx, InvitedClientContext)
@@ -140,7 +154,7 @@ async def handle_ws() -> None:
                     )
 
                     # 3) Serve commands
-                    await _handle_client_websocket_loop(api_cmds, websocket, client_ctx)
+                    await _handle_client_websocket_loop(api_cmds, websocket, client_ctx, pipelining)
 
         except CloseInviteConnection:
             # If the invitation has been deleted after the invited handshake,
@@ -167,70 +181,141 @@ async def _handle_client_websocket_loop(
     api_cmds: dict[str, Callable[[Ctx, R], Awaitable[R]]],
     websocket: Websocket,
     client_ctx: Ctx,
-) -> NoReturn:
+    pipelining: bool = False,
+) -> None:
+    if pipelining:
+        await _handle_client_websocket_pipelined_loop(api_cmds, websocket, client_ctx)
+        return
 
     raw_req: Union[None, bytes, str] = None
     while True:
         # raw_req can be already defined if we received a new request
         # while processing a command
         raw_req = raw_req or await websocket.receive()
-        rep: R
         try:
-            # `WebSocket` can return both bytes or utf8-string messages, we only accept the former
-            if not isinstance(raw_req, bytes):
-                raise MessageSerializationError
-            req = unpackb(raw_req)
+            rep = await _process_req(api_cmds, websocket, client_ctx, raw_req)
+
+        except CancelledByNewCmd as exc:
+            # Long command handling such as message_get can be cancelled
+            # when the peer send a new request
+            raw_req = exc.new_raw_req
+            continue
 
-        except MessageSerializationError:
-            rep = {"status": "invalid_msg_format", "reason": "Invalid message format"}
-            cmd = ""  # Dummy placeholder for the log
+        await _send_rep(websocket, packb(rep))
+        raw_req = None
 
-        else:
 
-            try:
-                cmd = req.get("cmd", "<missing>")
-                if not isinstance(cmd, str):
-                    raise KeyError()
+async def _handle_client_websocket_pipelined_loop(
+    api_cmds: dict[str, Callable[[Ctx, R], Awaitable[R]]],
+    websocket: Websocket,
+    client_ctx: Ctx,
+) -> None:
+    # Stop receiving new requests once the limit of commands being processed is
+    # reached, the client will have to wait for its responses before sending more
+    in_flight = trio.Semaphore(PIPELINING_MAX_IN_FLIGHT)
 
-                cmd_func = api_cmds[cmd]
+    async def _serve_req(raw_req: bytes) -> None:
+        holding_slot = True
 
-            except KeyError:
-                rep = {"status": "unknown_command", "reason": "Unknown command"}
+        def _release_slot() -> None:
+            nonlocal holding_slot
+            if holding_slot:
+                holding_slot = False
+                in_flight.release()
 
-            else:
-                try:
-                    if cmd_func._api_info[  # type: ignore[attr-defined]
-                        "cancel_on_client_sending_new_cmd"
-                    ]:
-                        rep = await run_with_cancel_on_client_sending_new_cmd(
-                            websocket, cmd_func, client_ctx, req
-                        )
-                    else:
-                        rep = await cmd_func(client_ctx, req)
-
-                except InvalidMessageError as exc:
-                    rep = {
-                        "status": "bad_message",
-                        "errors": exc.errors,
-                        "reason": "Invalid message.",
-                    }
-
-                except ProtocolError as exc:
-                    rep = {"status": "bad_message", "reason": str(exc)}
-
-                except CancelledByNewCmd as exc:
-                    # Long command handling such as message_get can be cancelled
-                    # when the peer send a new request
-                    raw_req = exc.new_raw_req
-                    continue
-
-            client_ctx.logger.info("Request", cmd=cmd, status=rep["status"])
-
-        raw_rep = packb(rep)
         try:
-            await websocket.send(raw_rep)
-        except LocalProtocolError:
-            # Ignore exception if the websocket is closed
-            # This used to be the behavior with wsproto < 1.2.0
-            pass
-        raw_req = None
+            (request_id,) = PIPELINING_HEADER.unpack_from(raw_req)
+            rep = await _process_req(
+                api_cmds,
+                websocket,
+                client_ctx,
+                raw_req[PIPELINING_HEADER.size :],
+                allow_cancel_on_new_cmd=False,
+                # Long waiting commands (e.g. greeter waiting for the claimer)
+                # can last for minutes, they must not starve the other requests
+                on_waiting_cmd=_release_slot,
+            )
+            await _send_rep(websocket, PIPELINING_HEADER.pack(request_id) + packb(rep))
+        finally:
+            _release_slot()
+
+    async with trio.open_nursery() as nursery:
+        while True:
+            raw_req = await websocket.receive()
+            if not isinstance(raw_req, bytes) or len(raw_req) < PIPELINING_HEADER.size:
+                # Cannot tell which request this is, so there is no way to answer
+                # it: close the connection so the client's pending requests fail
+                # instead of waiting forever
+                client_ctx.logger.info("Connection dropped: invalid pipelined request")
+                await websocket.close(1003)
+                nursery.cancel_scope.cancel()
+                return
+            await in_flight.acquire()
+            nursery.start_soon(_serve_req, raw_req)
+
+
+async def _process_req(
+    api_cmds: dict[str, Callable[[Ctx, R], Awaitable[R]]],
+    websocket: Websocket,
+    client_ctx: Ctx,
+    raw_req: Union[bytes, str],
+    allow_cancel_on_new_cmd: bool = True,
+    on_waiting_cmd: Callable[[], None] | None = None,
+) -> R:
+    """
+    Raises:
+        CancelledByNewCmd
+    """
+    rep: R
+    try:
+        # `WebSocket` can return both bytes or utf8-string messages, we only accept the former
+        if not isinstance(raw_req, bytes):
+            raise MessageSerializationError
+        req = unpackb(raw_req)
+
+    except MessageSerializationError:
+        return {"status": "invalid_msg_format", "reason": "Invalid message format"}
+
+    try:
+        cmd = req.get("cmd", "<missing>")
+        if not isinstance(cmd, str):
+            raise KeyError()
+
+        cmd_func = api_cmds[cmd]
+
+    except KeyError:
+        rep = {"status": "unknown_command", "reason": "Unknown command"}
+
+    else:
+        try:
+            api_info = cmd_func._api_info  # type: ignore[attr-defined]
+            if allow_cancel_on_new_cmd and api_info["cancel_on_client_sending_new_cmd"]:
+                rep = await run_with_cancel_on_client_sending_new_cmd(
+                    websocket, cmd_func, client_ctx, req
+                )
+            else:
+                if on_waiting_cmd is not None and api_info["long_waiting"]:
+                    on_waiting_cmd()
+                rep = await cmd_func(client_ctx, req)
+
+        except InvalidMessageError as exc:
+            rep = {
+                "status": "bad_message",
+                "errors": exc.errors,
+                "reason": "Invalid message.",
+            }
+
+        except ProtocolError as exc:
+            rep = {"status": "bad_message", "reason": str(exc)}
+
+    client_ctx.logger.info("Request", cmd=cmd, status=rep["status"])
+    return rep
+
+
+async def _send_rep(websocket: Websocket, raw_rep: bytes) -> None:
+    try:
+        await websocket.send(raw_rep)
+    except LocalProtocolError:
+        # Ignore exception if the websocket is closed
+        # This used to be the behavior with wsproto < 1.2.0
+        pass
@@ -124,6 +124,20 @@ class BaseBlockComponent:
         """
         raise NotImplementedError()
 
+    async def read_size(
+        self, organization_id: OrganizationID, author: DeviceID, block_id: BlockID
+    ) -> int:
+        """
+        Check the block can be read by the author and return its size, the block
+        data can then be streamed from the blockstore.
+
+        Raises:
+            BlockNotFoundError
+            BlockAccessError
+            BlockInMaintenanceError
+        """
+        raise NotImplementedError()
+
     async def create(
         self,
         organization_id: OrganizationID,
@@ -1,11 +1,13 @@
 # Parsec Cloud (https://parsec.cloud) Copyright (c) BUSL-1.1 (eventually AGPL-3.0) 2016-present Scille SAS
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict
 
 from parsec.api.protocol import BlockID, OrganizationID
+from parsec.backend.block import BlockStoreError
 from parsec.backend.config import (
     BaseBlockStoreConfig,
+    CachedBlockStoreConfig,
     MockedBlockStoreConfig,
     PostgreSQLBlockStoreConfig,
     RAID0BlockStoreConfig,
@@ -19,6 +21,11 @@ if TYPE_CHECKING:
     from parsec.backend.postgresql.handler import PGHandler
 
 
+# Blocks are streamed by chunks of this size, so a block never has to be
+# entirely kept in memory
+BLOCK_STREAM_CHUNK_SIZE = 512 * 1024
+
+
 class BaseBlockStoreComponent:
     """
     BlockStoreComponent wraps a distributed object storage service, distributed implies
@@ -53,6 +60,45 @@ class BaseBlockStoreComponent:
         """
         raise NotImplementedError()
 
+    async def read_range(
+        self, organization_id: OrganizationID, block_id: BlockID, offset: int, size: int
+    ) -> bytes:
+        """
+        Read at most `size` bytes of the block starting at `offset`.
+
+        The default implementation reads the whole block, blockstores supporting
+        range requests should override it.
+
+        Raises:
+            BlockStoreError
+        """
+        block = await self.read(organization_id, block_id)
+        return block[offset : offset + size]
+
+    async def iter_read(
+        self,
+        organization_id: OrganizationID,
+        block_id: BlockID,
+        offset: int,
+        size: int,
+        chunk_size: int = BLOCK_STREAM_CHUNK_SIZE,
+    ) -> AsyncIterator[bytes]:
+        """
+        Stream `size` bytes of the block starting at `offset` by chunks.
+
+        Raises:
+            BlockStoreError
+        """
+        end = offset + size
+        while offset < end:
+            chunk = await self.read_range(
+                organization_id, block_id, offset, min(chunk_size, end - offset)
+            )
+            if not chunk:
+                raise BlockStoreError("Block is smaller than expected")
+            yield chunk
+            offset += len(chunk)
+
     async def create(
         self, organization_id: OrganizationID, block_id: BlockID, block: bytes
     ) -> None:
@@ -62,6 +108,13 @@ class BaseBlockStoreComponent:
         """
         raise NotImplementedError()
 
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        JSON-serializable metrics of the blockstore, blockstores wrapping other
+        ones nest the metrics of their children.
+        """
+        return {}
+
 
 def blockstore_factory(
     config: BaseBlockStoreConfig, postgresql_dbh: PGHandler | None = None
@@ -88,6 +141,9 @@ def blockstore_factory(
                 config.s3_key,
                 config.s3_secret,
                 config.s3_endpoint_url,
+                max_pool_connections=config.s3_max_pool_connections,
+                connect_timeout=config.s3_connect_timeout,
+                read_timeout=config.s3_read_timeout,
             )
         except ImportError as exc:
             raise ValueError("S3 block store is not available") from exc
@@ -130,5 +186,15 @@ def blockstore_factory(
 
         return RAID5BlockStoreComponent(blocks, partial_create_ok=config.partial_create_ok)
 
+    elif isinstance(config, CachedBlockStoreConfig):
+        from parsec.backend.cached_blockstore import CachedBlockStoreComponent
+
+        return CachedBlockStoreComponent(
+            blockstore_factory(config.blockstore, postgresql_dbh),
+            memory_cache_size=config.memory_cache_size,
+            disk_cache_dir=config.disk_cache_dir,
+            disk_cache_size=config.disk_cache_size,
+        )
+
     else:
         raise ValueError(f"Unknown block store configuration `{config}`")
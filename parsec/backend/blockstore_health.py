@@ -0,0 +1,119 @@
+# Parsec Cloud (https://parsec.cloud) Copyright (c) BUSL-1.1 (eventually AGPL-3.0) 2016-present Scille SAS
+from __future__ import annotations
+
+from collections import deque
+from typing import Any, Awaitable, Deque, Dict, List, Tuple, TypeVar
+
+import trio
+
+from parsec.backend.block import BlockStoreError
+
+__all__ = ("BlockStoreNodeHealth", "rank_nodes")
+
+
+R = TypeVar("R")
+
+# Weight of the last sample in the moving latency estimate
+LATENCY_EWMA_ALPHA = 0.2
+# Number of latency samples kept to compute the hedge deadline
+HEDGE_SAMPLES = 100
+# A hedge request is sent when a read takes longer than this latency percentile...
+HEDGE_PERCENTILE = 0.95
+# ...once enough samples are known, otherwise this delay is used
+HEDGE_MIN_SAMPLES = 10
+DEFAULT_HEDGE_DELAY = 0.1  # seconds
+# A failed node is only used as a last resort for this long
+UNHEALTHY_DELAY = 5.0  # seconds
+
+
+class BlockStoreNodeHealth:
+    """Latency and health tracking of a node of a RAID block store.
+
+    The latency is estimated with an exponentially weighted moving average,
+    which is used to pick the fastest nodes, while the hedge deadline is a
+    percentile of the last latencies. A node is considered unhealthy for
+    `UNHEALTHY_DELAY` seconds after an error.
+
+    Reads cancelled because another node answered first are accounted with their
+    elapsed time (which is a lower bound of their latency), otherwise a node that
+    got slow would never see its estimate increase.
+    """
+
+    def __init__(self) -> None:
+        self.latency: float | None = None
+        self.successes = 0
+        self.errors = 0
+        self.cancelled = 0
+        self.unhealthy_until = float("-inf")
+        self._samples: Deque[float] = deque(maxlen=HEDGE_SAMPLES)
+
+    @property
+    def healthy(self) -> bool:
+        return self.unhealthy_until <= trio.current_time()
+
+    def _observe(self, duration: float) -> None:
+        if self.latency is None:
+            self.latency = duration
+        else:
+            self.latency += LATENCY_EWMA_ALPHA * (duration - self.latency)
+        self._samples.append(duration)
+
+    def on_success(self, duration: float) -> None:
+        self.successes += 1
+        self._observe(duration)
+
+    def on_error(self) -> None:
+        self.errors += 1
+        self.unhealthy_until = trio.current_time() + UNHEALTHY_DELAY
+
+    def on_cancelled(self, duration: float) -> None:
+        self.cancelled += 1
+        if self.latency is None or duration > self.latency:
+            self._observe(duration)
+
+    def hedge_delay(self) -> float:
+        if len(self._samples) < HEDGE_MIN_SAMPLES:
+            return DEFAULT_HEDGE_DELAY
+        samples = sorted(self._samples)
+        return samples[min(int(len(samples) * HEDGE_PERCENTILE), len(samples) - 1)]
+
+    async def measure(self, request: Awaitable[R]) -> R:
+        """
+        Raises:
+            BlockStoreError
+        """
+        start = trio.current_time()
+        try:
+            result = await request
+        except BlockStoreError:
+            self.on_error()
+            raise
+        except trio.Cancelled:
+            self.on_cancelled(trio.current_time() - start)
+            raise
+        self.on_success(trio.current_time() - start)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "healthy": self.healthy,
+            "latency": self.latency,
+            "hedge_delay": self.hedge_delay(),
+            "successes": self.successes,
+            "errors": self.errors,
+            "cancelled": self.cancelled,
+        }
+
+
+def rank_nodes(nodes_health: List[BlockStoreNodeHealth]) -> List[int]:
+    """Return the node indexes, healthy and fastest nodes first.
+
+    Nodes without latency estimate yet come first among the healthy ones so
+    they get one.
+    """
+
+    def _key(index: int) -> Tuple[bool, float]:
+        health = nodes_health[index]
+        return (not health.healthy, health.latency or 0.0)
+
+    return sorted(range(len(nodes_health)), key=_key)
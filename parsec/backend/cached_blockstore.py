@@ -0,0 +1,249 @@
+# Parsec Cloud (https://parsec.cloud) Copyright (c) BUSL-1.1 (eventually AGPL-3.0) 2016-present Scille SAS
+from __future__ import annotations
+
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import trio
+from structlog import get_logger
+
+from parsec.api.protocol import BlockID, OrganizationID
+from parsec.backend.block import BlockStoreError
+from parsec.backend.blockstore import BaseBlockStoreComponent
+from parsec.backend.config import (
+    DEFAULT_BLOCKSTORE_DISK_CACHE_SIZE,
+    DEFAULT_BLOCKSTORE_MEMORY_CACHE_SIZE,
+)
+from parsec.metrics import StorageMetrics
+
+logger = get_logger()
+
+BlockKey = Tuple[OrganizationID, BlockID]
+
+
+class _SizedLRU:
+    """Size-bounded LRU index, the least recently used entries are evicted until
+    the new one fits. An entry bigger than the whole cache is not stored.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.size = 0
+        self._entries: OrderedDict[BlockKey, Tuple[Any, int]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def touch(self, key: BlockKey) -> bool:
+        try:
+            self._entries.move_to_end(key)
+        except KeyError:
+            return False
+        return True
+
+    def get(self, key: BlockKey) -> Any:
+        if not self.touch(key):
+            return None
+        return self._entries[key][0]
+
+    def fits(self, size: int) -> bool:
+        return size <= self.max_size
+
+    def add(self, key: BlockKey, value: Any, size: int) -> List[BlockKey]:
+        """Returns the keys of the evicted entries"""
+        self.pop(key)
+        self._entries[key] = (value, size)
+        self.size += size
+        evicted = []
+        while self.size > self.max_size:
+            evicted_key, (_, evicted_size) = self._entries.popitem(last=False)
+            self.size -= evicted_size
+            evicted.append(evicted_key)
+        return evicted
+
+    def pop(self, key: BlockKey) -> None:
+        try:
+            _, size = self._entries.pop(key)
+        except KeyError:
+            return
+        self.size -= size
+
+
+class _PendingRead:
+    def __init__(self) -> None:
+        self.done = trio.Event()
+        self.block: bytes | None = None
+        self.failed = False
+
+
+class CachedBlockStoreComponent(BaseBlockStoreComponent):
+    """Read cache of the hot blocks in front of another block store.
+
+    Blocks are immutable, so a cached block never has to be invalidated. Blocks
+    are kept in a size-bounded in-memory LRU, and optionally in a bigger one on
+    the local disk (the blocks evicted from memory are still served from the
+    disk). Concurrent reads of the same block that is not in the cache are
+    coalesced into a single read of the underlying block store.
+
+    Range reads (i.e. streamed block reads) are served from the cache when the
+    block is in it, but never fill the cache so a block is never entirely loaded
+    in memory because of them.
+    """
+
+    def __init__(
+        self,
+        blockstore: BaseBlockStoreComponent,
+        memory_cache_size: int = DEFAULT_BLOCKSTORE_MEMORY_CACHE_SIZE,
+        disk_cache_dir: Path | None = None,
+        disk_cache_size: int = DEFAULT_BLOCKSTORE_DISK_CACHE_SIZE,
+    ):
+        self.blockstore = blockstore
+        self._memory = _SizedLRU(memory_cache_size)
+        self._disk_dir = disk_cache_dir
+        self._disk = _SizedLRU(disk_cache_size if disk_cache_dir else 0)
+        self._pending: Dict[BlockKey, _PendingRead] = {}
+        self.metrics = StorageMetrics()
+        if disk_cache_dir:
+            self._load_disk_cache()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            **self.metrics.stats(),
+            "memory_cache_entries": len(self._memory),
+            "memory_cache_size": self._memory.size,
+            "disk_cache_entries": len(self._disk),
+            "disk_cache_size": self._disk.size,
+            "blockstore": self.blockstore.get_metrics(),
+        }
+
+    # Disk tier
+
+    def _get_disk_path(self, key: BlockKey) -> Path:
+        assert self._disk_dir is not None
+        organization_id, block_id = key
+        return self._disk_dir / organization_id.str / block_id.hex
+
+    def _load_disk_cache(self) -> None:
+        # Blocks cached by a previous run are still valid, oldest first to keep
+        # the LRU order
+        assert self._disk_dir is not None
+        self._disk_dir.mkdir(parents=True, exist_ok=True)
+        entries = []
+        for path in self._disk_dir.glob("*/*"):
+            try:
+                key = (OrganizationID(path.parent.name), BlockID.from_hex(path.name))
+                stat = path.stat()
+            except (ValueError, OSError):
+                # Temporary file from an interrupted write or unrelated file
+                path.unlink(missing_ok=True)
+                continue
+            entries.append((stat.st_mtime, key, stat.st_size))
+        for _, key, size in sorted(entries, key=lambda entry: entry[0]):
+            for evicted_key in self._disk.add(key, None, size):
+                self._disk_remove(evicted_key)
+
+    def _disk_remove(self, key: BlockKey) -> None:
+        self._get_disk_path(key).unlink(missing_ok=True)
+
+    def _disk_read(self, key: BlockKey, offset: int = 0, size: int = -1) -> bytes:
+        with open(self._get_disk_path(key), "rb") as fd:
+            fd.seek(offset)
+            return fd.read(size)
+
+    def _disk_write(self, key: BlockKey, block: bytes) -> None:
+        path = self._get_disk_path(key)
+        path.parent.mkdir(exist_ok=True)
+        # Write then rename so a partially written block is never read
+        tmp_path = path.with_name(f"{path.name}.tmp")
+        tmp_path.write_bytes(block)
+        os.replace(tmp_path, path)
+
+    async def _cache_read(self, key: BlockKey, offset: int = 0, size: int = -1) -> bytes | None:
+        block = self._memory.get(key)
+        if block is not None:
+            self.metrics.increment("memory_hits")
+            return block if size < 0 else block[offset : offset + size]
+        if not self._disk.touch(key):
+            return None
+        try:
+            block = await trio.to_thread.run_sync(self._disk_read, key, offset, size)
+        except OSError as exc:
+            logger.warning("Block cache read error", exc_info=exc)
+            self._disk.pop(key)
+            return None
+        self.metrics.increment("disk_hits")
+        if size < 0:
+            self._memory_add(key, block)
+        return block
+
+    def _memory_add(self, key: BlockKey, block: bytes) -> None:
+        if self._memory.fits(len(block)):
+            evicted = self._memory.add(key, block, len(block))
+            self.metrics.increment("memory_evictions", len(evicted))
+
+    async def _cache_write(self, key: BlockKey, block: bytes) -> None:
+        self._memory_add(key, block)
+        if not self._disk.fits(len(block)) or self._disk.touch(key):
+            return
+        try:
+            await trio.to_thread.run_sync(self._disk_write, key, block)
+        except OSError as exc:
+            logger.warning("Block cache write error", exc_info=exc)
+            return
+        for evicted_key in self._disk.add(key, None, len(block)):
+            self.metrics.increment("disk_evictions")
+            await trio.to_thread.run_sync(self._disk_remove, evicted_key)
+
+    # Block store API
+
+    async def read(self, organization_id: OrganizationID, block_id: BlockID) -> bytes:
+        key = (organization_id, block_id)
+        while True:
+            block = await self._cache_read(key)
+            if block is not None:
+                return block
+            pending = self._pending.get(key)
+            if pending is None:
+                break
+            # Another read of this block is in progress, wait for its result
+            self.metrics.increment("coalesced")
+            await pending.done.wait()
+            if pending.block is not None:
+                return pending.block
+            if pending.failed:
+                raise BlockStoreError("Block read failed")
+            # The other read has been cancelled, try again
+
+        self.metrics.increment("misses")
+        pending = _PendingRead()
+        self._pending[key] = pending
+        try:
+            block = await self.blockstore.read(organization_id, block_id)
+            pending.block = block
+            pending.done.set()
+            # The read is still pending until the block is cached, so a new read
+            # of this block doesn't trigger a concurrent fetch or disk write
+            await self._cache_write(key, block)
+            return block
+        except BlockStoreError:
+            pending.failed = True
+            raise
+        finally:
+            del self._pending[key]
+            pending.done.set()
+
+    async def read_range(
+        self, organization_id: OrganizationID, block_id: BlockID, offset: int, size: int
+    ) -> bytes:
+        block = await self._cache_read((organization_id, block_id), offset, size)
+        if block is not None:
+            return block
+        self.metrics.increment("range_misses")
+        return await self.blockstore.read_range(organization_id, block_id, offset, size)
+
+    async def create(
+        self, organization_id: OrganizationID, block_id: BlockID, block: bytes
+    ) -> None:
+        await self.blockstore.create(organization_id, block_id, block)
@@ -3,13 +3,21 @@ from __future__ import annotations
 
 from collections import defaultdict
 from itertools import count
-from typing import Callable, List, TypeVar
+from pathlib import Path
+from typing import Any, Callable, List, TypeVar
 
+import attr
 import click
 from typing_extensions import ParamSpec
 
 from parsec.backend.config import (
+    DEFAULT_BLOCKSTORE_DISK_CACHE_SIZE,
+    DEFAULT_BLOCKSTORE_MEMORY_CACHE_SIZE,
+    DEFAULT_S3_CONNECT_TIMEOUT,
+    DEFAULT_S3_MAX_POOL_CONNECTIONS,
+    DEFAULT_S3_READ_TIMEOUT,
     BaseBlockStoreConfig,
+    CachedBlockStoreConfig,
     MockedBlockStoreConfig,
     PostgreSQLBlockStoreConfig,
     RAID0BlockStoreConfig,
@@ -198,6 +206,73 @@ def _parse_blockstore_params(raw_params: str) -> BaseBlockStoreConfig:
         raise click.BadParameter(f"Invalid multi blockstore mode `{raid_mode}`")
 
 
+def _apply_s3_options(
+    config: BaseBlockStoreConfig,
+    max_pool_connections: int,
+    connect_timeout: float,
+    read_timeout: float,
+) -> BaseBlockStoreConfig:
+    if isinstance(config, S3BlockStoreConfig):
+        return attr.evolve(
+            config,
+            s3_max_pool_connections=max_pool_connections,
+            s3_connect_timeout=connect_timeout,
+            s3_read_timeout=read_timeout,
+        )
+    elif isinstance(config, (RAID0BlockStoreConfig, RAID1BlockStoreConfig, RAID5BlockStoreConfig)):
+        return attr.evolve(
+            config,
+            blockstores=[
+                _apply_s3_options(node, max_pool_connections, connect_timeout, read_timeout)
+                for node in config.blockstores
+            ],
+        )
+    else:
+        return config
+
+
+def _apply_cache_options(
+    config: BaseBlockStoreConfig,
+    memory_cache_size: int,
+    disk_cache_dir: Path | None,
+    disk_cache_size: int,
+) -> BaseBlockStoreConfig:
+    if not memory_cache_size and not disk_cache_dir:
+        return config
+    return CachedBlockStoreConfig(
+        blockstore=config,
+        memory_cache_size=memory_cache_size,
+        disk_cache_dir=disk_cache_dir,
+        disk_cache_size=disk_cache_size,
+    )
+
+
+def _store_blockstore_option(ctx: click.Context, param: click.Parameter, value: Any) -> None:
+    assert param.name is not None
+    ctx.meta[f"blockstore_option_{param.name}"] = value
+
+
+def _blockstore_callback(
+    ctx: click.Context, param: click.Parameter, value: Any
+) -> BaseBlockStoreConfig:
+    # The S3 and cache options are eager, hence already stored in the context.
+    # S3 options apply to every S3 node of the blockstore configuration, while
+    # the cache is put in front of the whole blockstore configuration
+    config = _parse_blockstore_params(value)
+    config = _apply_s3_options(
+        config,
+        ctx.meta["blockstore_option_s3_max_pool_connections"],
+        ctx.meta["blockstore_option_s3_connect_timeout"],
+        ctx.meta["blockstore_option_s3_read_timeout"],
+    )
+    return _apply_cache_options(
+        config,
+        ctx.meta["blockstore_option_blockstore_memory_cache_size"],
+        ctx.meta["blockstore_option_blockstore_disk_cache_dir"],
+        ctx.meta["blockstore_option_blockstore_disk_cache_size"],
+    )
+
+
 def blockstore_backend_options(fn: Callable[P, T]) -> Callable[P, T]:
     decorators = [
         click.option(
@@ -205,7 +280,7 @@ def blockstore_backend_options(fn: Callable[P, T]) -> Callable[P, T]:
             "-b",
             required=True,
             multiple=True,
-            callback=lambda ctx, param, value: _parse_blockstore_params(value),
+            callback=_blockstore_callback,
             envvar="PARSEC_BLOCKSTORE",
             metavar="CONFIG",
             help="""Blockstore configuration.
@@ -230,7 +305,72 @@ integer and `<config>` the MOCKED/POSTGRESQL/S3/SWIFT config.
 
 \b
 """,
-        )
+        ),
+        click.option(
+            "--s3-max-pool-connections",
+            is_eager=True,
+            expose_value=False,
+            callback=_store_blockstore_option,
+            default=DEFAULT_S3_MAX_POOL_CONNECTIONS,
+            show_default=True,
+            type=click.IntRange(min=1),
+            envvar="PARSEC_S3_MAX_POOL_CONNECTIONS",
+            help="Number of pooled connections (and of worker threads) per S3 blockstore",
+        ),
+        click.option(
+            "--s3-connect-timeout",
+            is_eager=True,
+            expose_value=False,
+            callback=_store_blockstore_option,
+            default=DEFAULT_S3_CONNECT_TIMEOUT,
+            show_default=True,
+            type=float,
+            envvar="PARSEC_S3_CONNECT_TIMEOUT",
+            help="Timeout in seconds when connecting to a S3 blockstore",
+        ),
+        click.option(
+            "--s3-read-timeout",
+            is_eager=True,
+            expose_value=False,
+            callback=_store_blockstore_option,
+            default=DEFAULT_S3_READ_TIMEOUT,
+            show_default=True,
+            type=float,
+            envvar="PARSEC_S3_READ_TIMEOUT",
+            help="Timeout in seconds when reading from a S3 blockstore connection",
+        ),
+        click.option(
+            "--blockstore-memory-cache-size",
+            is_eager=True,
+            expose_value=False,
+            callback=_store_blockstore_option,
+            default=DEFAULT_BLOCKSTORE_MEMORY_CACHE_SIZE,
+            show_default=True,
+            type=click.IntRange(min=0),
+            envvar="PARSEC_BLOCKSTORE_MEMORY_CACHE_SIZE",
+            help="Size in bytes of the in-memory cache of the read blocks (0 to disable it)",
+        ),
+        click.option(
+            "--blockstore-disk-cache-dir",
+            is_eager=True,
+            expose_value=False,
+            callback=_store_blockstore_option,
+            default=None,
+            type=click.Path(file_okay=False, path_type=Path),
+            envvar="PARSEC_BLOCKSTORE_DISK_CACHE_DIR",
+            help="Directory of the on-disk cache of the read blocks (disabled if not provided)",
+        ),
+        click.option(
+            "--blockstore-disk-cache-size",
+            is_eager=True,
+            expose_value=False,
+            callback=_store_blockstore_option,
+            default=DEFAULT_BLOCKSTORE_DISK_CACHE_SIZE,
+            show_default=True,
+            type=click.IntRange(min=0),
+            envvar="PARSEC_BLOCKSTORE_DISK_CACHE_SIZE",
+            help="Size in bytes of the on-disk cache of the read blocks",
+        ),
     ]
     for decorator in decorators:
         fn = decorator(fn)
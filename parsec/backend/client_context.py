@@ -1,13 +1,20 @@
 # Parsec Cloud (https://parsec.cloud) Copyright (c) BUSL-1.1 (eventually AGPL-3.0) 2016-present Scille SAS
 from __future__ import annotations
 
-from typing import Set
+from typing import Dict, Set, Union
 from uuid import uuid4
 
 import trio
 from structlog import BoundLogger, get_logger
 
-from parsec._parsec import ClientType, EventsListenRep
+from parsec._parsec import (
+    ClientType,
+    EventsListenRep,
+    EventsListenRepOkRealmMaintenanceFinished,
+    EventsListenRepOkRealmMaintenanceStarted,
+    EventsListenRepOkRealmRolesUpdated,
+    EventsListenRepOkRealmVlobsUpdated,
+)
 from parsec.api.protocol import (
     DeviceID,
     DeviceLabel,
@@ -28,6 +35,18 @@ logger = get_logger()
 AUTHENTICATED_CLIENT_CHANNEL_SIZE = 100
 
 
+class PendingVlobsUpdated:
+    """
+    `realm.vlobs_updated` event waiting in a client's channel, updated in place
+    with the latest event of the realm until the client fetches it
+    """
+
+    __slots__ = ("event_rep",)
+
+    def __init__(self, event_rep: EventsListenRepOkRealmVlobsUpdated):
+        self.event_rep = event_rep
+
+
 class BaseClientContext:
     __slots__ = ("conn_id", "api_version", "client_api_version", "cancel_scope")
     TYPE: ClientType
@@ -56,6 +75,7 @@ class AuthenticatedClientContext(BaseClientContext):
         "event_bus_ctx",
         "send_events_channel",
         "receive_events_channel",
+        "pending_vlobs_updated",
         "realms",
         "events_subscribed",
         "logger",
@@ -92,11 +112,57 @@ class AuthenticatedClientContext(BaseClientContext):
 
         self.event_bus_ctx: EventBusConnectionContext
         self.send_events_channel, self.receive_events_channel = trio.open_memory_channel[
-            EventsListenRep
+            Union[EventsListenRep, PendingVlobsUpdated]
         ](AUTHENTICATED_CLIENT_CHANNEL_SIZE)
+        # `realm.vlobs_updated` event of each realm still waiting in the channel
+        self.pending_vlobs_updated: Dict[RealmID, PendingVlobsUpdated] = {}
         self.realms: Set[RealmID] = set()
         self.events_subscribed = False
 
+    def send_event(self, event_rep: EventsListenRep) -> None:
+        # `realm.vlobs_updated` events are coalesced per realm as long as the
+        # client hasn't fetched them, this avoids flooding (and then disconnecting)
+        # the client when a lot of vlobs are modified in a short period of time
+        if isinstance(event_rep, EventsListenRepOkRealmVlobsUpdated):
+            pending = self.pending_vlobs_updated.get(event_rep.realm_id)
+            if pending is not None:
+                pending.event_rep = event_rep
+                return
+        elif isinstance(
+            event_rep,
+            (
+                EventsListenRepOkRealmMaintenanceStarted,
+                EventsListenRepOkRealmMaintenanceFinished,
+                EventsListenRepOkRealmRolesUpdated,
+            ),
+        ):
+            # Don't move the following `realm.vlobs_updated` events before this one
+            self.pending_vlobs_updated.pop(event_rep.realm_id, None)
+
+        item: EventsListenRep | PendingVlobsUpdated = event_rep
+        if isinstance(event_rep, EventsListenRepOkRealmVlobsUpdated):
+            item = PendingVlobsUpdated(event_rep)
+        try:
+            self.send_events_channel.send_nowait(item)
+        except trio.WouldBlock:
+            self.close_connection_asap()
+            return
+        if isinstance(item, PendingVlobsUpdated):
+            self.pending_vlobs_updated[item.event_rep.realm_id] = item
+
+    def _unwrap_event(self, item: EventsListenRep | PendingVlobsUpdated) -> EventsListenRep:
+        if not isinstance(item, PendingVlobsUpdated):
+            return item
+        if self.pending_vlobs_updated.get(item.event_rep.realm_id) is item:
+            del self.pending_vlobs_updated[item.event_rep.realm_id]
+        return item.event_rep
+
+    async def receive_event(self) -> EventsListenRep:
+        return self._unwrap_event(await self.receive_events_channel.receive())
+
+    def receive_event_nowait(self) -> EventsListenRep:
+        return self._unwrap_event(self.receive_events_channel.receive_nowait())
+
     def __repr__(self) -> str:
         return f"AuthenticatedClientContext(org={self.organization_id.str}, device={self.device_id.str})"
 
@@ -1,6 +1,7 @@
 # Parsec Cloud (https://parsec.cloud) Copyright (c) BUSL-1.1 (eventually AGPL-3.0) 2016-present Scille SAS
 from __future__ import annotations
 
+from pathlib import Path
 from typing import List, Tuple, Union
 
 import attr
@@ -38,6 +39,28 @@ class RAID5BlockStoreConfig(BaseBlockStoreConfig):
     partial_create_ok: bool = False
 
 
+# The hot blocks cache is disabled by default
+DEFAULT_BLOCKSTORE_MEMORY_CACHE_SIZE = 0  # bytes
+DEFAULT_BLOCKSTORE_DISK_CACHE_SIZE = 10 * 1024**3  # bytes
+
+
+@attr.s(frozen=True, auto_attribs=True)
+class CachedBlockStoreConfig(BaseBlockStoreConfig):
+    type = "CACHED"
+
+    blockstore: BaseBlockStoreConfig
+    memory_cache_size: int = DEFAULT_BLOCKSTORE_MEMORY_CACHE_SIZE
+    disk_cache_dir: Path | None = None
+    disk_cache_size: int = DEFAULT_BLOCKSTORE_DISK_CACHE_SIZE
+
+
+# Number of pooled S3 connections, which is also the number of worker threads
+# dedicated to the S3 requests
+DEFAULT_S3_MAX_POOL_CONNECTIONS = 10
+DEFAULT_S3_CONNECT_TIMEOUT = 60.0  # seconds
+DEFAULT_S3_READ_TIMEOUT = 60.0  # seconds
+
+
 @attr.s(frozen=True, auto_attribs=True)
 class S3BlockStoreConfig(BaseBlockStoreConfig):
     type = "S3"
@@ -47,6 +70,9 @@ class S3BlockStoreConfig(BaseBlockStoreConfig):
     s3_bucket: str
     s3_key: str
     s3_secret: str
+    s3_max_pool_connections: int = DEFAULT_S3_MAX_POOL_CONNECTIONS
+    s3_connect_timeout: float = DEFAULT_S3_CONNECT_TIMEOUT
+    s3_read_timeout: float = DEFAULT_S3_READ_TIMEOUT
 
 
 @attr.s(frozen=True, auto_attribs=True)
@@ -1,8 +1,9 @@
 # Parsec Cloud (https://parsec.cloud) Copyright (c) BUSL-1.1 (eventually AGPL-3.0) 2016-present Scille SAS
 from __future__ import annotations
 
+from collections import defaultdict
 from functools import partial
-from typing import Any, Awaitable, Callable, Type, Union
+from typing import Any, Awaitable, Callable, DefaultDict, Set, Tuple, Type, TypeVar, Union
 
 import trio
 
@@ -36,182 +37,207 @@ from parsec.backend.backend_events import BackendEvent
 from parsec.backend.client_context import AuthenticatedClientContext
 from parsec.backend.realm import BaseRealmComponent
 from parsec.backend.utils import api, api_typed_msg_adapter, catch_protocol_errors
+from parsec.event_bus import EventBus
+
+K = TypeVar("K")
 
 
 class EventsComponent:
     def __init__(
-        self, realm_component: BaseRealmComponent, send_event: Callable[..., Awaitable[None]]
+        self,
+        realm_component: BaseRealmComponent,
+        send_event: Callable[..., Awaitable[None]],
+        event_bus: EventBus,
     ):
         self._realm_component = realm_component
         self.send = send_event
+        # Subscribed clients are indexed according to the events they are
+        # interested in, so dispatching an event only visits the relevant clients
+        self._organization_clients: DefaultDict[
+            OrganizationID, Set[AuthenticatedClientContext]
+        ] = defaultdict(set)
+        self._user_clients: DefaultDict[
+            Tuple[OrganizationID, UserID], Set[AuthenticatedClientContext]
+        ] = defaultdict(set)
+        self._realm_clients: DefaultDict[
+            Tuple[OrganizationID, RealmID], Set[AuthenticatedClientContext]
+        ] = defaultdict(set)
+        self._admin_clients: Set[AuthenticatedClientContext] = set()
 
-    @api("events_subscribe")
-    @catch_protocol_errors
-    @api_typed_msg_adapter(EventsSubscribeReq, EventsSubscribeRep)
-    async def api_events_subscribe(
-        self, client_ctx: AuthenticatedClientContext, msg: dict[str, object]
-    ) -> EventsSubscribeRep:
-        await self.connect_events(client_ctx)
-        return EventsSubscribeRepOk()
+        event_bus.connect(BackendEvent.PINGED, self._on_pinged)  # type: ignore[arg-type]
+        event_bus.connect(
+            BackendEvent.REALM_VLOBS_UPDATED,
+            partial(self._on_realm_events, EventsListenRepOkRealmVlobsUpdated),
+        )
+        event_bus.connect(
+            BackendEvent.REALM_MAINTENANCE_STARTED,
+            partial(self._on_realm_events, EventsListenRepOkRealmMaintenanceStarted),
+        )
+        event_bus.connect(
+            BackendEvent.REALM_MAINTENANCE_FINISHED,
+            partial(self._on_realm_events, EventsListenRepOkRealmMaintenanceFinished),
+        )
+        event_bus.connect(
+            BackendEvent.MESSAGE_RECEIVED, self._on_message_received  # type: ignore[arg-type]
+        )
+        event_bus.connect(
+            BackendEvent.INVITE_STATUS_CHANGED,
+            self._on_invite_status_changed,  # type: ignore[arg-type]
+        )
+        event_bus.connect(
+            BackendEvent.PKI_ENROLLMENTS_UPDATED,
+            self._on_pki_enrollment_updated,  # type: ignore[arg-type]
+        )
+        # Keep up to date the list of realm each client should listen on
+        event_bus.connect(
+            BackendEvent.REALM_ROLES_UPDATED, self._on_roles_updated  # type: ignore[arg-type]
+        )
 
-    async def connect_events(self, client_ctx: AuthenticatedClientContext) -> None:
-        def _on_roles_updated(
-            backend_event: BackendEvent,
-            organization_id: OrganizationID,
-            author: DeviceID,
-            realm_id: RealmID,
-            user: UserID,
-            role: RealmRole,
-        ) -> None:
-            if organization_id != client_ctx.organization_id or user != client_ctx.user_id:
-                return
+    @staticmethod
+    def _discard_client(
+        index: DefaultDict[K, Set[AuthenticatedClientContext]],
+        key: K,
+        client_ctx: AuthenticatedClientContext,
+    ) -> None:
+        clients = index.get(key)
+        if clients is None:
+            return
+        clients.discard(client_ctx)
+        # Don't keep track of organizations/users/realms without clients
+        if not clients:
+            del index[key]
 
+    def _on_roles_updated(
+        self,
+        backend_event: BackendEvent,
+        organization_id: OrganizationID,
+        author: DeviceID,
+        realm_id: RealmID,
+        user: UserID,
+        role: RealmRole,
+    ) -> None:
+        # Copy the clients given a slow one can get disconnected while iterating
+        for client_ctx in tuple(self._user_clients.get((organization_id, user), ())):
             if role is None:
                 client_ctx.realms.discard(realm_id)
+                self._discard_client(self._realm_clients, (organization_id, realm_id), client_ctx)
             else:
                 client_ctx.realms.add(realm_id)
+                self._realm_clients[(organization_id, realm_id)].add(client_ctx)
 
             # Note for this event we don't filter out the ones sent by the client's
             # device, there is two reason for this:
             # 1) A user cannot change it own role, so this case should never occur
             # 2) Returning this event inform the peer we are ready to send it
             #    `realm.vlobs_updated` events on this realm (especially useful during tests)
-            try:
-                client_ctx.send_events_channel.send_nowait(
-                    EventsListenRepOkRealmRolesUpdated(realm_id, role)
-                )
-            except trio.WouldBlock:
-                client_ctx.close_connection_asap()
+            client_ctx.send_event(EventsListenRepOkRealmRolesUpdated(realm_id, role))
 
-        def _on_pinged(
-            backend_event: BackendEvent,
-            organization_id: OrganizationID,
-            author: DeviceID,
-            ping: str,
-        ) -> None:
-            if organization_id != client_ctx.organization_id or author == client_ctx.device_id:
-                return
+    def _on_pinged(
+        self,
+        backend_event: BackendEvent,
+        organization_id: OrganizationID,
+        author: DeviceID,
+        ping: str,
+    ) -> None:
+        for client_ctx in tuple(self._organization_clients.get(organization_id, ())):
+            if author != client_ctx.device_id:
+                client_ctx.send_event(EventsListenRepOkPinged(ping))
 
-            try:
-                client_ctx.send_events_channel.send_nowait(EventsListenRepOkPinged(ping))
-            except trio.WouldBlock:
-                client_ctx.close_connection_asap()
-
-        def _on_realm_events(
-            events_listen_rep_cls: Union[
-                Type[EventsListenRepOkRealmVlobsUpdated],
-                Type[EventsListenRepOkRealmMaintenanceStarted],
-                Type[EventsListenRepOkRealmMaintenanceFinished],
-            ],
-            backend_event: BackendEvent,
-            organization_id: OrganizationID,
-            author: DeviceID,
-            realm_id: RealmID,
-            **kwargs: Any,
-        ) -> None:
-            if (
-                organization_id != client_ctx.organization_id
-                or author == client_ctx.device_id
-                or realm_id not in client_ctx.realms
-            ):
-                return
-            try:
-                client_ctx.send_events_channel.send_nowait(
-                    events_listen_rep_cls(realm_id, **kwargs)
-                )
-            except trio.WouldBlock:
-                client_ctx.close_connection_asap()
-
-        def _on_message_received(
-            backend_event: BackendEvent,
-            organization_id: OrganizationID,
-            author: DeviceID,
-            recipient: UserID,
-            index: int,
-        ) -> None:
-            if organization_id != client_ctx.organization_id or recipient != client_ctx.user_id:
-                return
+    def _on_realm_events(
+        self,
+        events_listen_rep_cls: Union[
+            Type[EventsListenRepOkRealmVlobsUpdated],
+            Type[EventsListenRepOkRealmMaintenanceStarted],
+            Type[EventsListenRepOkRealmMaintenanceFinished],
+        ],
+        backend_event: BackendEvent,
+        organization_id: OrganizationID,
+        author: DeviceID,
+        realm_id: RealmID,
+        **kwargs: Any,
+    ) -> None:
+        clients = tuple(self._realm_clients.get((organization_id, realm_id), ()))
+        if not clients:
+            return
+        event_rep = events_listen_rep_cls(realm_id, **kwargs)
+        for client_ctx in clients:
+            if author != client_ctx.device_id:
+                client_ctx.send_event(event_rep)
 
-            try:
-                client_ctx.send_events_channel.send_nowait(EventsListenRepOkMessageReceived(index))
-            except trio.WouldBlock:
-                client_ctx.close_connection_asap()
-
-        def _on_invite_status_changed(
-            backend_event: BackendEvent,
-            organization_id: OrganizationID,
-            greeter: UserID,
-            token: InvitationToken,
-            status: InvitationStatus,
-        ) -> None:
-            if organization_id != client_ctx.organization_id or greeter != client_ctx.user_id:
-                return
+    def _on_message_received(
+        self,
+        backend_event: BackendEvent,
+        organization_id: OrganizationID,
+        author: DeviceID,
+        recipient: UserID,
+        index: int,
+    ) -> None:
+        for client_ctx in tuple(self._user_clients.get((organization_id, recipient), ())):
+            client_ctx.send_event(EventsListenRepOkMessageReceived(index))
 
-            try:
-                client_ctx.send_events_channel.send_nowait(
-                    EventsListenRepOkInviteStatusChanged(token, status)
-                )
-            except trio.WouldBlock:
-                client_ctx.close_connection_asap()
-
-        def _on_pki_enrollment_updated(
-            backend_event: BackendEvent,
-            organization_id: OrganizationID,
-        ) -> None:
-            if (
-                organization_id != client_ctx.organization_id
-                and client_ctx.profile != UserProfile.ADMIN
-            ):
-                return
-            try:
-                client_ctx.send_events_channel.send_nowait(EventsListenRepOkPkiEnrollmentUpdated())
-            except trio.WouldBlock:
-                client_ctx.close_connection_asap()
+    def _on_invite_status_changed(
+        self,
+        backend_event: BackendEvent,
+        organization_id: OrganizationID,
+        greeter: UserID,
+        token: InvitationToken,
+        status: InvitationStatus,
+    ) -> None:
+        for client_ctx in tuple(self._user_clients.get((organization_id, greeter), ())):
+            client_ctx.send_event(EventsListenRepOkInviteStatusChanged(token, status))
 
+    def _on_pki_enrollment_updated(
+        self,
+        backend_event: BackendEvent,
+        organization_id: OrganizationID,
+    ) -> None:
+        clients = self._organization_clients.get(organization_id, set()) | self._admin_clients
+        for client_ctx in clients:
+            client_ctx.send_event(EventsListenRepOkPkiEnrollmentUpdated())
+
+    @api("events_subscribe")
+    @catch_protocol_errors
+    @api_typed_msg_adapter(EventsSubscribeReq, EventsSubscribeRep)
+    async def api_events_subscribe(
+        self, client_ctx: AuthenticatedClientContext, msg: dict[str, object]
+    ) -> EventsSubscribeRep:
+        await self.connect_events(client_ctx)
+        return EventsSubscribeRepOk()
+
+    async def connect_events(self, client_ctx: AuthenticatedClientContext) -> None:
         # Command should be idempotent
+        if client_ctx.events_subscribed:
+            return
+
+        # Register the client
+        self._organization_clients[client_ctx.organization_id].add(client_ctx)
+        self._user_clients[(client_ctx.organization_id, client_ctx.user_id)].add(client_ctx)
+        if client_ctx.profile == UserProfile.ADMIN:
+            self._admin_clients.add(client_ctx)
+        client_ctx.events_subscribed = True
+
+        # Finally populate the list of realm we should listen on
+        realms_for_user = await self._realm_component.get_realms_for_user(
+            client_ctx.organization_id, client_ctx.user_id
+        )
+        # The client might have been disconnected in the meantime
+        if not client_ctx.events_subscribed:
+            return
+        client_ctx.realms.update(realms_for_user.keys())
+        for realm_id in client_ctx.realms:
+            self._realm_clients[(client_ctx.organization_id, realm_id)].add(client_ctx)
+
+    def disconnect_events(self, client_ctx: AuthenticatedClientContext) -> None:
         if not client_ctx.events_subscribed:
-            # Connect the new callbacks
-            client_ctx.event_bus_ctx.connect(
-                BackendEvent.PINGED, _on_pinged  # type: ignore[arg-type]
-            )
-            client_ctx.event_bus_ctx.connect(
-                BackendEvent.REALM_VLOBS_UPDATED,
-                partial(_on_realm_events, EventsListenRepOkRealmVlobsUpdated),
-            )
-            client_ctx.event_bus_ctx.connect(
-                BackendEvent.REALM_MAINTENANCE_STARTED,
-                partial(_on_realm_events, EventsListenRepOkRealmMaintenanceStarted),
-            )
-            client_ctx.event_bus_ctx.connect(
-                BackendEvent.REALM_MAINTENANCE_FINISHED,
-                partial(_on_realm_events, EventsListenRepOkRealmMaintenanceFinished),
-            )
-            client_ctx.event_bus_ctx.connect(
-                BackendEvent.MESSAGE_RECEIVED,
-                _on_message_received,  # type: ignore[arg-type]
-            )
-            client_ctx.event_bus_ctx.connect(
-                BackendEvent.INVITE_STATUS_CHANGED,
-                _on_invite_status_changed,  # type: ignore[arg-type]
-            )
-
-            client_ctx.event_bus_ctx.connect(
-                BackendEvent.PKI_ENROLLMENTS_UPDATED,
-                _on_pki_enrollment_updated,  # type: ignore[arg-type]
-            )
-
-            # Final event to keep up to date the list of realm we should listen on
-            client_ctx.event_bus_ctx.connect(
-                BackendEvent.REALM_ROLES_UPDATED,
-                _on_roles_updated,  # type: ignore[arg-type]
-            )
-
-            # Finally populate the list of realm we should listen on
-            realms_for_user = await self._realm_component.get_realms_for_user(
-                client_ctx.organization_id, client_ctx.user_id
-            )
-            client_ctx.realms = set(realms_for_user.keys())
-            client_ctx.events_subscribed = True
+            return
+
+        organization_id = client_ctx.organization_id
+        self._discard_client(self._organization_clients, organization_id, client_ctx)
+        self._discard_client(self._user_clients, (organization_id, client_ctx.user_id), client_ctx)
+        for realm_id in client_ctx.realms:
+            self._discard_client(self._realm_clients, (organization_id, realm_id), client_ctx)
+        self._admin_clients.discard(client_ctx)
+        client_ctx.events_subscribed = False
 
     @api("events_listen", cancel_on_client_sending_new_cmd=True)
     @catch_protocol_errors
@@ -220,11 +246,11 @@ class EventsComponent:
         self, client_ctx: AuthenticatedClientContext, msg: EventsListenReq
     ) -> EventsListenRep:
         if msg.wait:
-            event_rep = await client_ctx.receive_events_channel.receive()
+            event_rep = await client_ctx.receive_event()
 
         else:
             try:
-                event_rep = client_ctx.receive_events_channel.receive_nowait()
+                event_rep = client_ctx.receive_event_nowait()
             except trio.WouldBlock:
                 return EventsListenRepNoEvents()
 
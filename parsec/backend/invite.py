@@ -583,7 +583,7 @@ class BaseInviteComponent:
 
         return Invite1ClaimerWaitPeerRepOk(PublicKey(greeter_public_key))
 
-    @api("invite_1_greeter_wait_peer")
+    @api("invite_1_greeter_wait_peer", long_waiting=True)
     @catch_protocol_errors
     @api_typed_msg_adapter(Invite1GreeterWaitPeerReq, Invite1GreeterWaitPeerRep)
     async def api_invite_1_greeter_wait_peer(
@@ -611,6 +611,7 @@ class BaseInviteComponent:
 
     @api(
         "invite_2a_claimer_send_hashed_nonce",
+        long_waiting=True,
         client_types=[ClientType.INVITED],
     )
     @catch_protocol_errors
@@ -654,7 +655,7 @@ class BaseInviteComponent:
 
         return Invite2aClaimerSendHashedNonceRepOk(greeter_nonce)
 
-    @api("invite_2a_greeter_get_hashed_nonce")
+    @api("invite_2a_greeter_get_hashed_nonce", long_waiting=True)
     @catch_protocol_errors
     @api_typed_msg_adapter(Invite2aGreeterGetHashedNonceReq, Invite2aGreeterGetHashedNonceRep)
     async def api_invite_2a_greeter_get_hashed_nonce(
@@ -682,7 +683,7 @@ class BaseInviteComponent:
 
         return Invite2aGreeterGetHashedNonceRepOk(claimer_hashed_nonce)
 
-    @api("invite_2b_greeter_send_nonce")
+    @api("invite_2b_greeter_send_nonce", long_waiting=True)
     @catch_protocol_errors
     @api_typed_msg_adapter(Invite2bGreeterSendNonceReq, Invite2bGreeterSendNonceRep)
     async def api_invite_2b_greeter_send_nonce(
@@ -716,7 +717,7 @@ class BaseInviteComponent:
 
         return Invite2bGreeterSendNonceRepOk(claimer_nonce)
 
-    @api("invite_2b_claimer_send_nonce", client_types=[ClientType.INVITED])
+    @api("invite_2b_claimer_send_nonce", long_waiting=True, client_types=[ClientType.INVITED])
     @catch_protocol_errors
     @api_typed_msg_adapter(Invite2bClaimerSendNonceReq, Invite2bClaimerSendNonceRep)
     async def api_invite_2b_claimer_send_nonce(
@@ -747,7 +748,7 @@ class BaseInviteComponent:
 
         return Invite2bClaimerSendNonceRepOk()
 
-    @api("invite_3a_greeter_wait_peer_trust")
+    @api("invite_3a_greeter_wait_peer_trust", long_waiting=True)
     @catch_protocol_errors
     @api_typed_msg_adapter(Invite3aGreeterWaitPeerTrustReq, Invite3aGreeterWaitPeerTrustRep)
     async def api_invite_3a_greeter_wait_peer_trust(
@@ -773,7 +774,7 @@ class BaseInviteComponent:
 
         return Invite3aGreeterWaitPeerTrustRepOk()
 
-    @api("invite_3b_claimer_wait_peer_trust", client_types=[ClientType.INVITED])
+    @api("invite_3b_claimer_wait_peer_trust", long_waiting=True, client_types=[ClientType.INVITED])
     @catch_protocol_errors
     @api_typed_msg_adapter(Invite3bClaimerWaitPeerTrustReq, Invite3bClaimerWaitPeerTrustRep)
     async def api_invite_3b_claimer_wait_peer_trust(
@@ -804,7 +805,7 @@ class BaseInviteComponent:
 
         return Invite3bClaimerWaitPeerTrustRepOk()
 
-    @api("invite_3b_greeter_signify_trust")
+    @api("invite_3b_greeter_signify_trust", long_waiting=True)
     @catch_protocol_errors
     @api_typed_msg_adapter(Invite3bGreeterSignifyTrustReq, Invite3bGreeterSignifyTrustRep)
     async def api_invite_3b_greeter_signify_trust(
@@ -830,7 +831,7 @@ class BaseInviteComponent:
 
         return Invite3bGreeterSignifyTrustRepOk()
 
-    @api("invite_3a_claimer_signify_trust", client_types=[ClientType.INVITED])
+    @api("invite_3a_claimer_signify_trust", long_waiting=True, client_types=[ClientType.INVITED])
     @catch_protocol_errors
     @api_typed_msg_adapter(Invite3aClaimerSignifyTrustReq, Invite3aClaimerSignifyTrustRep)
     async def api_invite_3a_claimer_signify_trust(
@@ -861,7 +862,7 @@ class BaseInviteComponent:
 
         return Invite3aClaimerSignifyTrustRepOk()
 
-    @api("invite_4_greeter_communicate")
+    @api("invite_4_greeter_communicate", long_waiting=True)
     @catch_protocol_errors
     @api_typed_msg_adapter(Invite4GreeterCommunicateReq, Invite4GreeterCommunicateRep)
     async def api_invite_4_greeter_communicate(
@@ -887,7 +888,7 @@ class BaseInviteComponent:
 
         return Invite4GreeterCommunicateRepOk(answer_payload)
 
-    @api("invite_4_claimer_communicate", client_types=[ClientType.INVITED])
+    @api("invite_4_claimer_communicate", long_waiting=True, client_types=[ClientType.INVITED])
     @catch_protocol_errors
     @api_typed_msg_adapter(Invite4ClaimerCommunicateReq, Invite4ClaimerCommunicateRep)
     async def api_invite_4_claimer_communicate(
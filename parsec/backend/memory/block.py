@@ -99,6 +99,13 @@ class MemoryBlockComponent(BaseBlockComponent):
     ) -> bytes:
         assert self._blockstore_component is not None
 
+        await self.read_size(organization_id, author, block_id)
+
+        return await self._blockstore_component.read(organization_id, block_id)
+
+    async def read_size(
+        self, organization_id: OrganizationID, author: DeviceID, block_id: BlockID
+    ) -> int:
         try:
             blockmeta = self._blockmetas[(organization_id, block_id)]
 
@@ -107,7 +114,7 @@ class MemoryBlockComponent(BaseBlockComponent):
 
         self._check_realm_read_access(organization_id, blockmeta.realm_id, author.user_id)
 
-        return await self._blockstore_component.read(organization_id, block_id)
+        return blockmeta.size
 
     async def create(
         self,
@@ -127,6 +134,11 @@ class MemoryBlockComponent(BaseBlockComponent):
 
         await self._blockstore_component.create(organization_id, block_id, block)
 
+        # Access may have changed during the upload, same for unicity
+        self._check_realm_write_access(organization_id, realm_id, author.user_id)
+        if (organization_id, block_id) in self._blockmetas:
+            raise BlockAlreadyExistsError()
+
         self._blockmetas[(organization_id, block_id)] = BlockMeta(realm_id, len(block), created_on)
 
 
@@ -4,7 +4,7 @@ from __future__ import annotations
 from collections import defaultdict
 from dataclasses import dataclass
 from dataclasses import field as dataclass_field
-from typing import TYPE_CHECKING, AbstractSet, Any, Callable, Coroutine, Dict, List, Tuple
+from typing import TYPE_CHECKING, AbstractSet, Any, Callable, Coroutine, Dict, List, Set, Tuple
 
 from parsec._parsec import DateTime
 from parsec.api.protocol import (
@@ -465,6 +465,11 @@ class MemoryVlobComponent(BaseVlobComponent):
             organization_id, vlob.realm_id, author.user_id, encryption_revision, timestamp
         )
 
+        return self._read_vlob(realm, vlob, version, timestamp)
+
+    def _read_vlob(
+        self, realm: "Realm", vlob: Vlob, version: int | None, timestamp: DateTime | None
+    ) -> Tuple[int, bytes, DeviceID, DateTime, DateTime]:
         if version is None:
             if timestamp is None:
                 version = vlob.current_version
@@ -525,6 +530,143 @@ class MemoryVlobComponent(BaseVlobComponent):
             organization_id, author, vlob.realm_id, vlob_id, timestamp, version
         )
 
+    def _check_create_batch(self, organization_id: OrganizationID, vlob_ids: Set[VlobID]) -> None:
+        if any((organization_id, vlob_id) in self._vlobs for vlob_id in vlob_ids):
+            raise VlobAlreadyExistsError()
+
+    def _check_update_batch(
+        self,
+        vlobs: List[Vlob],
+        batch: List[Tuple[VlobID, int, bytes, Dict[SequesterServiceID, bytes] | None]],
+        timestamp: DateTime,
+    ) -> None:
+        for vlob, (_, version, _, _) in zip(vlobs, batch):
+            if version - 1 != vlob.current_version:
+                raise VlobVersionError()
+            if timestamp < vlob.data[vlob.current_version - 1][2]:
+                raise VlobRequireGreaterTimestampError(vlob.data[vlob.current_version - 1][2])
+
+    async def create_batch(
+        self,
+        organization_id: OrganizationID,
+        author: DeviceID,
+        realm_id: RealmID,
+        encryption_revision: int,
+        timestamp: DateTime,
+        batch: List[Tuple[VlobID, bytes, Dict[SequesterServiceID, bytes] | None]],
+    ) -> None:
+        self._check_realm_write_access(
+            organization_id, realm_id, author.user_id, encryption_revision, timestamp
+        )
+
+        vlob_ids = {vlob_id for vlob_id, _, _ in batch}
+        if len(vlob_ids) != len(batch):
+            raise VlobAlreadyExistsError()
+        # Reject an invalid batch before sending anything to the sequester webhooks
+        self._check_create_batch(organization_id, vlob_ids)
+
+        batch_sequestered_data = []
+        for vlob_id, _, sequester_blob in batch:
+            extracted_sequestered_data = await self._extract_sequestered_data_and_proceed_webhook(
+                organization_id=organization_id,
+                author=author,
+                encryption_revision=encryption_revision,
+                vlob_id=vlob_id,
+                timestamp=timestamp,
+                sequester_blob=sequester_blob,
+            )
+            batch_sequestered_data.append(
+                None if extracted_sequestered_data is None else [extracted_sequestered_data]
+            )
+
+        # Check again the whole batch before creating anything, given the vlobs
+        # may have changed while waiting for the webhooks
+        self._check_create_batch(organization_id, vlob_ids)
+
+        for (vlob_id, blob, _), sequestered_data in zip(batch, batch_sequestered_data):
+            self._vlobs[(organization_id, vlob_id)] = Vlob(
+                realm_id, [(blob, author, timestamp)], sequestered_data
+            )
+
+        for vlob_id, _, _ in batch:
+            await self._update_changes(organization_id, author, realm_id, vlob_id, timestamp)
+
+    async def read_batch(
+        self,
+        organization_id: OrganizationID,
+        author: DeviceID,
+        realm_id: RealmID,
+        encryption_revision: int,
+        vlob_ids: List[VlobID],
+        timestamp: DateTime | None = None,
+    ) -> Dict[VlobID, Tuple[int, bytes, DeviceID, DateTime, DateTime]]:
+        realm = self._check_realm_read_access(
+            organization_id, realm_id, author.user_id, encryption_revision, timestamp
+        )
+
+        result = {}
+        for vlob_id in vlob_ids:
+            vlob = self._vlobs.get((organization_id, vlob_id))
+            if vlob is None or vlob.realm_id != realm_id:
+                continue
+            try:
+                result[vlob_id] = self._read_vlob(realm, vlob, None, timestamp)
+            except VlobVersionError:
+                continue
+        return result
+
+    async def update_batch(
+        self,
+        organization_id: OrganizationID,
+        author: DeviceID,
+        realm_id: RealmID,
+        encryption_revision: int,
+        timestamp: DateTime,
+        batch: List[Tuple[VlobID, int, bytes, Dict[SequesterServiceID, bytes] | None]],
+    ) -> None:
+        self._check_realm_write_access(
+            organization_id, realm_id, author.user_id, encryption_revision, timestamp
+        )
+
+        if len({vlob_id for vlob_id, _, _, _ in batch}) != len(batch):
+            raise VlobVersionError()
+        vlobs = []
+        for vlob_id, _, _, _ in batch:
+            vlob = self._get_vlob(organization_id, vlob_id)
+            if vlob.realm_id != realm_id:
+                raise VlobNotFoundError(f"Vlob `{vlob_id.hex}` doesn't exist")
+            vlobs.append(vlob)
+        # Reject an invalid batch before sending anything to the sequester webhooks
+        self._check_update_batch(vlobs, batch, timestamp)
+
+        batch_sequestered_data = []
+        for vlob_id, _, _, sequester_blob in batch:
+            batch_sequestered_data.append(
+                await self._extract_sequestered_data_and_proceed_webhook(
+                    organization_id=organization_id,
+                    author=author,
+                    encryption_revision=encryption_revision,
+                    vlob_id=vlob_id,
+                    timestamp=timestamp,
+                    sequester_blob=sequester_blob,
+                )
+            )
+
+        # Check again the whole batch before updating anything, given the vlobs
+        # may have changed while waiting for the webhooks
+        self._check_update_batch(vlobs, batch, timestamp)
+
+        for vlob, (_, _, blob, _), sequestered_data in zip(vlobs, batch, batch_sequestered_data):
+            vlob.data.append((blob, author, timestamp))
+            if sequestered_data is not None:  # /!\ We want to accept empty dicts !
+                assert vlob.sequestered_data is not None
+                vlob.sequestered_data.append(sequestered_data)
+
+        for vlob_id, version, _, _ in batch:
+            await self._update_changes(
+                organization_id, author, realm_id, vlob_id, timestamp, version
+            )
+
     async def poll_changes(
         self, organization_id: OrganizationID, author: DeviceID, realm_id: RealmID, checkpoint: int
     ) -> Tuple[int, Dict[VlobID, int]]:
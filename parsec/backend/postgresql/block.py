@@ -17,6 +17,7 @@ from parsec.backend.block import (
 )
 from parsec.backend.blockstore import BaseBlockStoreComponent
 from parsec.backend.postgresql.handler import PGHandler
+from parsec.backend.postgresql.realm_access_cache import RealmAccessCache
 from parsec.backend.postgresql.realm_queries.maintenance import RealmNotFoundError, get_realm_status
 from parsec.backend.postgresql.utils import (
     Q,
@@ -47,6 +48,7 @@ _q_get_block_meta = Q(
     f"""
 SELECT
     deleted_on,
+    size,
     {
         q_user_can_read_vlob(
             user=q_user_internal_id(
@@ -104,10 +106,11 @@ async def _check_realm(
     organization_id: OrganizationID,
     realm_id: RealmID,
     operation_kind: OperationKind,
+    realm_access_cache: RealmAccessCache | None = None,
 ) -> None:
     # Fetch the realm status maintenance type
     try:
-        status = await get_realm_status(conn, organization_id, realm_id)
+        status = await get_realm_status(conn, organization_id, realm_id, realm_access_cache)
     except RealmNotFoundError as exc:
         raise BlockNotFoundError(*exc.args) from exc
 
@@ -128,6 +131,14 @@ class PGBlockComponent(BaseBlockComponent):
     async def read(
         self, organization_id: OrganizationID, author: DeviceID, block_id: BlockID
     ) -> bytes:
+        await self.read_size(organization_id, author, block_id)
+        # We can do the blockstore read outside of the transaction given the block
+        # are never modified/removed
+        return await self._blockstore_component.read(organization_id, block_id)
+
+    async def read_size(
+        self, organization_id: OrganizationID, author: DeviceID, block_id: BlockID
+    ) -> int:
         async with self.dbh.pool.acquire() as conn, conn.transaction():
             realm_id_uuid = await conn.fetchval(
                 *_q_get_realm_id_from_block_id(
@@ -137,7 +148,13 @@ class PGBlockComponent(BaseBlockComponent):
             if not realm_id_uuid:
                 raise BlockNotFoundError()
             realm_id = RealmID.from_hex(realm_id_uuid)
-            await _check_realm(conn, organization_id, realm_id, OperationKind.DATA_READ)
+            await _check_realm(
+                conn,
+                organization_id,
+                realm_id,
+                OperationKind.DATA_READ,
+                realm_access_cache=self.dbh.realm_access_cache,
+            )
             ret = await conn.fetchrow(
                 *_q_get_block_meta(
                     organization_id=organization_id.str,
@@ -151,9 +168,39 @@ class PGBlockComponent(BaseBlockComponent):
             elif not ret["has_access"]:
                 raise BlockAccessError()
 
-        # We can do the blockstore read outside of the transaction given the block
-        # are never modified/removed
-        return await self._blockstore_component.read(organization_id, block_id)
+            return ret["size"]
+
+    async def _check_write_access(
+        self,
+        conn: triopg._triopg.TrioConnectionProxy,
+        organization_id: OrganizationID,
+        author: DeviceID,
+        block_id: BlockID,
+        realm_id: RealmID,
+    ) -> bool:
+        """
+        Returns whether the block already exists.
+
+        Raises:
+            BlockNotFoundError
+            BlockInMaintenanceError
+            BlockAccessError
+        """
+        # Never use the realm access cache for writes, the maintenance may have
+        # been started by another backend process whose notification is not
+        # received yet
+        await _check_realm(conn, organization_id, realm_id, OperationKind.DATA_WRITE)
+        ret = await conn.fetchrow(
+            *_q_get_block_write_right_and_unicity(
+                organization_id=organization_id.str,
+                user_id=author.user_id.str,
+                realm_id=realm_id,
+                block_id=block_id,
+            )
+        )
+        if not ret["has_access"]:
+            raise BlockAccessError()
+        return ret["exists"]
 
     async def create(
         self,
@@ -165,41 +212,40 @@ class PGBlockComponent(BaseBlockComponent):
         created_on: DateTime | None = None,
     ) -> None:
         created_on = created_on or DateTime.now()
-        async with self.dbh.pool.acquire() as conn, conn.transaction():
-            await _check_realm(conn, organization_id, realm_id, OperationKind.DATA_WRITE)
 
-            # 1) Check access rights and block unicity
-            # Note it's important to check unicity here because blockstore create
-            # overwrite existing data !
-            ret = await conn.fetchrow(
-                *_q_get_block_write_right_and_unicity(
-                    organization_id=organization_id.str,
-                    user_id=author.user_id.str,
-                    realm_id=realm_id,
-                    block_id=block_id,
-                )
+        # 1) Check access rights and block unicity
+        # Note it's important to check unicity here because blockstore create
+        # overwrite existing data !
+        async with self.dbh.pool.acquire() as conn:
+            exists = await self._check_write_access(
+                conn, organization_id, author, block_id, realm_id
             )
-
-            if not ret["has_access"]:
-                raise BlockAccessError()
-
-            elif ret["exists"]:
+            if exists:
                 raise BlockAlreadyExistsError()
 
-            # 2) Upload block data in blockstore under an arbitrary id
-            # Given block metadata and block data are stored on different storages,
-            # being atomic is not easy here :(
-            # For instance step 2) can be successful (or can be successful on *some*
-            # blockstores in case of a RAID blockstores configuration) but step 4) fails.
-            # This is solved by the fact blockstores are considered idempotent and two
-            # create operations with the same orgID/ID couple are expected to have the
-            # same block data.
-            # Hence any blockstore create failure result in postgres transaction
-            # cancellation, and blockstore create success can be overwritten by another
-            # create in case the postgres transaction was cancelled in step 3)
-            await self._blockstore_component.create(organization_id, block_id, block)
-
-            # 3) Insert the block metadata into the database
+        # 2) Upload block data in blockstore under an arbitrary id
+        # No database connection is held during the upload given it can take a
+        # while (especially with a RAID blockstores configuration), otherwise a
+        # burst of uploads would starve the connection pool for all the other
+        # commands.
+        # Given block metadata and block data are stored on different storages,
+        # being atomic is not easy here :(
+        # For instance step 2) can be successful (or can be successful on *some*
+        # blockstores in case of a RAID blockstores configuration) but step 3) fails.
+        # This is solved by the fact blockstores are considered idempotent and two
+        # create operations with the same orgID/ID couple are expected to have the
+        # same block data.
+        # Hence any blockstore create failure result in the block creation being
+        # cancelled, and blockstore create success can be overwritten by another
+        # create in case step 3) failed.
+        await self._blockstore_component.create(organization_id, block_id, block)
+
+        # 3) Insert the block metadata into the database
+        async with self.dbh.pool.acquire() as conn, conn.transaction():
+            # The realm may have entered maintenance or the author may have lost
+            # its write access during the upload. On the other hand unicity is
+            # enforced by the insertion itself.
+            await self._check_write_access(conn, organization_id, author, block_id, realm_id)
             try:
                 ret = await conn.execute(
                     *_q_insert_block(
@@ -232,6 +278,18 @@ WHERE
 )
 
 
+_q_get_block_data_range = Q(
+    """
+SELECT
+    substring(data FROM $offset + 1 FOR $size)
+FROM block_data
+WHERE
+    organization_id = $organization_id
+    AND block_id = $block_id
+"""
+)
+
+
 _q_insert_block_data = Q(
     """
 INSERT INTO block_data (organization_id, block_id, data)
@@ -254,6 +312,23 @@ class PGBlockStoreComponent(BaseBlockStoreComponent):
 
             return ret[0]
 
+    async def read_range(
+        self, organization_id: OrganizationID, block_id: BlockID, offset: int, size: int
+    ) -> bytes:
+        async with self.dbh.pool.acquire() as conn:
+            ret = await conn.fetchrow(
+                *_q_get_block_data_range(
+                    organization_id=organization_id.str,
+                    block_id=block_id,
+                    offset=offset,
+                    size=size,
+                )
+            )
+            if not ret:
+                raise BlockStoreError("Block not found")
+
+            return ret[0]
+
     async def create(
         self, organization_id: OrganizationID, block_id: BlockID, block: bytes
     ) -> None:
@@ -20,6 +20,7 @@ from typing_extensions import ParamSpec
 from parsec._parsec import ActiveUsersLimit, DateTime
 from parsec.backend.backend_events import BackendEvent, backend_event_serializer
 from parsec.backend.postgresql import migrations as migrations_module
+from parsec.backend.postgresql.realm_access_cache import RealmAccessCache
 from parsec.event_bus import EventBus
 from parsec.serde import SerdePackingError, SerdeValidationError
 from parsec.utils import TaskStatus, start_task
@@ -208,6 +209,7 @@ class PGHandler:
         self.min_connections = min_connections
         self.max_connections = max_connections
         self.event_bus = event_bus
+        self.realm_access_cache = RealmAccessCache(event_bus)
         self.pool: triopg._triopg.TrioPoolProxy
         self.notification_conn: triopg._triopg.TrioConnectionProxy
         self._task_status: TaskStatus[None] | None = None
@@ -242,6 +244,8 @@ class PGHandler:
                     self._on_notification_conn_termination
                 )
                 await self.notification_conn.add_listener("app_notification", self._on_notification)
+                # Notifications might have been missed before listening
+                self.realm_access_cache.clear()
                 task_status.started()
                 try:
                     await trio.sleep_forever()
@@ -258,6 +262,7 @@ class PGHandler:
     # And the simplest way to do that is to raise a big exception in _run_connections ;-)
     def _on_notification_conn_termination(self, conn: triopg._triopg.TrioConnectionProxy) -> None:
         self._connection_lost = True
+        self.realm_access_cache.clear()
         if self._task_status:
             self._task_status.cancel()
 
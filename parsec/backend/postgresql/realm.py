@@ -30,6 +30,9 @@ class PGRealmComponent(BaseRealmComponent):
     ) -> None:
         async with self.dbh.pool.acquire() as conn:
             await query_create(conn, organization_id, self_granted_role)
+        self.dbh.realm_access_cache.invalidate_realm_role(
+            organization_id, self_granted_role.realm_id, self_granted_role.user_id
+        )
 
     async def get_status(
         self, organization_id: OrganizationID, author: DeviceID, realm_id: RealmID
@@ -69,6 +72,11 @@ class PGRealmComponent(BaseRealmComponent):
     ) -> None:
         async with self.dbh.pool.acquire() as conn:
             await query_update_roles(conn, organization_id, new_role, recipient_message)
+        # Don't wait for the notification to come back, the author is likely to
+        # have the recipient use this new role right away
+        self.dbh.realm_access_cache.invalidate_realm_role(
+            organization_id, new_role.realm_id, new_role.user_id
+        )
 
     async def start_reencryption_maintenance(
         self,
@@ -89,6 +97,7 @@ class PGRealmComponent(BaseRealmComponent):
                 per_participant_message,
                 timestamp,
             )
+        self.dbh.realm_access_cache.invalidate_realm_status(organization_id, realm_id)
 
     async def finish_reencryption_maintenance(
         self,
@@ -101,6 +110,7 @@ class PGRealmComponent(BaseRealmComponent):
             await query_finish_reencryption_maintenance(
                 conn, organization_id, author, realm_id, encryption_revision
             )
+        self.dbh.realm_access_cache.invalidate_realm_status(organization_id, realm_id)
 
     async def dump_realms_granted_roles(
         self, organization_id: OrganizationID
@@ -0,0 +1,145 @@
+# Parsec Cloud (https://parsec.cloud) Copyright (c) BUSL-1.1 (eventually AGPL-3.0) 2016-present Scille SAS
+from __future__ import annotations
+
+from typing import Any, Dict, Tuple
+
+import trio
+
+from parsec._parsec import DateTime
+from parsec.api.protocol import OrganizationID, RealmID, RealmRole, UserID
+from parsec.backend.backend_events import BackendEvent
+from parsec.backend.realm import RealmStatus
+from parsec.event_bus import EventBus
+
+__all__ = ("RealmAccessCache",)
+
+
+# Entries are invalidated as soon as the corresponding event is received, the
+# time to live is only a safety net against a notification that would get lost
+REALM_ACCESS_CACHE_TTL = 60.0  # seconds
+REALM_ACCESS_CACHE_MAX_ENTRIES = 100_000
+
+
+class RealmAccessCache:
+    """Process-wide cache of the realm statuses and of the users' last role in a realm.
+
+    Vlob and block read commands check the realm status and the author role
+    before doing anything, this cache saves those two queries on the hot path.
+    Write commands never use it and check both within their transaction: a
+    stale entry would let a write reach a realm under maintenance or an author
+    who has lost their role.
+
+    Invalidation relies on the `REALM_ROLES_UPDATED`, `REALM_MAINTENANCE_STARTED`
+    and `REALM_MAINTENANCE_FINISHED` events received through the PostgreSQL
+    notification channel, so a change done by another backend process is taken
+    into account as soon as its notification is received (changes done by this
+    process are invalidated right away). To avoid storing a value fetched before
+    an invalidation, values are only stored if no invalidation occurred since the
+    `generation` they have been fetched with.
+    """
+
+    def __init__(self, event_bus: EventBus, ttl: float = REALM_ACCESS_CACHE_TTL):
+        self.ttl = ttl
+        self.generation = 0
+        self._statuses: Dict[Tuple[OrganizationID, RealmID], Tuple[float, RealmStatus]] = {}
+        self._roles: Dict[
+            Tuple[OrganizationID, RealmID, UserID], Tuple[float, RealmRole | None, DateTime | None]
+        ] = {}
+        event_bus.connect(BackendEvent.REALM_ROLES_UPDATED, self._on_roles_updated)
+        event_bus.connect(BackendEvent.REALM_MAINTENANCE_STARTED, self._on_maintenance_changed)
+        event_bus.connect(BackendEvent.REALM_MAINTENANCE_FINISHED, self._on_maintenance_changed)
+
+    def _on_roles_updated(
+        self,
+        event: BackendEvent,
+        organization_id: OrganizationID,
+        realm_id: RealmID,
+        user: UserID,
+        **kwargs: Any,
+    ) -> None:
+        self.invalidate_realm_role(organization_id, realm_id, user)
+
+    def _on_maintenance_changed(
+        self,
+        event: BackendEvent,
+        organization_id: OrganizationID,
+        realm_id: RealmID,
+        **kwargs: Any,
+    ) -> None:
+        self.invalidate_realm_status(organization_id, realm_id)
+
+    def invalidate_realm_role(
+        self, organization_id: OrganizationID, realm_id: RealmID, user_id: UserID
+    ) -> None:
+        self.generation += 1
+        self._roles.pop((organization_id, realm_id, user_id), None)
+
+    def invalidate_realm_status(self, organization_id: OrganizationID, realm_id: RealmID) -> None:
+        self.generation += 1
+        self._statuses.pop((organization_id, realm_id), None)
+
+    def clear(self) -> None:
+        self.generation += 1
+        self._statuses.clear()
+        self._roles.clear()
+
+    def _make_room(self) -> None:
+        # Entries are cheap to fetch again, no need for a fancy eviction policy
+        if len(self._statuses) + len(self._roles) >= REALM_ACCESS_CACHE_MAX_ENTRIES:
+            self._statuses.clear()
+            self._roles.clear()
+
+    def get_realm_status(
+        self, organization_id: OrganizationID, realm_id: RealmID
+    ) -> RealmStatus | None:
+        try:
+            expires_on, status = self._statuses[(organization_id, realm_id)]
+        except KeyError:
+            return None
+        if expires_on <= trio.current_time():
+            del self._statuses[(organization_id, realm_id)]
+            return None
+        return status
+
+    def set_realm_status(
+        self,
+        organization_id: OrganizationID,
+        realm_id: RealmID,
+        status: RealmStatus,
+        generation: int,
+    ) -> None:
+        if generation != self.generation:
+            return
+        self._make_room()
+        self._statuses[(organization_id, realm_id)] = (trio.current_time() + self.ttl, status)
+
+    def get_realm_role(
+        self, organization_id: OrganizationID, realm_id: RealmID, user_id: UserID
+    ) -> Tuple[RealmRole | None, DateTime | None] | None:
+        key = (organization_id, realm_id, user_id)
+        try:
+            expires_on, role, certified_on = self._roles[key]
+        except KeyError:
+            return None
+        if expires_on <= trio.current_time():
+            del self._roles[key]
+            return None
+        return role, certified_on
+
+    def set_realm_role(
+        self,
+        organization_id: OrganizationID,
+        realm_id: RealmID,
+        user_id: UserID,
+        role: RealmRole | None,
+        certified_on: DateTime | None,
+        generation: int,
+    ) -> None:
+        if generation != self.generation:
+            return
+        self._make_room()
+        self._roles[(organization_id, realm_id, user_id)] = (
+            trio.current_time() + self.ttl,
+            role,
+            certified_on,
+        )
@@ -17,6 +17,7 @@ from parsec.api.protocol import (
 from parsec.backend.backend_events import BackendEvent
 from parsec.backend.postgresql.handler import send_signal
 from parsec.backend.postgresql.message import send_message
+from parsec.backend.postgresql.realm_access_cache import RealmAccessCache
 from parsec.backend.postgresql.utils import (
     Q,
     q_device,
@@ -48,6 +49,23 @@ _q_get_realm_status = Q(
 
 
 async def get_realm_status(
+    conn: triopg._triopg.TrioConnectionProxy,
+    organization_id: OrganizationID,
+    realm_id: RealmID,
+    realm_access_cache: RealmAccessCache | None = None,
+) -> RealmStatus:
+    if realm_access_cache is None:
+        return await _get_realm_status(conn, organization_id, realm_id)
+
+    status = realm_access_cache.get_realm_status(organization_id, realm_id)
+    if status is None:
+        generation = realm_access_cache.generation
+        status = await _get_realm_status(conn, organization_id, realm_id)
+        realm_access_cache.set_realm_status(organization_id, realm_id, status, generation)
+    return status
+
+
+async def _get_realm_status(
     conn: triopg._triopg.TrioConnectionProxy, organization_id: OrganizationID, realm_id: RealmID
 ) -> RealmStatus:
     rep = await conn.fetchrow(
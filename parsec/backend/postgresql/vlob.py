@@ -11,13 +11,18 @@ from parsec.backend.organization import SequesterAuthority
 from parsec.backend.postgresql.handler import PGHandler, retry_on_unique_violation
 from parsec.backend.postgresql.sequester import get_sequester_authority, get_sequester_services
 from parsec.backend.postgresql.vlob_queries import (
+    query_check_create_batch,
+    query_check_update_batch,
     query_create,
+    query_create_batch,
     query_list_versions,
     query_maintenance_get_reencryption_batch,
     query_maintenance_save_reencryption_batch,
     query_poll_changes,
     query_read,
+    query_read_batch,
     query_update,
+    query_update_batch,
 )
 from parsec.backend.sequester import BaseSequesterService, SequesterDisabledError
 from parsec.backend.vlob import (
@@ -164,7 +169,14 @@ class PGVlobComponent(BaseVlobComponent):
     ) -> Tuple[int, bytes, DeviceID, DateTime, DateTime]:
         async with self.dbh.pool.acquire() as conn:
             return await query_read(
-                conn, organization_id, author, encryption_revision, vlob_id, version, timestamp
+                conn,
+                organization_id,
+                author,
+                encryption_revision,
+                vlob_id,
+                version,
+                timestamp,
+                realm_access_cache=self.dbh.realm_access_cache,
             )
 
     @retry_on_unique_violation
@@ -202,17 +214,143 @@ class PGVlobComponent(BaseVlobComponent):
                 sequester_blob,
             )
 
+    @retry_on_unique_violation
+    async def create_batch(
+        self,
+        organization_id: OrganizationID,
+        author: DeviceID,
+        realm_id: RealmID,
+        encryption_revision: int,
+        timestamp: DateTime,
+        batch: List[Tuple[VlobID, bytes, Dict[SequesterServiceID, bytes] | None]],
+    ) -> None:
+        async with self.dbh.pool.acquire() as conn:
+            # Reject an invalid batch before sending anything to the sequester
+            # webhooks, the checks are done again along with the writes given
+            # the vlobs may change in the meantime
+            await query_check_create_batch(
+                conn,
+                organization_id,
+                author,
+                realm_id,
+                encryption_revision,
+                timestamp,
+                [vlob_id for vlob_id, _, _ in batch],
+            )
+
+            sequestered_batch = []
+            for vlob_id, blob, sequester_blob in batch:
+                sequester_blob = await self._extract_sequestered_data_and_proceed_webhook(
+                    conn,
+                    organization_id=organization_id,
+                    sequester_blob=sequester_blob,
+                    author=author,
+                    encryption_revision=encryption_revision,
+                    vlob_id=vlob_id,
+                    timestamp=timestamp,
+                )
+                sequestered_batch.append((vlob_id, blob, sequester_blob))
+
+            await query_create_batch(
+                conn,
+                organization_id,
+                author,
+                realm_id,
+                encryption_revision,
+                timestamp,
+                sequestered_batch,
+            )
+
+    async def read_batch(
+        self,
+        organization_id: OrganizationID,
+        author: DeviceID,
+        realm_id: RealmID,
+        encryption_revision: int,
+        vlob_ids: List[VlobID],
+        timestamp: DateTime | None = None,
+    ) -> Dict[VlobID, Tuple[int, bytes, DeviceID, DateTime, DateTime]]:
+        async with self.dbh.pool.acquire() as conn:
+            return await query_read_batch(
+                conn,
+                organization_id,
+                author,
+                realm_id,
+                encryption_revision,
+                vlob_ids,
+                timestamp,
+                realm_access_cache=self.dbh.realm_access_cache,
+            )
+
+    @retry_on_unique_violation
+    async def update_batch(
+        self,
+        organization_id: OrganizationID,
+        author: DeviceID,
+        realm_id: RealmID,
+        encryption_revision: int,
+        timestamp: DateTime,
+        batch: List[Tuple[VlobID, int, bytes, Dict[SequesterServiceID, bytes] | None]],
+    ) -> None:
+        async with self.dbh.pool.acquire() as conn:
+            # Same as for `create_batch`
+            await query_check_update_batch(
+                conn,
+                organization_id,
+                author,
+                realm_id,
+                encryption_revision,
+                timestamp,
+                [(vlob_id, version) for vlob_id, version, _, _ in batch],
+            )
+
+            sequestered_batch = []
+            for vlob_id, version, blob, sequester_blob in batch:
+                sequester_blob = await self._extract_sequestered_data_and_proceed_webhook(
+                    conn,
+                    organization_id=organization_id,
+                    sequester_blob=sequester_blob,
+                    author=author,
+                    encryption_revision=encryption_revision,
+                    vlob_id=vlob_id,
+                    timestamp=timestamp,
+                )
+                sequestered_batch.append((vlob_id, version, blob, sequester_blob))
+
+            await query_update_batch(
+                conn,
+                organization_id,
+                author,
+                realm_id,
+                encryption_revision,
+                timestamp,
+                sequestered_batch,
+            )
+
     async def poll_changes(
         self, organization_id: OrganizationID, author: DeviceID, realm_id: RealmID, checkpoint: int
     ) -> Tuple[int, Dict[VlobID, int]]:
         async with self.dbh.pool.acquire() as conn:
-            return await query_poll_changes(conn, organization_id, author, realm_id, checkpoint)
+            return await query_poll_changes(
+                conn,
+                organization_id,
+                author,
+                realm_id,
+                checkpoint,
+                realm_access_cache=self.dbh.realm_access_cache,
+            )
 
     async def list_versions(
         self, organization_id: OrganizationID, author: DeviceID, vlob_id: VlobID
     ) -> Dict[int, Tuple[DateTime, DeviceID]]:
         async with self.dbh.pool.acquire() as conn:
-            return await query_list_versions(conn, organization_id, author, vlob_id)
+            return await query_list_versions(
+                conn,
+                organization_id,
+                author,
+                vlob_id,
+                realm_access_cache=self.dbh.realm_access_cache,
+            )
 
     async def maintenance_get_reencryption_batch(
         self,
@@ -9,8 +9,16 @@ from parsec.backend.postgresql.vlob_queries.read import (
     query_list_versions,
     query_poll_changes,
     query_read,
+    query_read_batch,
+)
+from parsec.backend.postgresql.vlob_queries.write import (
+    query_check_create_batch,
+    query_check_update_batch,
+    query_create,
+    query_create_batch,
+    query_update,
+    query_update_batch,
 )
-from parsec.backend.postgresql.vlob_queries.write import query_create, query_update
 
 __all__ = (
     "query_update",
@@ -20,4 +28,9 @@ __all__ = (
     "query_poll_changes",
     "query_list_versions",
     "query_create",
+    "query_create_batch",
+    "query_read_batch",
+    "query_update_batch",
+    "query_check_create_batch",
+    "query_check_update_batch",
 )
@@ -1,12 +1,13 @@
 # Parsec Cloud (https://parsec.cloud) Copyright (c) BUSL-1.1 (eventually AGPL-3.0) 2016-present Scille SAS
 from __future__ import annotations
 
-from typing import Dict, Tuple
+from typing import Dict, List, Tuple
 
 import triopg
 
 from parsec._parsec import DateTime
 from parsec.api.protocol import DeviceID, OrganizationID, RealmID, VlobID
+from parsec.backend.postgresql.realm_access_cache import RealmAccessCache
 from parsec.backend.postgresql.utils import (
     Q,
     q_device,
@@ -99,9 +100,12 @@ async def query_read(
     vlob_id: VlobID,
     version: int | None = None,
     timestamp: DateTime | None = None,
+    realm_access_cache: RealmAccessCache | None = None,
 ) -> Tuple[int, bytes, DeviceID, DateTime, DateTime]:
     realm_id = await _get_realm_id_from_vlob_id(conn, organization_id, vlob_id)
-    await _check_realm_and_read_access(conn, organization_id, author, realm_id, encryption_revision)
+    await _check_realm_and_read_access(
+        conn, organization_id, author, realm_id, encryption_revision, realm_access_cache
+    )
 
     if version is None:
         if timestamp is None:
@@ -147,12 +151,117 @@ async def query_read(
     vlob_author = DeviceID(vlob_author)
 
     author_last_role_granted_on = await _get_last_role_granted_on(
-        conn, organization_id, realm_id, vlob_author
+        conn, organization_id, realm_id, vlob_author, realm_access_cache
     )
     assert isinstance(author_last_role_granted_on, DateTime)
     return version, blob, vlob_author, created_on, author_last_role_granted_on
 
 
+_q_read_batch_data_without_timestamp = Q(
+    f"""
+SELECT DISTINCT ON (vlob_id)
+    vlob_id,
+    version,
+    blob,
+    { q_device(_id="author", select="device_id") } as author,
+    created_on
+FROM vlob_atom
+WHERE
+    vlob_encryption_revision = {
+        q_vlob_encryption_revision_internal_id(
+            organization_id="$organization_id",
+            realm_id="$realm_id",
+            encryption_revision="$encryption_revision",
+        )
+    }
+    AND vlob_id = ANY($vlob_ids::UUID[])
+ORDER BY vlob_id, version DESC
+"""
+)
+
+
+_q_read_batch_data_with_timestamp = Q(
+    f"""
+SELECT DISTINCT ON (vlob_id)
+    vlob_id,
+    version,
+    blob,
+    { q_device(_id="author", select="device_id") } as author,
+    created_on
+FROM vlob_atom
+WHERE
+    vlob_encryption_revision = {
+        q_vlob_encryption_revision_internal_id(
+            organization_id="$organization_id",
+            realm_id="$realm_id",
+            encryption_revision="$encryption_revision",
+        )
+    }
+    AND vlob_id = ANY($vlob_ids::UUID[])
+    AND created_on <= $timestamp
+ORDER BY vlob_id, version DESC
+"""
+)
+
+
+@query(in_transaction=True)
+async def query_read_batch(
+    conn: triopg._triopg.TrioConnectionProxy,
+    organization_id: OrganizationID,
+    author: DeviceID,
+    realm_id: RealmID,
+    encryption_revision: int,
+    vlob_ids: List[VlobID],
+    timestamp: DateTime | None = None,
+    realm_access_cache: RealmAccessCache | None = None,
+) -> Dict[VlobID, Tuple[int, bytes, DeviceID, DateTime, DateTime]]:
+    await _check_realm_and_read_access(
+        conn, organization_id, author, realm_id, encryption_revision, realm_access_cache
+    )
+
+    # Vlobs from other realms are naturally filtered out by the encryption revision
+    if timestamp is None:
+        rows = await conn.fetch(
+            *_q_read_batch_data_without_timestamp(
+                organization_id=organization_id.str,
+                realm_id=realm_id,
+                encryption_revision=encryption_revision,
+                vlob_ids=vlob_ids,
+            )
+        )
+    else:
+        rows = await conn.fetch(
+            *_q_read_batch_data_with_timestamp(
+                organization_id=organization_id.str,
+                realm_id=realm_id,
+                encryption_revision=encryption_revision,
+                vlob_ids=vlob_ids,
+                timestamp=timestamp,
+            )
+        )
+
+    # Most of the time the whole batch comes from a handful of authors
+    authors_last_role_granted_on: Dict[DeviceID, DateTime] = {}
+    result = {}
+    for row in rows:
+        vlob_author = DeviceID(row["author"])
+        author_last_role_granted_on = authors_last_role_granted_on.get(vlob_author)
+        if author_last_role_granted_on is None:
+            author_last_role_granted_on = await _get_last_role_granted_on(
+                conn, organization_id, realm_id, vlob_author, realm_access_cache
+            )
+            assert isinstance(author_last_role_granted_on, DateTime)
+            authors_last_role_granted_on[vlob_author] = author_last_role_granted_on
+        result[VlobID.from_hex(row["vlob_id"])] = (
+            row["version"],
+            row["blob"],
+            vlob_author,
+            row["created_on"],
+            author_last_role_granted_on,
+        )
+    return result
+
+
 _q_poll_changes = Q(
     f"""
 SELECT
@@ -191,8 +300,11 @@ async def query_poll_changes(
     author: DeviceID,
     realm_id: RealmID,
     checkpoint: int,
+    realm_access_cache: RealmAccessCache | None = None,
 ) -> Tuple[int, Dict[VlobID, int]]:
-    await _check_realm_and_read_access(conn, organization_id, author, realm_id, None)
+    await _check_realm_and_read_access(
+        conn, organization_id, author, realm_id, None, realm_access_cache
+    )
 
     ret = await conn.fetch(
         *_q_poll_changes(
@@ -213,9 +325,12 @@ async def query_list_versions(
     organization_id: OrganizationID,
     author: DeviceID,
     vlob_id: VlobID,
+    realm_access_cache: RealmAccessCache | None = None,
 ) -> Dict[int, Tuple[DateTime, DeviceID]]:
     realm_id = await _get_realm_id_from_vlob_id(conn, organization_id, vlob_id)
-    await _check_realm_and_read_access(conn, organization_id, author, realm_id, None)
+    await _check_realm_and_read_access(
+        conn, organization_id, author, realm_id, None, realm_access_cache
+    )
 
     rows = await conn.fetch(*_q_list_versions(organization_id=organization_id.str, vlob_id=vlob_id))
     assert rows
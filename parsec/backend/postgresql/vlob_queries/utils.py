@@ -6,7 +6,8 @@ from typing import Tuple
 import triopg
 
 from parsec._parsec import DateTime
-from parsec.api.protocol import DeviceID, OrganizationID, RealmID, VlobID
+from parsec.api.protocol import DeviceID, OrganizationID, RealmID, UserID, VlobID
+from parsec.backend.postgresql.realm_access_cache import RealmAccessCache
 from parsec.backend.postgresql.realm_queries.maintenance import RealmNotFoundError, get_realm_status
 from parsec.backend.postgresql.utils import (
     Q,
@@ -33,10 +34,11 @@ async def _check_realm(
     realm_id: RealmID,
     encryption_revision: int | None,
     operation_kind: OperationKind,
+    realm_access_cache: RealmAccessCache | None = None,
 ) -> None:
     # Get the current realm status
     try:
-        status = await get_realm_status(conn, organization_id, realm_id)
+        status = await get_realm_status(conn, organization_id, realm_id, realm_access_cache)
     except RealmNotFoundError as exc:
         raise VlobRealmNotFoundError(*exc.args) from exc
 
@@ -94,27 +96,56 @@ WHERE user_._id = { q_user_internal_id(organization_id="$organization_id", user_
 )
 
 
-async def _check_realm_access(
+async def _get_realm_role(
     conn: triopg._triopg.TrioConnectionProxy,
     organization_id: OrganizationID,
     realm_id: RealmID,
-    author: DeviceID,
-    allowed_roles: Tuple[RealmRole, ...],
-) -> DateTime:
+    user_id: UserID,
+    realm_access_cache: RealmAccessCache | None,
+) -> Tuple[RealmRole | None, DateTime | None] | None:
+    generation = 0
+    if realm_access_cache is not None:
+        cached = realm_access_cache.get_realm_role(organization_id, realm_id, user_id)
+        if cached is not None:
+            return cached
+        generation = realm_access_cache.generation
+
     rep = await conn.fetchrow(
         *_q_check_realm_access(
-            organization_id=organization_id.str, realm_id=realm_id, user_id=author.user_id.str
+            organization_id=organization_id.str, realm_id=realm_id, user_id=user_id.str
         )
     )
+    # Unknown user
+    if not rep:
+        return None
+
+    role = RealmRole.from_str(rep[0]) if rep[0] is not None else None
+    role_certified_on = rep[1]
+    if realm_access_cache is not None:
+        realm_access_cache.set_realm_role(
+            organization_id, realm_id, user_id, role, role_certified_on, generation
+        )
+    return role, role_certified_on
+
+
+async def _check_realm_access(
+    conn: triopg._triopg.TrioConnectionProxy,
+    organization_id: OrganizationID,
+    realm_id: RealmID,
+    author: DeviceID,
+    allowed_roles: Tuple[RealmRole, ...],
+    realm_access_cache: RealmAccessCache | None = None,
+) -> DateTime:
+    rep = await _get_realm_role(conn, organization_id, realm_id, author.user_id, realm_access_cache)
 
     if not rep:
         raise VlobNotFoundError(f"User `{author.user_id.str}` doesn't exist")
 
-    role = RealmRole.from_str(rep[0]) if rep[0] is not None else None
+    role, role_granted_on = rep
     if role not in allowed_roles:
         raise VlobAccessError()
 
-    role_granted_on = rep[1]
+    assert role_granted_on is not None
     return role_granted_on
 
 
@@ -124,12 +155,20 @@ async def _check_realm_and_read_access(
     author: DeviceID,
     realm_id: RealmID,
     encryption_revision: int | None,
+    realm_access_cache: RealmAccessCache | None = None,
 ) -> None:
     await _check_realm(
-        conn, organization_id, realm_id, encryption_revision, OperationKind.DATA_READ
+        conn,
+        organization_id,
+        realm_id,
+        encryption_revision,
+        OperationKind.DATA_READ,
+        realm_access_cache,
     )
     can_read_roles = (RealmRole.OWNER, RealmRole.MANAGER, RealmRole.CONTRIBUTOR, RealmRole.READER)
-    await _check_realm_access(conn, organization_id, realm_id, author, can_read_roles)
+    await _check_realm_access(
+        conn, organization_id, realm_id, author, can_read_roles, realm_access_cache
+    )
 
 
 async def _check_realm_and_write_access(
@@ -140,6 +179,9 @@ async def _check_realm_and_write_access(
     encryption_revision: int | None,
     timestamp: DateTime,
 ) -> None:
+    # The realm access cache is never used here: a stale status or role (e.g.
+    # a maintenance started or a role revoked by another backend process whose
+    # notification is not received yet) would let the write go through
     await _check_realm(
         conn, organization_id, realm_id, encryption_revision, OperationKind.DATA_WRITE
     )
@@ -190,10 +232,7 @@ async def _get_last_role_granted_on(
     organization_id: OrganizationID,
     realm_id: RealmID,
     author: DeviceID,
+    realm_access_cache: RealmAccessCache | None = None,
 ) -> DateTime | None:
-    rep = await conn.fetchrow(
-        *_q_check_realm_access(
-            organization_id=organization_id.str, realm_id=realm_id, user_id=author.user_id.str
-        )
-    )
+    rep = await _get_realm_role(conn, organization_id, realm_id, author.user_id, realm_access_cache)
     return None if rep is None else rep[1]
@@ -1,7 +1,7 @@
 # Parsec Cloud (https://parsec.cloud) Copyright (c) BUSL-1.1 (eventually AGPL-3.0) 2016-present Scille SAS
 from __future__ import annotations
 
-from typing import Dict
+from typing import Dict, List, Tuple
 
 import triopg
 from triopg import UniqueViolationError
@@ -154,35 +154,18 @@ RETURNING _id
 )
 
 
-@query(in_transaction=True)
-async def query_update(
+async def _update(
     conn: triopg._triopg.TrioConnectionProxy,
     organization_id: OrganizationID,
     author: DeviceID,
+    realm_id: RealmID,
     encryption_revision: int,
     vlob_id: VlobID,
     version: int,
     timestamp: DateTime,
     blob: bytes,
-    sequester_blob: Dict[SequesterServiceID, bytes] | None = None,
+    sequester_blob: Dict[SequesterServiceID, bytes] | None,
 ) -> None:
-    realm_id = await _get_realm_id_from_vlob_id(conn, organization_id, vlob_id)
-    await _check_realm_and_write_access(
-        conn, organization_id, author, realm_id, encryption_revision, timestamp
-    )
-
-    previous = await conn.fetchrow(
-        *_q_get_vlob_version(organization_id=organization_id.str, vlob_id=vlob_id)
-    )
-    if not previous:
-        raise VlobNotFoundError(f"Vlob `{vlob_id.hex}` doesn't exist")
-
-    elif previous["version"] != version - 1:
-        raise VlobVersionError()
-
-    elif previous["created_on"] > timestamp:
-        raise VlobRequireGreaterTimestampError(previous["created_on"])
-
     try:
         vlob_atom_internal_id = await conn.fetchval(
             *_q_insert_vlob_atom(
@@ -217,6 +200,163 @@ async def query_update(
     )
 
 
+@query(in_transaction=True)
+async def query_update(
+    conn: triopg._triopg.TrioConnectionProxy,
+    organization_id: OrganizationID,
+    author: DeviceID,
+    encryption_revision: int,
+    vlob_id: VlobID,
+    version: int,
+    timestamp: DateTime,
+    blob: bytes,
+    sequester_blob: Dict[SequesterServiceID, bytes] | None = None,
+) -> None:
+    realm_id = await _get_realm_id_from_vlob_id(conn, organization_id, vlob_id)
+    await _check_realm_and_write_access(
+        conn, organization_id, author, realm_id, encryption_revision, timestamp
+    )
+
+    previous = await conn.fetchrow(
+        *_q_get_vlob_version(organization_id=organization_id.str, vlob_id=vlob_id)
+    )
+    if not previous:
+        raise VlobNotFoundError(f"Vlob `{vlob_id.hex}` doesn't exist")
+
+    elif previous["version"] != version - 1:
+        raise VlobVersionError()
+
+    elif previous["created_on"] > timestamp:
+        raise VlobRequireGreaterTimestampError(previous["created_on"])
+
+    await _update(
+        conn,
+        organization_id,
+        author,
+        realm_id,
+        encryption_revision,
+        vlob_id,
+        version,
+        timestamp,
+        blob,
+        sequester_blob,
+    )
+
+
+_q_get_batch_vlob_versions = Q(
+    f"""
+SELECT DISTINCT ON (vlob_id)
+    vlob_id,
+    version,
+    created_on
+FROM vlob_atom
+WHERE
+    vlob_encryption_revision = {
+        q_vlob_encryption_revision_internal_id(
+            organization_id="$organization_id",
+            realm_id="$realm_id",
+            encryption_revision="$encryption_revision",
+        )
+    }
+    AND vlob_id = ANY($vlob_ids::UUID[])
+ORDER BY vlob_id, version DESC
+"""
+)
+
+
+async def _check_update_batch(
+    conn: triopg._triopg.TrioConnectionProxy,
+    organization_id: OrganizationID,
+    author: DeviceID,
+    realm_id: RealmID,
+    encryption_revision: int,
+    timestamp: DateTime,
+    versions: List[Tuple[VlobID, int]],
+) -> None:
+    await _check_realm_and_write_access(
+        conn, organization_id, author, realm_id, encryption_revision, timestamp
+    )
+
+    # Updating twice the same vlob in a batch is bound to fail on the version
+    if len({vlob_id for vlob_id, _ in versions}) != len(versions):
+        raise VlobVersionError()
+
+    # Vlobs from other realms are naturally filtered out by the encryption revision
+    rows = await conn.fetch(
+        *_q_get_batch_vlob_versions(
+            organization_id=organization_id.str,
+            realm_id=realm_id,
+            encryption_revision=encryption_revision,
+            vlob_ids=[vlob_id for vlob_id, _ in versions],
+        )
+    )
+    previous_versions = {
+        VlobID.from_hex(row["vlob_id"]): (row["version"], row["created_on"]) for row in rows
+    }
+
+    for vlob_id, version in versions:
+        try:
+            previous_version, previous_created_on = previous_versions[vlob_id]
+        except KeyError:
+            raise VlobNotFoundError(f"Vlob `{vlob_id.hex}` doesn't exist")
+
+        if previous_version != version - 1:
+            raise VlobVersionError()
+
+        elif previous_created_on > timestamp:
+            raise VlobRequireGreaterTimestampError(previous_created_on)
+
+
+@query(in_transaction=True)
+async def query_check_update_batch(
+    conn: triopg._triopg.TrioConnectionProxy,
+    organization_id: OrganizationID,
+    author: DeviceID,
+    realm_id: RealmID,
+    encryption_revision: int,
+    timestamp: DateTime,
+    versions: List[Tuple[VlobID, int]],
+) -> None:
+    await _check_update_batch(
+        conn, organization_id, author, realm_id, encryption_revision, timestamp, versions
+    )
+
+
+@query(in_transaction=True)
+async def query_update_batch(
+    conn: triopg._triopg.TrioConnectionProxy,
+    organization_id: OrganizationID,
+    author: DeviceID,
+    realm_id: RealmID,
+    encryption_revision: int,
+    timestamp: DateTime,
+    batch: List[Tuple[VlobID, int, bytes, Dict[SequesterServiceID, bytes] | None]],
+) -> None:
+    await _check_update_batch(
+        conn,
+        organization_id,
+        author,
+        realm_id,
+        encryption_revision,
+        timestamp,
+        [(vlob_id, version) for vlob_id, version, _, _ in batch],
+    )
+    # Any error rolls back the whole transaction, hence the batch is atomic
+    for vlob_id, version, blob, sequester_blob in batch:
+        await _update(
+            conn,
+            organization_id,
+            author,
+            realm_id,
+            encryption_revision,
+            vlob_id,
+            version,
+            timestamp,
+            blob,
+            sequester_blob,
+        )
+
+
 _q_create = Q(
     f"""
 INSERT INTO vlob_atom (
@@ -265,8 +405,7 @@ _q_create_sequester_blob = Q(
 )
 
 
-@query(in_transaction=True)
-async def query_create(
+async def _create(
     conn: triopg._triopg.TrioConnectionProxy,
     organization_id: OrganizationID,
     author: DeviceID,
@@ -275,12 +414,8 @@ async def query_create(
     vlob_id: VlobID,
     timestamp: DateTime,
     blob: bytes,
-    sequester_blob: Dict[SequesterServiceID, bytes] | None = None,
+    sequester_blob: Dict[SequesterServiceID, bytes] | None,
 ) -> None:
-    await _check_realm_and_write_access(
-        conn, organization_id, author, realm_id, encryption_revision, timestamp
-    )
-
     # Actually create the vlob
     try:
         vlob_atom_internal_id = await conn.fetchval(
@@ -312,3 +447,114 @@ async def query_create(
     await _set_vlob_updated(
         conn, vlob_atom_internal_id, organization_id, author, realm_id, vlob_id, timestamp
     )
+
+
+@query(in_transaction=True)
+async def query_create(
+    conn: triopg._triopg.TrioConnectionProxy,
+    organization_id: OrganizationID,
+    author: DeviceID,
+    realm_id: RealmID,
+    encryption_revision: int,
+    vlob_id: VlobID,
+    timestamp: DateTime,
+    blob: bytes,
+    sequester_blob: Dict[SequesterServiceID, bytes] | None = None,
+) -> None:
+    await _check_realm_and_write_access(
+        conn, organization_id, author, realm_id, encryption_revision, timestamp
+    )
+    await _create(
+        conn,
+        organization_id,
+        author,
+        realm_id,
+        encryption_revision,
+        vlob_id,
+        timestamp,
+        blob,
+        sequester_blob,
+    )
+
+
+_q_get_existing_vlob_ids = Q(
+    f"""
+SELECT DISTINCT vlob_id
+FROM vlob_atom
+WHERE
+    organization = { q_organization_internal_id("$organization_id") }
+    AND vlob_id = ANY($vlob_ids::UUID[])
+"""
+)
+
+
+async def _check_create_batch(
+    conn: triopg._triopg.TrioConnectionProxy,
+    organization_id: OrganizationID,
+    author: DeviceID,
+    realm_id: RealmID,
+    encryption_revision: int,
+    timestamp: DateTime,
+    vlob_ids: List[VlobID],
+) -> None:
+    await _check_realm_and_write_access(
+        conn, organization_id, author, realm_id, encryption_revision, timestamp
+    )
+
+    if len(set(vlob_ids)) != len(vlob_ids):
+        raise VlobAlreadyExistsError()
+
+    existing = await conn.fetch(
+        *_q_get_existing_vlob_ids(organization_id=organization_id.str, vlob_ids=vlob_ids)
+    )
+    if existing:
+        raise VlobAlreadyExistsError()
+
+
+@query(in_transaction=True)
+async def query_check_create_batch(
+    conn: triopg._triopg.TrioConnectionProxy,
+    organization_id: OrganizationID,
+    author: DeviceID,
+    realm_id: RealmID,
+    encryption_revision: int,
+    timestamp: DateTime,
+    vlob_ids: List[VlobID],
+) -> None:
+    await _check_create_batch(
+        conn, organization_id, author, realm_id, encryption_revision, timestamp, vlob_ids
+    )
+
+
+@query(in_transaction=True)
+async def query_create_batch(
+    conn: triopg._triopg.TrioConnectionProxy,
+    organization_id: OrganizationID,
+    author: DeviceID,
+    realm_id: RealmID,
+    encryption_revision: int,
+    timestamp: DateTime,
+    batch: List[Tuple[VlobID, bytes, Dict[SequesterServiceID, bytes] | None]],
+) -> None:
+    await _check_create_batch(
+        conn,
+        organization_id,
+        author,
+        realm_id,
+        encryption_revision,
+        timestamp,
+        [vlob_id for vlob_id, _, _ in batch],
+    )
+    # Any error rolls back the whole transaction, hence the batch is atomic
+    for vlob_id, blob, sequester_blob in batch:
+        await _create(
+            conn,
+            organization_id,
+            author,
+            realm_id,
+            encryption_revision,
+            vlob_id,
+            timestamp,
+            blob,
+            sequester_blob,
+        )
@@ -1,7 +1,7 @@
 # Parsec Cloud (https://parsec.cloud) Copyright (c) BUSL-1.1 (eventually AGPL-3.0) 2016-present Scille SAS
 from __future__ import annotations
 
-from typing import List
+from typing import Any, Dict, List
 
 from parsec.api.protocol import BlockID, OrganizationID
 from parsec.backend.blockstore import BaseBlockStoreComponent
@@ -11,6 +11,9 @@ class RAID0BlockStoreComponent(BaseBlockStoreComponent):
     def __init__(self, blockstores: List[BaseBlockStoreComponent]):
         self.blockstores = blockstores
 
+    def get_metrics(self) -> Dict[str, Any]:
+        return {"nodes": [blockstore.get_metrics() for blockstore in self.blockstores]}
+
     def _get_blockstore(self, block_id: BlockID) -> BaseBlockStoreComponent:
         return self.blockstores[block_id.int % len(self.blockstores)]
 
@@ -18,6 +21,12 @@ class RAID0BlockStoreComponent(BaseBlockStoreComponent):
         blockstore = self._get_blockstore(block_id)
         return await blockstore.read(organization_id, block_id)
 
+    async def read_range(
+        self, organization_id: OrganizationID, block_id: BlockID, offset: int, size: int
+    ) -> bytes:
+        blockstore = self._get_blockstore(block_id)
+        return await blockstore.read_range(organization_id, block_id, offset, size)
+
     async def create(
         self, organization_id: OrganizationID, block_id: BlockID, block: bytes
     ) -> None:
@@ -1,14 +1,16 @@
 # Parsec Cloud (https://parsec.cloud) Copyright (c) BUSL-1.1 (eventually AGPL-3.0) 2016-present Scille SAS
 from __future__ import annotations
 
-from typing import List
+from typing import Any, Awaitable, Callable, Dict, List
 
+import trio
 from structlog import get_logger
 from trio import CancelScope, Nursery
 
 from parsec.api.protocol import BlockID, OrganizationID
 from parsec.backend.block import BlockStoreError
 from parsec.backend.blockstore import BaseBlockStoreComponent
+from parsec.backend.blockstore_health import BlockStoreNodeHealth, rank_nodes
 from parsec.utils import open_service_nursery
 
 logger = get_logger()
@@ -21,27 +23,48 @@ class RAID1BlockStoreComponent(BaseBlockStoreComponent):
         partial_create_ok: bool = False,
     ):
         self.blockstores = blockstores
+        self._nodes_health = [BlockStoreNodeHealth() for _ in blockstores]
         self._partial_create_ok = partial_create_ok
         self._logger = logger.bind(blockstore_type="RAID1", partial_create_ok=partial_create_ok)
 
-    async def read(self, organization_id: OrganizationID, block_id: BlockID) -> bytes:
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "nodes": [
+                {**health.stats(), "blockstore": blockstore.get_metrics()}
+                for health, blockstore in zip(self._nodes_health, self.blockstores)
+            ]
+        }
+
+    async def _read_from_any_node(
+        self,
+        organization_id: OrganizationID,
+        block_id: BlockID,
+        read: Callable[[BaseBlockStoreComponent], Awaitable[bytes]],
+    ) -> bytes:
+        # Read from the fastest healthy node, another node is only queried if
+        # the previous one failed or is slower than its usual latency (hedging)
         value = None
 
         async def _single_blockstore_read(
-            nursery: Nursery, blockstore: BaseBlockStoreComponent
+            nursery: Nursery, node_index: int, failed: trio.Event
         ) -> None:
             nonlocal value
             try:
-                value = await blockstore.read(organization_id, block_id)
+                value = await self._nodes_health[node_index].measure(
+                    read(self.blockstores[node_index])
+                )
                 nursery.cancel_scope.cancel()
             except BlockStoreError:
-                pass
+                failed.set()
 
         async with open_service_nursery() as nursery:
-            for blockstore in self.blockstores:
-                nursery.start_soon(_single_blockstore_read, nursery, blockstore)
+            for node_index in rank_nodes(self._nodes_health):
+                failed = trio.Event()
+                nursery.start_soon(_single_blockstore_read, nursery, node_index, failed)
+                with trio.move_on_after(self._nodes_health[node_index].hedge_delay()):
+                    await failed.wait()
 
-        if not value:
+        if value is None:
             self._logger.warning(
                 "Block read error: All nodes have failed",
                 organization_id=organization_id,
@@ -51,6 +74,22 @@ class RAID1BlockStoreComponent(BaseBlockStoreComponent):
 
         return value
 
+    async def read(self, organization_id: OrganizationID, block_id: BlockID) -> bytes:
+        return await self._read_from_any_node(
+            organization_id,
+            block_id,
+            lambda blockstore: blockstore.read(organization_id, block_id),
+        )
+
+    async def read_range(
+        self, organization_id: OrganizationID, block_id: BlockID, offset: int, size: int
+    ) -> bytes:
+        return await self._read_from_any_node(
+            organization_id,
+            block_id,
+            lambda blockstore: blockstore.read_range(organization_id, block_id, offset, size),
+        )
+
     async def create(
         self, organization_id: OrganizationID, block_id: BlockID, block: bytes
     ) -> None:
@@ -3,20 +3,24 @@ from __future__ import annotations
 
 import struct
 from sys import byteorder
-from typing import List, Union
+from typing import Any, Dict, List
 
+import trio
 from structlog import get_logger
 from trio import Nursery
 
 from parsec.api.protocol import BlockID, OrganizationID
 from parsec.backend.block import BlockStoreError
 from parsec.backend.blockstore import BaseBlockStoreComponent
+from parsec.backend.blockstore_health import BlockStoreNodeHealth
 from parsec.utils import open_service_nursery
 
 logger = get_logger()
 
 
-def _xor_buffers(*buffers: bytes) -> bytes:
+def _xor_buffers(*buffers: bytes | memoryview) -> bytes:
+    # Python big ints are the fastest portable way to XOR whole buffers: each
+    # buffer is converted only once and the XOR itself runs word by word in C
     buff_len = len(buffers[0])
     xored = int.from_bytes(buffers[0], byteorder)
     for buff in buffers[1:]:
@@ -25,16 +29,38 @@ def _xor_buffers(*buffers: bytes) -> bytes:
     return xored.to_bytes(buff_len, byteorder)
 
 
-def split_block_in_chunks(block: bytes, nb_chunks: int) -> List[bytes]:
-    payload_size = len(block) + 4  # encode block len as a uint32
-    chunk_len = payload_size // nb_chunks
-    if nb_chunks * chunk_len < payload_size:
-        chunk_len += 1
-    padding_len = chunk_len * nb_chunks - payload_size
+def _get_chunk_len(block_len: int, nb_chunks: int) -> int:
+    payload_size = block_len + 4  # encode block len as a uint32
+    return -(-payload_size // nb_chunks)
 
-    payload = struct.pack("!I", len(block)) + block + b"\x00" * padding_len
 
-    return [payload[chunk_len * i : chunk_len * (i + 1)] for i in range(nb_chunks)]
+def split_block_in_chunks(block: bytes, nb_chunks: int) -> List[bytes]:
+    # The payload is the block length header, the block and the padding. Instead
+    # of building it, each chunk is directly assembled from the relevant slices
+    # so the block data is only copied once
+    block_len = len(block)
+    chunk_len = _get_chunk_len(block_len, nb_chunks)
+    header = struct.pack("!I", block_len)
+    view = memoryview(block)
+    chunks = []
+    for i in range(nb_chunks):
+        start = chunk_len * i
+        end = start + chunk_len
+        if start >= 4 and end <= block_len + 4:
+            chunks.append(bytes(view[start - 4 : end - 4]))
+            continue
+        parts = []
+        if start < 4:
+            parts.append(header[start : min(end, 4)])
+        block_start = max(start - 4, 0)
+        block_end = min(end - 4, block_len)
+        if block_start < block_end:
+            parts.append(view[block_start:block_end])
+        padding_len = end - 4 - max(block_end, block_start, 0)
+        if padding_len > 0:
+            parts.append(b"\x00" * padding_len)
+        chunks.append(b"".join(parts))
+    return chunks
 
 
 def generate_checksum_chunk(chunks: List[bytes]) -> bytes:
@@ -52,9 +78,27 @@ def rebuild_block_from_chunks(chunks: List[bytes | None], checksum_chunk: bytes
         pass
     # By now, all chunks are valid
     chunks: List[bytes]
-    payload = b"".join(chunks)
-    (block_len,) = struct.unpack("!I", payload[:4])
-    return payload[4 : 4 + block_len]
+    chunk_len = len(chunks[0])
+    if chunk_len >= 4:
+        header = chunks[0][:4]
+    else:
+        header = b"".join(chunks)[:4]
+    (block_len,) = struct.unpack("!I", header)
+    # Only keep the block part of each chunk and join them in a single copy
+    start = 4
+    end = 4 + block_len
+    parts = []
+    for i, chunk in enumerate(chunks):
+        chunk_start = chunk_len * i
+        local_start = max(start - chunk_start, 0)
+        local_end = min(end - chunk_start, chunk_len)
+        if local_start >= local_end:
+            continue
+        if local_start == 0 and local_end == chunk_len:
+            parts.append(chunk)
+        else:
+            parts.append(memoryview(chunk)[local_start:local_end])
+    return b"".join(parts)
 
 
 class RAID5BlockStoreComponent(BaseBlockStoreComponent):
@@ -64,58 +108,58 @@ class RAID5BlockStoreComponent(BaseBlockStoreComponent):
         partial_create_ok: bool = False,
     ):
         self.blockstores = blockstores
+        self._nodes_health = [BlockStoreNodeHealth() for _ in blockstores]
         self._partial_create_ok = partial_create_ok
         self._logger = logger.bind(blockstore_type="RAID5", partial_create_ok=partial_create_ok)
 
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "nodes": [
+                {**health.stats(), "blockstore": blockstore.get_metrics()}
+                for health, blockstore in zip(self._nodes_health, self.blockstores)
+            ]
+        }
+
     async def read(self, organization_id: OrganizationID, block_id: BlockID) -> bytes:
+        # The block is rebuilt from any `nb_chunks` nodes out of `nb_chunks + 1`. The
+        # checksum is only fetched when a data node has failed, is known to be
+        # unhealthy or is slower than its usual latency (hedging)
+        nb_chunks = len(self.blockstores) - 1
+        fetch_results: List[bytes | None] = [None] * len(self.blockstores)
         error_count = 0
-        fetch_results: List[Union[Exception, bytes | None]] = [None] * len(self.blockstores)
+        success_count = 0
+        checksum_needed = trio.Event()
 
         async def _partial_blockstore_read(nursery: Nursery, blockstore_index: int) -> None:
-            nonlocal error_count
-            nonlocal fetch_results
+            nonlocal error_count, success_count
             try:
-                fetch_results[blockstore_index] = await self.blockstores[blockstore_index].read(
-                    organization_id, block_id
-                )
-            except BlockStoreError as exc:
-                fetch_results[blockstore_index] = exc
+                fetch_results[blockstore_index] = await self._nodes_health[
+                    blockstore_index
+                ].measure(self.blockstores[blockstore_index].read(organization_id, block_id))
+            except BlockStoreError:
                 error_count += 1
                 if error_count > 1:
                     nursery.cancel_scope.cancel()
                 else:
                     # Try to fetch the checksum to rebuild the current missing chunk...
-                    nursery.start_soon(_partial_blockstore_read, nursery, len(self.blockstores) - 1)
+                    checksum_needed.set()
+            else:
+                success_count += 1
+                if success_count == nb_chunks:
+                    # Enough chunks to rebuild the block, stop the slower reads
+                    nursery.cancel_scope.cancel()
 
         async with open_service_nursery() as nursery:
-            # Don't fetch the checksum by default
-            for blockstore_index in range(len(self.blockstores) - 1):
+            data_nodes_health = self._nodes_health[:nb_chunks]
+            for blockstore_index in range(nb_chunks):
                 nursery.start_soon(_partial_blockstore_read, nursery, blockstore_index)
+            if all(health.healthy for health in data_nodes_health):
+                hedge_delay = max(health.hedge_delay() for health in data_nodes_health)
+                with trio.move_on_after(hedge_delay):
+                    await checksum_needed.wait()
+            nursery.start_soon(_partial_blockstore_read, nursery, nb_chunks)
 
-        if error_count == 0:
-            # Sanity check: no errors and we didn't fetch the checksum
-            assert len([res for res in fetch_results if res is None]) == 1
-            assert fetch_results[-1] is None
-            assert not len([res for res in fetch_results if isinstance(res, Exception)])
-
-            return rebuild_block_from_chunks(fetch_results[:-1], None)  # type: ignore
-
-        elif error_count == 1:
-            checksum = fetch_results[-1]
-            # Sanity check: one error and we have fetched the checksum
-            assert len([res for res in fetch_results if res is None]) == 0
-            assert isinstance(checksum, (bytes, bytearray))
-            assert len([res for res in fetch_results if isinstance(res, Exception)]) == 1
-
-            return rebuild_block_from_chunks(
-                [
-                    res if isinstance(res, (bytes, bytearray)) else None
-                    for res in fetch_results[:-1]
-                ],
-                checksum,
-            )
-
-        else:
+        if success_count < nb_chunks:
             # No need to log the detail of the nodes errors, they should have
             # already been logged before raising their exceptions
             self._logger.warning(
@@ -125,6 +169,68 @@ class RAID5BlockStoreComponent(BaseBlockStoreComponent):
             )
             raise BlockStoreError("More than 1 RAID5 nodes have failed")
 
+        # At most one data chunk is missing, in which case the checksum is available
+        return rebuild_block_from_chunks(fetch_results[:-1], fetch_results[-1])
+
+    async def read_range(
+        self, organization_id: OrganizationID, block_id: BlockID, offset: int, size: int
+    ) -> bytes:
+        nb_chunks = len(self.blockstores) - 1
+        try:
+            # The block length is stored at the beginning of the first chunk
+            header = await self.blockstores[0].read_range(organization_id, block_id, 0, 4)
+            (block_len,) = struct.unpack("!I", header)
+        except (BlockStoreError, struct.error):
+            return await self._degraded_read_range(organization_id, block_id, offset, size)
+
+        # Offsets in the payload (i.e. the block length header, the block and the padding)
+        chunk_len = _get_chunk_len(block_len, nb_chunks)
+        start = 4 + min(offset, block_len)
+        end = 4 + min(offset + size, block_len)
+        parts: List[bytes | None] = []
+        ranges = []
+        for chunk_index in range(start // chunk_len, -(-end // chunk_len)):
+            chunk_start = chunk_index * chunk_len
+            local_start = max(start, chunk_start) - chunk_start
+            local_end = min(end, chunk_start + chunk_len) - chunk_start
+            ranges.append((chunk_index, local_start, local_end - local_start))
+            parts.append(None)
+        error_count = 0
+
+        async def _partial_blockstore_read_range(
+            nursery: Nursery, part_index: int, chunk_index: int, local_start: int, local_size: int
+        ) -> None:
+            nonlocal error_count
+            try:
+                parts[part_index] = await self.blockstores[chunk_index].read_range(
+                    organization_id, block_id, local_start, local_size
+                )
+            except BlockStoreError:
+                error_count += 1
+                nursery.cancel_scope.cancel()
+
+        async with open_service_nursery() as nursery:
+            for part_index, (chunk_index, local_start, local_size) in enumerate(ranges):
+                nursery.start_soon(
+                    _partial_blockstore_read_range,
+                    nursery,
+                    part_index,
+                    chunk_index,
+                    local_start,
+                    local_size,
+                )
+
+        if error_count:
+            return await self._degraded_read_range(organization_id, block_id, offset, size)
+        return b"".join(part for part in parts if part is not None)
+
+    async def _degraded_read_range(
+        self, organization_id: OrganizationID, block_id: BlockID, offset: int, size: int
+    ) -> bytes:
+        # A node is missing, the whole block has to be rebuilt from the checksum
+        block = await self.read(organization_id, block_id)
+        return block[offset : offset + size]
+
     async def create(
         self, organization_id: OrganizationID, block_id: BlockID, block: bytes
     ) -> None:
@@ -2,18 +2,28 @@
 from __future__ import annotations
 
 from functools import partial
+from typing import Any, Callable, Dict, TypeVar
 
 import boto3
 import trio
+from botocore.config import Config as BotoConfig
 from botocore.exceptions import BotoCoreError, ClientError
 from structlog import get_logger
 
 from parsec.api.protocol import BlockID, OrganizationID
 from parsec.backend.block import BlockStoreError
 from parsec.backend.blockstore import BaseBlockStoreComponent
+from parsec.backend.config import (
+    DEFAULT_S3_CONNECT_TIMEOUT,
+    DEFAULT_S3_MAX_POOL_CONNECTIONS,
+    DEFAULT_S3_READ_TIMEOUT,
+)
+from parsec.metrics import StorageMetrics
 
 logger = get_logger()
 
+R = TypeVar("R")
+
 
 def build_s3_slug(organization_id: OrganizationID, block_id: BlockID) -> str:
     # The slug uses the UUID canonical textual representation (eg.
@@ -22,6 +32,14 @@ def build_s3_slug(organization_id: OrganizationID, block_id: BlockID) -> str:
 
 
 class S3BlockStoreComponent(BaseBlockStoreComponent):
+    """S3 block store, the requests are run in a bounded pool of worker threads.
+
+    boto3 is a blocking library, so each request is run in one of the
+    `max_pool_connections` threads dedicated to this block store (one per pooled
+    connection), leaving the event loop and the other block stores free while
+    the S3 server answers.
+    """
+
     def __init__(
         self,
         s3_region: str,
@@ -29,6 +47,9 @@ class S3BlockStoreComponent(BaseBlockStoreComponent):
         s3_key: str,
         s3_secret: str,
         s3_endpoint_url: str | None = None,
+        max_pool_connections: int = DEFAULT_S3_MAX_POOL_CONNECTIONS,
+        connect_timeout: float = DEFAULT_S3_CONNECT_TIMEOUT,
+        read_timeout: float = DEFAULT_S3_READ_TIMEOUT,
     ):
         self._s3 = None
         self._s3_bucket = None
@@ -38,16 +59,46 @@ class S3BlockStoreComponent(BaseBlockStoreComponent):
             aws_access_key_id=s3_key,
             aws_secret_access_key=s3_secret,
             endpoint_url=s3_endpoint_url,
+            config=BotoConfig(
+                max_pool_connections=max_pool_connections,
+                connect_timeout=connect_timeout,
+                read_timeout=read_timeout,
+            ),
         )
         self._s3_bucket = s3_bucket
         self._s3.head_bucket(Bucket=s3_bucket)
+        self._limiter = trio.CapacityLimiter(max_pool_connections)
+        self.metrics = StorageMetrics()
         self._logger = logger.bind(blockstore_type="S3", s3_region=s3_region, s3_bucket=s3_bucket)
 
+    def get_metrics(self) -> Dict[str, Any]:
+        statistics = self._limiter.statistics()
+        return {
+            **self.metrics.stats(),
+            "pool_size": statistics.total_tokens,
+            "pool_in_use": statistics.borrowed_tokens,
+            "pool_waiting": statistics.tasks_waiting,
+        }
+
+    async def _run(self, operation: str, fn: Callable[[], R]) -> R:
+        # The measured latency includes the time spent waiting for a worker
+        with self.metrics.measure(operation):
+            try:
+                return await trio.to_thread.run_sync(fn, limiter=self._limiter)
+            except (BotoCoreError, ClientError):
+                self.metrics.increment(f"{operation}_errors")
+                raise
+
     async def read(self, organization_id: OrganizationID, block_id: BlockID) -> bytes:
         slug = build_s3_slug(organization_id=organization_id, block_id=block_id)
-        try:
+
+        def _get_object() -> bytes:
             assert self._s3 is not None
             obj = self._s3.get_object(Bucket=self._s3_bucket, Key=slug)
+            return obj["Body"].read()
+
+        try:
+            return await self._run("read", _get_object)
         except (BotoCoreError, ClientError) as exc:
             self._logger.warning(
                 "Block read error",
@@ -57,7 +108,30 @@ class S3BlockStoreComponent(BaseBlockStoreComponent):
             )
             raise BlockStoreError(exc) from exc
 
-        return obj["Body"].read()
+    async def read_range(
+        self, organization_id: OrganizationID, block_id: BlockID, offset: int, size: int
+    ) -> bytes:
+        if size <= 0:
+            return b""
+        slug = build_s3_slug(organization_id=organization_id, block_id=block_id)
+
+        def _get_object_range() -> bytes:
+            assert self._s3 is not None
+            obj = self._s3.get_object(
+                Bucket=self._s3_bucket, Key=slug, Range=f"bytes={offset}-{offset + size - 1}"
+            )
+            return obj["Body"].read()
+
+        try:
+            return await self._run("read_range", _get_object_range)
+        except (BotoCoreError, ClientError) as exc:
+            self._logger.warning(
+                "Block read error",
+                organization_id=organization_id.str,
+                block_id=block_id.hex,
+                exc_info=exc,
+            )
+            raise BlockStoreError(exc) from exc
 
     async def create(
         self, organization_id: OrganizationID, block_id: BlockID, block: bytes
@@ -65,8 +139,8 @@ class S3BlockStoreComponent(BaseBlockStoreComponent):
         slug = build_s3_slug(organization_id=organization_id, block_id=block_id)
         try:
             assert self._s3 is not None
-            await trio.to_thread.run_sync(
-                partial(self._s3.put_object, Bucket=self._s3_bucket, Key=slug, Body=block)
+            await self._run(
+                "create", partial(self._s3.put_object, Bucket=self._s3_bucket, Key=slug, Body=block)
             )
         except (BotoCoreError, ClientError) as exc:
             self._logger.warning(
@@ -66,6 +66,33 @@ class SwiftBlockStoreComponent(BaseBlockStoreComponent):
 
         return obj
 
+    async def read_range(
+        self, organization_id: OrganizationID, block_id: BlockID, offset: int, size: int
+    ) -> bytes:
+        if size <= 0:
+            return b""
+        slug = build_swift_slug(organization_id=organization_id, id=block_id)
+        try:
+            _, obj = await trio.to_thread.run_sync(
+                partial(
+                    self.swift_client.get_object,
+                    self._container,
+                    slug,
+                    headers={"Range": f"bytes={offset}-{offset + size - 1}"},
+                )
+            )
+
+        except ClientException as exc:
+            self._logger.warning(
+                "Block read error",
+                organization_id=organization_id.str,
+                block_id=block_id.hex,
+                exc_info=exc,
+            )
+            raise BlockStoreError(exc) from exc
+
+        return obj
+
     async def create(
         self, organization_id: OrganizationID, block_id: BlockID, block: bytes
     ) -> None:
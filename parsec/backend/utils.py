@@ -74,6 +74,7 @@ def api(
     cmd: str,
     *,
     cancel_on_client_sending_new_cmd: bool = False,
+    long_waiting: bool = False,
     client_types: Sequence[ClientType] = (ClientType.AUTHENTICATED,),
 ) -> Callable[[Callable[P, T]], Callable[P, T]]:
     def wrapper(fn: Callable[P, T]) -> Callable[P, T]:
@@ -82,6 +83,9 @@ def api(
             "cmd": cmd,
             "client_types": client_types,
             "cancel_on_client_sending_new_cmd": cancel_on_client_sending_new_cmd,
+            # Command that can wait for a long time (e.g. for the peer during an
+            # invitation), hence should not count in the pipelining limit
+            "long_waiting": long_waiting or cancel_on_client_sending_new_cmd,
         }
         return fn
 
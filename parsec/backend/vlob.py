@@ -626,6 +626,88 @@ class BaseVlobComponent:
         """
         raise NotImplementedError()
 
+    async def create_batch(
+        self,
+        organization_id: OrganizationID,
+        author: DeviceID,
+        realm_id: RealmID,
+        encryption_revision: int,
+        timestamp: DateTime,
+        batch: List[Tuple[VlobID, bytes, Dict[SequesterServiceID, bytes] | None]],
+    ) -> None:
+        """
+        Create multiple vlobs of the same realm sharing the same timestamp.
+
+        Realm status and author role are only checked once for the whole batch,
+        which is applied atomically: either all the vlobs are created or none.
+        An invalid batch is rejected before reaching the sequester webhooks.
+
+        Raises:
+            VlobAccessError
+            VlobAlreadyExistsError
+            VlobRealmNotFoundError
+            VlobRequireGreaterTimestampError
+            VlobEncryptionRevisionError: if encryption_revision mismatch
+            VlobInMaintenanceError
+            VlobSequesterDisabledError
+            VlobSequesterServiceInconsistencyError
+        """
+        raise NotImplementedError()
+
+    async def read_batch(
+        self,
+        organization_id: OrganizationID,
+        author: DeviceID,
+        realm_id: RealmID,
+        encryption_revision: int,
+        vlob_ids: List[VlobID],
+        timestamp: DateTime | None = None,
+    ) -> Dict[VlobID, Tuple[int, bytes, DeviceID, DateTime, DateTime]]:
+        """
+        Read the last version (or the last version at `timestamp`) of multiple
+        vlobs of the same realm.
+
+        Realm status and author role are only checked once for the whole batch.
+        Vlobs that are not part of the realm (or that have no version at
+        `timestamp`) are omitted from the result.
+
+        Raises:
+            VlobAccessError
+            VlobRealmNotFoundError
+            VlobEncryptionRevisionError: if encryption_revision mismatch
+            VlobInMaintenanceError
+        """
+        raise NotImplementedError()
+
+    async def update_batch(
+        self,
+        organization_id: OrganizationID,
+        author: DeviceID,
+        realm_id: RealmID,
+        encryption_revision: int,
+        timestamp: DateTime,
+        batch: List[Tuple[VlobID, int, bytes, Dict[SequesterServiceID, bytes] | None]],
+    ) -> None:
+        """
+        Update multiple vlobs of the same realm sharing the same timestamp.
+
+        Realm status and author role are only checked once for the whole batch,
+        which is applied atomically: either all the vlobs are updated or none.
+        An invalid batch is rejected before reaching the sequester webhooks.
+
+        Raises:
+            VlobAccessError
+            VlobVersionError
+            VlobNotFoundError: if a vlob is not part of the realm
+            VlobRealmNotFoundError
+            VlobRequireGreaterTimestampError
+            VlobEncryptionRevisionError: if encryption_revision mismatch
+            VlobInMaintenanceError
+            VlobSequesterDisabledError
+            VlobSequesterServiceInconsistencyError
+        """
+        raise NotImplementedError()
+
     async def poll_changes(
         self,
         organization_id: OrganizationID,
@@ -75,6 +75,7 @@ class AcquireTransport(Protocol):
         force_fresh: bool = False,
         ignore_status: bool = False,
         allow_not_available: bool = False,
+        dedicated: bool = False,
     ) -> AbstractAsyncContextManager[Transport]:
         ...
 
@@ -105,7 +106,7 @@ class BackendAuthenticatedCmds:
         self.acquire_transport = acquire_transport
 
     events_subscribe = expose_cmds_with_retrier(cmds.events_subscribe)
-    events_listen = expose_cmds_with_retrier(cmds.events_listen)
+    events_listen = expose_cmds_with_retrier(cmds.events_listen, dedicated=True)
     ping = expose_cmds_with_retrier(cmds.authenticated_ping)
     message_get = expose_cmds_with_retrier(cmds.message_get)
     user_get = expose_cmds_with_retrier(cmds.user_get)
@@ -116,16 +117,24 @@ class BackendAuthenticatedCmds:
     invite_new = expose_cmds_with_retrier(cmds.invite_new)
     invite_delete = expose_cmds_with_retrier(cmds.invite_delete)
     invite_list = expose_cmds_with_retrier(cmds.invite_list)
-    invite_1_greeter_wait_peer = expose_cmds_with_retrier(cmds.invite_1_greeter_wait_peer)
+    invite_1_greeter_wait_peer = expose_cmds_with_retrier(
+        cmds.invite_1_greeter_wait_peer, dedicated=True
+    )
     invite_2a_greeter_get_hashed_nonce = expose_cmds_with_retrier(
-        cmds.invite_2a_greeter_get_hashed_nonce
+        cmds.invite_2a_greeter_get_hashed_nonce, dedicated=True
+    )
+    invite_2b_greeter_send_nonce = expose_cmds_with_retrier(
+        cmds.invite_2b_greeter_send_nonce, dedicated=True
     )
-    invite_2b_greeter_send_nonce = expose_cmds_with_retrier(cmds.invite_2b_greeter_send_nonce)
     invite_3a_greeter_wait_peer_trust = expose_cmds_with_retrier(
-        cmds.invite_3a_greeter_wait_peer_trust
+        cmds.invite_3a_greeter_wait_peer_trust, dedicated=True
+    )
+    invite_3b_greeter_signify_trust = expose_cmds_with_retrier(
+        cmds.invite_3b_greeter_signify_trust, dedicated=True
+    )
+    invite_4_greeter_communicate = expose_cmds_with_retrier(
+        cmds.invite_4_greeter_communicate, dedicated=True
     )
-    invite_3b_greeter_signify_trust = expose_cmds_with_retrier(cmds.invite_3b_greeter_signify_trust)
-    invite_4_greeter_communicate = expose_cmds_with_retrier(cmds.invite_4_greeter_communicate)
     block_create = expose_cmds_with_retrier(cmds.block_create)
     block_read = expose_cmds_with_retrier(cmds.block_read)
     vlob_poll_changes = expose_cmds_with_retrier(cmds.vlob_poll_changes)
@@ -212,10 +221,15 @@ def _transport_pool_factory(
     signing_key: SigningKey,
     max_pool: int,
     keepalive: int | None,
+    pipelining: bool = False,
 ) -> TransportPool:
     async def _connect() -> Transport:
         transport = await connect_as_authenticated(
-            addr, device_id=device_id, signing_key=signing_key, keepalive=keepalive
+            addr,
+            device_id=device_id,
+            signing_key=signing_key,
+            keepalive=keepalive,
+            pipelining=pipelining,
         )
         transport.logger = transport.logger.bind(device_id=device_id)
         return transport
@@ -272,6 +286,7 @@ class BackendAuthenticatedConn:
         max_cooldown: int = 30,
         max_pool: int = 4,
         keepalive: int | None = None,
+        pipelining: bool = False,
     ):
         if max_pool < 2:
             raise ValueError("max_pool must be at least 2 (for event listener + query sender)")
@@ -280,7 +295,7 @@ class BackendAuthenticatedConn:
         self._device = device
         self._started = False
         self._transport_pool = _transport_pool_factory(
-            addr, device.device_id, device.signing_key, max_pool, keepalive
+            addr, device.device_id, device.signing_key, max_pool, keepalive, pipelining
         )
         self._status = BackendConnStatus.LOST
         self._status_exc: Exception | None = None
@@ -378,10 +393,13 @@ class BackendAuthenticatedConn:
     async def run(self) -> AsyncIterator[None]:
         if self._started:
             raise RuntimeError("Already started")
-        async with open_service_nursery() as nursery:
-            nursery.start_soon(self._run_manager)
-            yield
-            nursery.cancel_scope.cancel()
+        try:
+            async with open_service_nursery() as nursery:
+                nursery.start_soon(self._run_manager)
+                yield
+                nursery.cancel_scope.cancel()
+        finally:
+            await self._transport_pool.aclose()
 
     async def _run_manager(self) -> None:
         while True:
@@ -502,6 +520,7 @@ class BackendAuthenticatedConn:
         force_fresh: bool = False,
         ignore_status: bool = False,
         allow_not_available: bool = False,
+        dedicated: bool = False,
     ) -> AsyncIterator[Transport]:
         if not ignore_status:
             if self.status_exc:
@@ -511,7 +530,9 @@ class BackendAuthenticatedConn:
                 raise copy_exception(self.status_exc)
 
         try:
-            async with self._transport_pool.acquire(force_fresh=force_fresh) as transport:
+            async with self._transport_pool.acquire(
+                force_fresh=force_fresh, dedicated=dedicated
+            ) as transport:
                 yield transport
 
         except BackendNotAvailable as exc:
@@ -570,7 +591,10 @@ async def backend_authenticated_cmds_factory(
 
     @asynccontextmanager
     async def _acquire_transport(
-        force_fresh: bool = False, ignore_status: bool = False, allow_not_available: bool = False
+        force_fresh: bool = False,
+        ignore_status: bool = False,
+        allow_not_available: bool = False,
+        dedicated: bool = False,
     ) -> AsyncIterator[Transport]:
         async with transport_lock:
             transport = await _init_transport()
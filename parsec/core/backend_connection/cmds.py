@@ -212,8 +212,7 @@ async def _send_cmd(
         raise BackendProtocolError("Invalid request data") from exc
 
     try:
-        await transport.send(raw_req)
-        raw_rep = await transport.recv()
+        raw_rep = await transport.request(raw_req)
 
     except TransportError as exc:
         transport.logger.debug("Request failed (backend not available)", cmd=cmd)
@@ -31,14 +31,21 @@ def expose_cmds(
 
 
 def expose_cmds_with_retrier(
-    cmd: Callable[Concatenate[Transport, P], Awaitable[R]]
+    cmd: Callable[Concatenate[Transport, P], Awaitable[R]], dedicated: bool = False
 ) -> Callable[Concatenate[T_BACKEND, P], Awaitable[R]]:
+    """
+    `dedicated` must be set for the long waiting commands, so that they don't
+    occupy the pipelined transport shared by the other commands.
+    """
+
     @wraps(cmd)
     async def wrapper(self: T_BACKEND, *args: P.args, **kwargs: P.kwargs) -> R:
         # Reusing the transports expose us to `BackendNotAvailable` exceptions
         # due to inactivity timeout while the transport was in the pool.
         try:
-            async with self.acquire_transport(allow_not_available=True) as transport:
+            async with self.acquire_transport(
+                allow_not_available=True, dedicated=dedicated
+            ) as transport:
                 return await cmd(transport, *args, **kwargs)
 
         except BackendNotAvailable:
@@ -74,7 +74,10 @@ async def backend_invited_cmds_factory(
 
     @asynccontextmanager
     async def _acquire_transport(
-        force_fresh: bool = False, ignore_status: bool = False, allow_not_available: bool = False
+        force_fresh: bool = False,
+        ignore_status: bool = False,
+        allow_not_available: bool = False,
+        dedicated: bool = False,
     ) -> AsyncIterator[Transport]:
         nonlocal transport
 
@@ -54,6 +54,7 @@ async def connect_as_authenticated(
     device_id: DeviceID,
     signing_key: SigningKey,
     keepalive: int | None = None,
+    pipelining: bool = False,
 ) -> Transport:
     handshake = AuthenticatedClientHandshake(
         organization_id=addr.organization_id,
@@ -62,7 +63,9 @@ async def connect_as_authenticated(
         root_verify_key=addr.root_verify_key,
     )
     assert addr.port is not None, "Organization port is None"
-    return await _connect(addr.hostname, addr.port, addr.use_ssl, keepalive, handshake)
+    return await _connect(
+        addr.hostname, addr.port, addr.use_ssl, keepalive, handshake, pipelining=pipelining
+    )
 
 
 async def _connect(
@@ -71,6 +74,7 @@ async def _connect(
     use_ssl: bool,
     keepalive: int | None,
     handshake: CLIENT_HANDSHAKE_TYPE,
+    pipelining: bool = False,
 ) -> Transport:
     stream = await maybe_connect_through_proxy(hostname, port, use_ssl)
 
@@ -95,7 +99,7 @@ async def _connect(
     try:
         # TODO: explain why keepalive is not passed as a parameter
         # It may be a good reason, but I'm not entirely sure
-        transport = await Transport.init_for_client(stream, host=hostname)
+        transport = await Transport.init_for_client(stream, host=hostname, pipelining=pipelining)
         transport.keepalive = keepalive
 
     except TransportError as exc:
@@ -167,20 +171,67 @@ async def _do_handshake(transport: Transport, handshake: CLIENT_HANDSHAKE_TYPE)
 
 
 class TransportPool:
+    """
+    Pool of transports, at most `max_pool` of them being used at the same time.
+
+    A pipelined transport is shared instead: it is used concurrently by all the
+    callers that don't require a dedicated transport, and keeps its slot of the
+    pool for as long as it is shared.
+    """
+
     def __init__(self, connect_cb: Callable[[], Awaitable[Transport]], max_pool: int):
         self._connect_cb = connect_cb
         self._transports: list[Transport] = []
+        self._shared_transport: Transport | None = None
         self._closed = False
         self._lock = trio.Semaphore(max_pool)
 
+    def _discard_shared_transport(self, transport: Transport) -> None:
+        if self._shared_transport is transport:
+            self._shared_transport = None
+            self._lock.release()
+
+    @asynccontextmanager
+    async def _acquire_shared(self, transport: Transport) -> AsyncIterator[Transport]:
+        try:
+            yield transport
+
+        except TransportClosedByPeer:
+            self._discard_shared_transport(transport)
+            raise
+
+        finally:
+            # Other errors (e.g. invalid response) don't affect the other requests
+            # given each response is tagged with the id of its request
+            if transport.broken:
+                self._discard_shared_transport(transport)
+                with trio.CancelScope(shield=True):
+                    await transport.aclose()
+
     @asynccontextmanager
-    async def acquire(self, force_fresh: bool = False) -> AsyncIterator[Transport]:
+    async def acquire(
+        self, force_fresh: bool = False, dedicated: bool = False
+    ) -> AsyncIterator[Transport]:
         """
+        `dedicated` prevents from using the shared transport, this is needed
+        for the commands that can wait for a long time on the server side.
+
         Raises:
             BackendConnectionError
             trio.ClosedResourceError: if used after having being closed
         """
-        async with self._lock:
+        if self._closed:
+            raise trio.ClosedResourceError()
+
+        dedicated = dedicated or force_fresh
+        if not dedicated and self._shared_transport is not None:
+            async with self._acquire_shared(self._shared_transport) as transport:
+                yield transport
+            return
+
+        await self._lock.acquire()
+        slot_released = False
+        try:
             transport = None
             if not force_fresh:
                 try:
@@ -195,6 +246,15 @@ class TransportPool:
 
                 transport = await self._connect_cb()
 
+            if transport.pipelined and not dedicated and self._shared_transport is None:
+                # The slot is now owned by the shared transport, and will be
+                # released when it gets discarded
+                self._shared_transport = transport
+                slot_released = True
+                async with self._acquire_shared(transport):
+                    yield transport
+                return
+
             try:
                 yield transport
 
@@ -206,7 +266,29 @@ class TransportPool:
                 raise
 
             else:
-                self._transports.append(transport)
+                if self._closed:
+                    await transport.aclose()
+                else:
+                    self._transports.append(transport)
+
+        finally:
+            if not slot_released:
+                self._lock.release()
+
+    async def aclose(self) -> None:
+        """
+        Close all the transports not currently in use, as well as the shared
+        one (which makes its in-flight requests fail). Transports currently
+        in use are closed when released.
+        """
+        self._closed = True
+        transports, self._transports = self._transports, []
+        if self._shared_transport is not None:
+            transports.append(self._shared_transport)
+            self._discard_shared_transport(self._shared_transport)
+        with trio.CancelScope(shield=True):
+            for transport in transports:
+                await transport.aclose()
 
 
 async def http_request(
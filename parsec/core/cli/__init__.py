@@ -18,6 +18,7 @@ from parsec.core.cli import (
     share_workspace,
     stats_organization,
     status_organization,
+    storage_metrics,
 )
 
 __all__ = ("core_cmd_group",)
@@ -39,6 +40,7 @@ core_cmd_group.add_command(list_devices.remove_device, "remove_device")
 core_cmd_group.add_command(recovery.export_recovery_device, "export_recovery_device")
 core_cmd_group.add_command(recovery.import_recovery_device, "import_recovery_device")
 core_cmd_group.add_command(human_find.human_find, "human_find")
+core_cmd_group.add_command(storage_metrics.storage_metrics, "storage_metrics")
 
 core_cmd_group.add_command(invitation.invite_user, "invite_user")
 core_cmd_group.add_command(invitation.invite_device, "invite_device")
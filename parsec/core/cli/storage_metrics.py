@@ -0,0 +1,43 @@
+# Parsec Cloud (https://parsec.cloud) Copyright (c) AGPL-3.0 2016-present Scille SAS
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, TextIO
+
+import click
+
+from parsec.cli_utils import cli_exception_handler
+from parsec.core.cli.utils import cli_command_base_options, core_config_and_device_options
+from parsec.core.config import CoreConfig
+from parsec.core.fs.storage.version import get_storage_metrics_path
+from parsec.core.types import LocalDevice
+
+
+def _storage_metrics(config: CoreConfig, device: LocalDevice) -> Dict[str, Any]:
+    # The local storages are not opened: this would run their cleanup and vacuum,
+    # and would clash with a core currently using them
+    metrics_path = get_storage_metrics_path(config.data_base_dir, device)
+    try:
+        return json.loads(metrics_path.read_text())
+    except FileNotFoundError as exc:
+        raise RuntimeError(
+            f"No storage metrics for device `{device.device_id.str}`, it has not been run yet"
+        ) from exc
+
+
+@click.command(short_help="dump the local storage metrics")
+@click.option("--output", type=click.File("w"), default="-")
+@core_config_and_device_options
+@cli_command_base_options
+def storage_metrics(config: CoreConfig, device: LocalDevice, output: TextIO, **kwargs: Any) -> None:
+    """
+    Dump as JSON the local storage metrics of the given device.
+
+    Those are written by the core using the device every
+    `STORAGE_METRICS_LOG_INTERVAL` seconds, and when it stops. The `dumped_on`
+    field tells when they were taken.
+    """
+    with cli_exception_handler(config.debug):
+        metrics = _storage_metrics(config, device)
+        output.write(json.dumps(metrics, indent=2))
+        output.write("\n")
@@ -16,6 +16,13 @@ from parsec.api.data import EntryID
 from parsec.core.types import BackendAddr
 
 DEFAULT_WORKSPACE_STORAGE_CACHE_SIZE = 512 * 1024 * 1024
+# In-memory cache of decrypted chunks, set to 0 to disable it
+DEFAULT_WORKSPACE_STORAGE_CHUNK_CACHE_SIZE = 32 * 1024 * 1024
+# Number of decrypted manifests kept in memory, not counting the ones that
+# are being modified or not yet written to the local database
+DEFAULT_WORKSPACE_STORAGE_MANIFEST_CACHE_SIZE = 10000
+# Number of blocks prefetched on sequential reads, set to 0 to disable read-ahead
+DEFAULT_WORKSPACE_READ_AHEAD_WINDOW = 8
 
 logger = get_logger()
 
@@ -56,6 +63,8 @@ class CoreConfig:
     backend_max_cooldown: int = 30
     backend_connection_keepalive: int | None = 29
     backend_max_connections: int = 4
+    # Send concurrent requests over a single connection if the server supports it
+    backend_pipelining: bool = False
 
     invitation_token_size: int = 8
 
@@ -66,6 +75,9 @@ class CoreConfig:
     sentry_environment: str = ""
     telemetry_enabled: bool = True
     workspace_storage_cache_size: int = DEFAULT_WORKSPACE_STORAGE_CACHE_SIZE
+    workspace_storage_chunk_cache_size: int = DEFAULT_WORKSPACE_STORAGE_CHUNK_CACHE_SIZE
+    workspace_storage_manifest_cache_size: int = DEFAULT_WORKSPACE_STORAGE_MANIFEST_CACHE_SIZE
+    workspace_read_ahead_window: int = DEFAULT_WORKSPACE_READ_AHEAD_WINDOW
     pki_extra_trust_roots: FrozenSet[Path] = frozenset()
 
     gui_last_device: str | None = None
@@ -102,10 +114,14 @@ def config_factory(
     backend_max_cooldown: int = 30,
     backend_connection_keepalive: int | None = 29,
     backend_max_connections: int = 4,
+    backend_pipelining: bool = False,
     sentry_dsn: str | None = None,
     sentry_environment: str = "",
     telemetry_enabled: bool = True,
     workspace_storage_cache_size: int = DEFAULT_WORKSPACE_STORAGE_CACHE_SIZE,
+    workspace_storage_chunk_cache_size: int = DEFAULT_WORKSPACE_STORAGE_CHUNK_CACHE_SIZE,
+    workspace_storage_manifest_cache_size: int = DEFAULT_WORKSPACE_STORAGE_MANIFEST_CACHE_SIZE,
+    workspace_read_ahead_window: int = DEFAULT_WORKSPACE_READ_AHEAD_WINDOW,
     pki_extra_trust_roots: FrozenSet[Path] = frozenset(),
     debug: bool = False,
     gui_last_device: str | None = None,
@@ -148,8 +164,12 @@ def config_factory(
         backend_max_cooldown=backend_max_cooldown,
         backend_connection_keepalive=backend_connection_keepalive,
         backend_max_connections=backend_max_connections,
+        backend_pipelining=backend_pipelining,
         telemetry_enabled=telemetry_enabled,
         workspace_storage_cache_size=workspace_storage_cache_size,
+        workspace_storage_chunk_cache_size=workspace_storage_chunk_cache_size,
+        workspace_storage_manifest_cache_size=workspace_storage_manifest_cache_size,
+        workspace_read_ahead_window=workspace_read_ahead_window,
         pki_extra_trust_roots=pki_extra_trust_roots,
         debug=debug,
         sentry_dsn=sentry_dsn,
@@ -261,6 +281,11 @@ def save_config(config: CoreConfig) -> None:
                 "backend_max_cooldown": config.backend_max_cooldown,
                 "backend_connection_keepalive": config.backend_connection_keepalive,
                 "workspace_storage_cache_size": config.workspace_storage_cache_size,
+                "workspace_storage_chunk_cache_size": config.workspace_storage_chunk_cache_size,
+                "workspace_storage_manifest_cache_size": (
+                    config.workspace_storage_manifest_cache_size
+                ),
+                "workspace_read_ahead_window": config.workspace_read_ahead_window,
                 "pki_extra_trust_roots": list(map(str, config.pki_extra_trust_roots)),
                 "gui_last_device": config.gui_last_device,
                 "gui_tray_enabled": config.gui_tray_enabled,
@@ -73,7 +73,6 @@ from parsec.core.fs.exceptions import (
     FSDeviceNotFoundError,
     FSError,
     FSInvalidTrustchainError,
-    FSLocalMissError,
     FSRemoteBlockNotFound,
     FSRemoteManifestNotFound,
     FSRemoteManifestNotFoundBadVersion,
@@ -87,6 +86,7 @@ from parsec.core.fs.exceptions import (
     FSWorkspaceNoWriteAccess,
 )
 from parsec.core.fs.storage import BaseWorkspaceStorage
+from parsec.core.fs.transfer_limiter import BlockTransferLimiter
 from parsec.core.remote_devices_manager import (
     RemoteDevicesManager,
     RemoteDevicesManagerBackendOfflineError,
@@ -114,6 +114,11 @@ MANIFEST_STAMP_AHEAD_US = 100_000  # microseconds, or 0.1 seconds
 # priority over manifest updates.
 ROLE_CERTIFICATE_STAMP_AHEAD_US = 500_000  # microseconds, or 0.5 seconds
 
+# Number of dirty blocks fetched at once from the local storage during upload
+UPLOAD_BLOCKS_BATCH_SIZE = 16
+# Maximum number of block accesses kept for deduplication
+KNOWN_BLOCKS_MAX_ENTRIES = 16384
+
 
 class VlobRequireGreaterTimestampError(Exception):
     @property
@@ -436,6 +441,7 @@ class RemoteLoader(UserRemoteLoader):
         backend_cmds: BackendAuthenticatedCmds,
         remote_devices_manager: RemoteDevicesManager,
         local_storage: BaseWorkspaceStorage,
+        transfer_limiter: BlockTransferLimiter | None = None,
     ):
         super().__init__(
             device,
@@ -446,6 +452,19 @@ class RemoteLoader(UserRemoteLoader):
             remote_devices_manager,
         )
         self.local_storage = local_storage
+        self.transfer_limiter = transfer_limiter or BlockTransferLimiter()
+        # Blocks known to be available in the realm, indexed by digest
+        self._known_blocks: Dict[bytes, BlockAccess] = {}
+
+    def _remember_block(self, access: BlockAccess) -> None:
+        self._known_blocks.pop(access.digest.digest, None)
+        self._known_blocks[access.digest.digest] = access
+        if len(self._known_blocks) > KNOWN_BLOCKS_MAX_ENTRIES:
+            del self._known_blocks[next(iter(self._known_blocks))]
+
+    def get_known_block(self, digest: HashDigest) -> BlockAccess | None:
+        """Return the access of a block with the given digest already available in the realm."""
+        return self._known_blocks.get(digest.digest)
 
     async def load_blocks(self, accesses: List[BlockAccess]) -> None:
         async with open_service_nursery() as nursery:
@@ -473,11 +492,13 @@ class RemoteLoader(UserRemoteLoader):
                     access = next(blocks_iter, None)
                     if not access:
                         break
-                    await self.load_block(access)
+                    async with self.transfer_limiter.transfer(access.size):
+                        await self.load_block(access)
                     await send_channel.send(access)
 
+        # The actual concurrency is adjusted by the transfer limiter
         async with send_channel:
-            for _ in range(4):
+            for _ in range(min(self.transfer_limiter.max_concurrency, len(blocks))):
                 nursery.start_soon(_loader, send_channel.clone())
 
         return receive_channel
@@ -518,24 +539,43 @@ class RemoteLoader(UserRemoteLoader):
         # TODO: let encryption manager do the digest check ?
         assert HashDigest.from_data(block) == access.digest, access
         await self.local_storage.set_clean_block(access.id, block)
+        self._remember_block(access)
 
     async def upload_blocks(self, blocks: List[BlockAccess]) -> None:
-        blocks_iter = iter(blocks)
+        send_channel, receive_channel = open_memory_channel[Tuple[BlockAccess, bytes]](
+            UPLOAD_BLOCKS_BATCH_SIZE
+        )
 
-        async def _uploader() -> None:
-            while True:
-                access = next(blocks_iter, None)
-                if not access:
-                    break
-                try:
-                    data = await self.local_storage.get_dirty_block(access.id)
-                except FSLocalMissError:
-                    continue
-                await self.upload_block(access, data)
+        async def _reader(send_channel: "MemorySendChannel[Tuple[BlockAccess, bytes]]") -> None:
+            # Fetch the dirty blocks by batches in order to limit the number of
+            # round trips to the local storage while keeping the memory usage bounded
+            async with send_channel:
+                for i in range(0, len(blocks), UPLOAD_BLOCKS_BATCH_SIZE):
+                    batch = blocks[i : i + UPLOAD_BLOCKS_BATCH_SIZE]
+                    datas = await self.local_storage.get_dirty_blocks(
+                        [access.id for access in batch]
+                    )
+                    for access in batch:
+                        data = datas.get(access.id)
+                        # Block is not dirty, it has already been uploaded
+                        if data is None:
+                            continue
+                        await send_channel.send((access, data))
+
+        async def _uploader(
+            receive_channel: "MemoryReceiveChannel[Tuple[BlockAccess, bytes]]",
+        ) -> None:
+            async with receive_channel:
+                async for access, data in receive_channel:
+                    async with self.transfer_limiter.transfer(len(data)):
+                        await self.upload_block(access, data)
 
         async with open_service_nursery() as nursery:
-            for _ in range(4):
-                nursery.start_soon(_uploader)
+            async with send_channel, receive_channel:
+                nursery.start_soon(_reader, send_channel.clone())
+                # The actual concurrency is adjusted by the transfer limiter
+                for _ in range(min(self.transfer_limiter.max_concurrency, len(blocks))):
+                    nursery.start_soon(_uploader, receive_channel.clone())
 
     async def upload_block(self, access: BlockAccess, data: bytes) -> None:
         """
@@ -574,9 +614,11 @@ class RemoteLoader(UserRemoteLoader):
         elif not isinstance(rep, BlockCreateRepOk):
             raise FSError(f"Cannot upload block: {rep}")
 
-        # Update local storage
-        await self.local_storage.set_clean_block(access.id, data)
+        # Update local storage, the dirty chunk is cleared first given it shares
+        # its id with the clean block (hence the same chunk cache entry)
         await self.local_storage.clear_chunk(ChunkID.from_block_id(access.id), miss_ok=True)
+        await self.local_storage.set_clean_block(access.id, data)
+        self._remember_block(access)
 
     async def load_manifest(
         self,
@@ -953,6 +995,8 @@ class RemoteLoaderTimestamped(RemoteLoader):
         self.backend_cmds = remote_loader.backend_cmds
         self.remote_devices_manager = remote_loader.remote_devices_manager
         self.local_storage = remote_loader.local_storage.to_timestamped(timestamp)
+        self.transfer_limiter = remote_loader.transfer_limiter
+        self._known_blocks = remote_loader._known_blocks
         self._realm_role_certificates_cache = None
         self.timestamp = timestamp
 
@@ -1,6 +1,7 @@
 # Parsec Cloud (https://parsec.cloud) Copyright (c) AGPL-3.0 2016-present Scille SAS
 from __future__ import annotations
 
+from parsec.core.fs.storage.chunk_cache import ChunkCache
 from parsec.core.fs.storage.chunk_storage import BlockStorage, ChunkStorage
 from parsec.core.fs.storage.local_database import LocalDatabase
 from parsec.core.fs.storage.manifest_storage import ManifestStorage
@@ -17,6 +18,7 @@ __all__ = (
     "UserStorage",
     "user_storage_non_speculative_init",
     "ManifestStorage",
+    "ChunkCache",
     "ChunkStorage",
     "BlockStorage",
     "workspace_storage_non_speculative_init",
@@ -0,0 +1,67 @@
+# Parsec Cloud (https://parsec.cloud) Copyright (c) AGPL-3.0 2016-present Scille SAS
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Dict
+
+from parsec.core.types import ChunkID
+
+
+class ChunkCache:
+    """Size-bounded LRU cache of decrypted chunks, kept in memory.
+
+    Both clean blocks and dirty chunks can be cached since a given chunk id
+    always corresponds to the same data. A maximum size of 0 disables the cache.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[ChunkID, bytes] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, chunk_id: ChunkID) -> bool:
+        return chunk_id in self._data
+
+    def get(self, chunk_id: ChunkID) -> bytes | None:
+        try:
+            data = self._data[chunk_id]
+        except KeyError:
+            self.misses += 1
+            return None
+        self._data.move_to_end(chunk_id)
+        self.hits += 1
+        return data
+
+    def set(self, chunk_id: ChunkID, data: bytes) -> None:
+        self.invalidate(chunk_id)
+        # Do not bother caching chunks that would evict the whole cache
+        if len(data) > self.max_size:
+            return
+        self._data[chunk_id] = data
+        self.size += len(data)
+        while self.size > self.max_size:
+            _, evicted = self._data.popitem(last=False)
+            self.size -= len(evicted)
+
+    def invalidate(self, chunk_id: ChunkID) -> None:
+        data = self._data.pop(chunk_id, None)
+        if data is not None:
+            self.size -= len(data)
+
+    def clear(self) -> None:
+        self._data.clear()
+        self.size = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._data),
+            "size": self.size,
+            "max_size": self.max_size,
+        }
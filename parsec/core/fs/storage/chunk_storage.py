@@ -1,20 +1,44 @@
 # Parsec Cloud (https://parsec.cloud) Copyright (c) AGPL-3.0 2016-present Scille SAS
 from __future__ import annotations
 
-import secrets
 import time
 from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import AsyncContextManager, AsyncIterator, List, TypeVar
+from typing import (
+    AbstractSet,
+    Any,
+    AsyncContextManager,
+    AsyncIterator,
+    Dict,
+    Iterable,
+    List,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
 
 import trio
 
 from parsec.core.fs.exceptions import FSLocalMissError, FSLocalStorageClosedError
 from parsec.core.fs.storage.local_database import Cursor, LocalDatabase
-from parsec.core.types import DEFAULT_BLOCK_SIZE, ChunkID, LocalDevice
+from parsec.core.types import ChunkID, LocalDevice
+from parsec.metrics import StorageMetrics
 
 T = TypeVar("T", bound="ChunkStorage")
 
+# Keep the number of bound parameters per statement well below the sqlite
+# limit (999 for sqlite < 3.32)
+SQLITE_BATCH_SIZE = 500
+
+
+# Maximum number of access times kept in memory before being written to the database
+ACCESSED_ON_FLUSH_THRESHOLD = 1000
+
+
+def _batched(items: Sequence[bytes]) -> Iterable[Sequence[bytes]]:
+    for i in range(0, len(items), SQLITE_BATCH_SIZE):
+        yield items[i : i + SQLITE_BATCH_SIZE]
+
 
 class ChunkStorage:
     """Interface to access the local chunks of data."""
@@ -23,6 +47,14 @@ class ChunkStorage:
         self.local_symkey = device.local_symkey
         self.localdb = localdb
 
+        # Reading a chunk should not turn into a write to the database, so the
+        # access times are kept in memory and written by batch later on (when
+        # a write transaction occurs, before a cleanup or before a vacuum)
+        self._pending_accessed_on: Dict[bytes, float] = {}
+
+        # Reads, misses, writes and their size in bytes (decrypted data)
+        self.metrics = StorageMetrics()
+
     @property
     def path(self) -> Path:
         return Path(self.localdb.path)
@@ -44,6 +76,7 @@ class ChunkStorage:
             with trio.CancelScope(shield=True):
                 # Commit the pending changes in the local database
                 try:
+                    await self.flush_accessed_on()
                     await self.localdb.commit()
                 # Ignore storage closed exceptions, since it follows an operational error
                 except FSLocalStorageClosedError:
@@ -74,6 +107,11 @@ class ChunkStorage:
                 );"""
             )
 
+    # Metrics
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return self.metrics.stats()
+
     # Size and chunks
 
     async def get_nb_blocks(self) -> int:
@@ -97,58 +135,103 @@ class ChunkStorage:
         return bool(manifest_row)
 
     async def get_local_chunk_ids(self, chunk_id: List[ChunkID]) -> List[ChunkID]:
+        # Remove duplicates while preserving order
+        bytes_ids = list(dict.fromkeys(id.bytes for id in chunk_id))
+        if not bytes_ids:
+            return []
 
-        bytes_id_list = [(id.bytes,) for id in chunk_id]
-
+        rows = []
         async with self._open_cursor() as cursor:
-            # Can't use execute many with SELECT so we have to make a temporary table filled with the needed chunk_id
-            # and intersect it with the normal table
-            # create random name for the temporary table to avoid asynchronous errors
-            table_name = "temp" + secrets.token_hex(12)
-            assert table_name.isalnum()
-
-            cursor.execute(f"""DROP TABLE IF EXISTS {table_name}""")
-            cursor.execute(
-                f"""CREATE TABLE IF NOT EXISTS {table_name}
-                    (chunk_id BLOB PRIMARY KEY NOT NULL -- UUID
-                );"""
-            )
-
-            cursor.executemany(
-                f"""INSERT OR REPLACE INTO
-            {table_name} (chunk_id)
-            VALUES (?)""",
-                iter(bytes_id_list),
-            )
-
-            cursor.execute(
-                f"""SELECT chunk_id FROM chunks INTERSECT SELECT chunk_id FROM {table_name}"""
-            )
-
-            intersect_rows = cursor.fetchall()
-            cursor.execute(f"""DROP TABLE IF EXISTS {table_name}""")
+            for batch in _batched(bytes_ids):
+                placeholders = ", ".join("?" * len(batch))
+                cursor.execute(
+                    f"SELECT chunk_id FROM chunks WHERE chunk_id IN ({placeholders})", batch
+                )
+                rows += cursor.fetchall()
 
-        return [ChunkID.from_bytes(id_bytes) for (id_bytes,) in intersect_rows]
+        return [ChunkID.from_bytes(id_bytes) for (id_bytes,) in rows]
 
     async def get_chunk(self, chunk_id: ChunkID) -> bytes:
         async with self._open_cursor() as cursor:
-            # Use a thread as executing a statement that modifies the content of the database might,
-            # in some case, block for several hundreds of milliseconds
-            await self.localdb.run_in_thread(
-                cursor.execute,
-                """
-                UPDATE chunks SET accessed_on = ? WHERE chunk_id = ?;
-                """,
-                (time.time(), chunk_id.bytes),
-            )
-            cursor.execute("SELECT changes()")
-            (changes,) = cursor.fetchone()
-            if not changes:
-                raise FSLocalMissError(chunk_id)
             cursor.execute("""SELECT data FROM chunks WHERE chunk_id = ?""", (chunk_id.bytes,))
-            (ciphered,) = cursor.fetchone()
+            row = cursor.fetchone()
+            if not row:
+                self.metrics.increment("misses")
+                raise FSLocalMissError(chunk_id)
+            self._pending_accessed_on[chunk_id.bytes] = time.time()
+            await self._maybe_flush_accessed_on(cursor)
+
+        (ciphered,) = row
+        data = self.local_symkey.decrypt(ciphered)
+        self.metrics.increment("reads")
+        self.metrics.increment("bytes_read", len(data))
+        return data
+
+    async def get_chunks(self, chunk_ids: Iterable[ChunkID]) -> Dict[ChunkID, bytes]:
+        """Fetch and decrypt several chunks within a single locked transaction.
+
+        Missing chunks are simply omitted from the returned dictionary.
+        """
+        # Remove duplicates while preserving order
+        bytes_ids = list(dict.fromkeys(chunk_id.bytes for chunk_id in chunk_ids))
+        if not bytes_ids:
+            return {}
+        local_symkey = self.local_symkey
 
-        return self.local_symkey.decrypt(ciphered)
+        async with self._open_cursor() as cursor:
+
+            def _thread_target() -> Dict[ChunkID, bytes]:
+                result = {}
+                for batch in _batched(bytes_ids):
+                    placeholders = ", ".join("?" * len(batch))
+                    cursor.execute(
+                        f"SELECT chunk_id, data FROM chunks WHERE chunk_id IN ({placeholders})",
+                        batch,
+                    )
+                    for chunk_id, ciphered in cursor.fetchall():
+                        result[ChunkID.from_bytes(chunk_id)] = local_symkey.decrypt(ciphered)
+                return result
+
+            # Run CPU and IO expensive logic in a thread
+            result = await self.localdb.run_in_thread(_thread_target)
+
+            now = time.time()
+            for chunk_id in result:
+                self._pending_accessed_on[chunk_id.bytes] = now
+            await self._maybe_flush_accessed_on(cursor)
+
+        self.metrics.increment("reads", len(result))
+        self.metrics.increment("misses", len(bytes_ids) - len(result))
+        self.metrics.increment("bytes_read", sum(len(data) for data in result.values()))
+        return result
+
+    # Access time bookkeeping
+
+    async def _flush_accessed_on(self, cursor: Cursor) -> None:
+        if not self._pending_accessed_on:
+            return
+        rows = [
+            (accessed_on, chunk_id) for chunk_id, accessed_on in self._pending_accessed_on.items()
+        ]
+        self._pending_accessed_on.clear()
+        self.metrics.increment("accessed_on_flushes")
+        self.metrics.increment("accessed_on_updates", len(rows))
+        # Use a thread as executing a statement that modifies the content of the database might,
+        # in some case, block for several hundreds of milliseconds
+        await self.localdb.run_in_thread(
+            cursor.executemany, "UPDATE chunks SET accessed_on = ? WHERE chunk_id = ?", rows
+        )
+
+    async def _maybe_flush_accessed_on(self, cursor: Cursor) -> None:
+        if len(self._pending_accessed_on) >= ACCESSED_ON_FLUSH_THRESHOLD:
+            await self._flush_accessed_on(cursor)
+
+    async def flush_accessed_on(self) -> None:
+        """Write the access times kept in memory to the database."""
+        if not self._pending_accessed_on:
+            return
+        async with self._open_cursor() as cursor:
+            await self._flush_accessed_on(cursor)
 
     async def set_chunk(self, chunk_id: ChunkID, raw: bytes) -> None:
         ciphered = self.local_symkey.encrypt(raw)
@@ -164,8 +247,42 @@ class ChunkStorage:
                 VALUES (?, ?, ?, ?, ?)""",
                 (chunk_id.bytes, len(ciphered), False, time.time(), ciphered),
             )
+        self.metrics.increment("writes")
+        self.metrics.increment("bytes_written", len(raw))
+
+    async def set_chunks(self, items: Iterable[Tuple[ChunkID, bytes]]) -> None:
+        """Encrypt and store several chunks within a single locked transaction."""
+        items = list(items)
+        if not items:
+            return
+
+        # Update database
+        async with self._open_cursor() as cursor:
+            await self._insert_chunks(cursor, items)
+
+    async def _insert_chunks(self, cursor: Cursor, items: List[Tuple[ChunkID, bytes]]) -> None:
+        local_symkey = self.local_symkey
+
+        def _thread_target() -> None:
+            now = time.time()
+            rows = []
+            for chunk_id, raw in items:
+                ciphered = local_symkey.encrypt(raw)
+                rows.append((chunk_id.bytes, len(ciphered), False, now, ciphered))
+            cursor.executemany(
+                """INSERT OR REPLACE INTO
+                chunks (chunk_id, size, offline, accessed_on, data)
+                VALUES (?, ?, ?, ?, ?)""",
+                rows,
+            )
+
+        # Run CPU and IO expensive logic in a thread
+        await self.localdb.run_in_thread(_thread_target)
+        self.metrics.increment("writes", len(items))
+        self.metrics.increment("bytes_written", sum(len(raw) for _, raw in items))
 
     async def clear_chunk(self, chunk_id: ChunkID) -> None:
+        self._pending_accessed_on.pop(chunk_id.bytes, None)
         async with self._open_cursor() as cursor:
             # Use a thread as executing a statement that modifies the content of the database might,
             # in some case, block for several hundreds of milliseconds
@@ -180,12 +297,21 @@ class ChunkStorage:
 
 
 class BlockStorage(ChunkStorage):
-    """Interface for caching the data blocks."""
+    """Interface for caching the data blocks.
+
+    The number of blocks and their total size are maintained in memory (and
+    persisted along with the blocks) so the cache never has to be scanned in
+    order to know whether some blocks need to be evicted.
+    """
 
     def __init__(self, device: LocalDevice, localdb: LocalDatabase, cache_size: int):
         super().__init__(device, localdb)
         self.cache_size = cache_size
 
+        # Set by `_create_db`
+        self._nb_blocks: int
+        self._total_size: int
+
     @classmethod
     @asynccontextmanager
     async def run(  # type: ignore[override]
@@ -209,62 +335,168 @@ class BlockStorage(ChunkStorage):
         async with self._open_cursor() as cursor:
             yield cursor
 
-    # Garbage collection
+    # Database initialization
 
-    @property
-    def block_limit(self) -> int:
-        return self.cache_size // DEFAULT_BLOCK_SIZE
+    async def _create_db(self) -> None:
+        await super()._create_db()
+        async with self._open_cursor() as cursor:
+            # Allow for the eviction to only visit the evicted blocks
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS chunks_accessed_on_idx ON chunks (accessed_on);"
+            )
+
+            # Singleton storing the number of blocks and their total size
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS chunks_summary
+                (
+                  _id INTEGER PRIMARY KEY NOT NULL,
+                  nb_blocks INTEGER NOT NULL,
+                  total_size INTEGER NOT NULL
+                );
+                """
+            )
+            cursor.execute("SELECT nb_blocks, total_size FROM chunks_summary WHERE _id = 0")
+            row = cursor.fetchone()
+
+            # The summary is missing (e.g. database created by an older version)
+            if row is None:
+                cursor.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM chunks")
+                row = cursor.fetchone()
+                cursor.execute(
+                    "INSERT INTO chunks_summary(_id, nb_blocks, total_size) VALUES (0, ?, ?)",
+                    row,
+                )
+
+            self._nb_blocks, self._total_size = row
+
+    def _update_summary(self, cursor: Cursor, nb_blocks_delta: int, size_delta: int) -> None:
+        if not nb_blocks_delta and not size_delta:
+            return
+        self._nb_blocks += nb_blocks_delta
+        self._total_size += size_delta
+        cursor.execute(
+            "UPDATE chunks_summary SET nb_blocks = ?, total_size = ? WHERE _id = 0",
+            (self._nb_blocks, self._total_size),
+        )
+
+    def _get_partial_summary(self, cursor: Cursor, bytes_ids: Sequence[bytes]) -> Tuple[int, int]:
+        nb_blocks = total_size = 0
+        for batch in _batched(bytes_ids):
+            placeholders = ", ".join("?" * len(batch))
+            cursor.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM chunks "
+                f"WHERE chunk_id IN ({placeholders})",
+                batch,
+            )
+            batch_nb_blocks, batch_total_size = cursor.fetchone()
+            nb_blocks += batch_nb_blocks
+            total_size += batch_total_size
+        return nb_blocks, total_size
+
+    # Metrics
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            **super().get_metrics(),
+            "cache_size": self.cache_size,
+            "nb_blocks": self._nb_blocks,
+            "total_size": self._total_size,
+        }
+
+    # Size and blocks
+
+    async def get_nb_blocks(self) -> int:
+        return self._nb_blocks
+
+    async def get_total_size(self) -> int:
+        return self._total_size
+
+    # Garbage collection
 
     async def clear_all_blocks(self) -> None:
+        self._pending_accessed_on.clear()
         async with self._open_cursor() as cursor:
             cursor.execute("DELETE FROM chunks")
+            self._update_summary(cursor, -self._nb_blocks, -self._total_size)
 
-    # Upgraded set method
+    # Upgraded set and clear methods
+
+    async def _insert_chunks(self, cursor: Cursor, items: List[Tuple[ChunkID, bytes]]) -> None:
+        bytes_ids = list(dict.fromkeys(chunk_id.bytes for chunk_id, _ in items))
+        nb_blocks_before, size_before = self._get_partial_summary(cursor, bytes_ids)
+        await super()._insert_chunks(cursor, items)
+        nb_blocks_after, size_after = self._get_partial_summary(cursor, bytes_ids)
+        self._update_summary(cursor, nb_blocks_after - nb_blocks_before, size_after - size_before)
 
     async def set_chunk(self, chunk_id: ChunkID, raw: bytes) -> None:
-        ciphered = self.local_symkey.encrypt(raw)
+        await self.set_chunks([(chunk_id, raw)])
+
+    async def set_chunks(self, items: Iterable[Tuple[ChunkID, bytes]]) -> None:
+        items = list(items)
+        if not items:
+            return
 
         # Update database
         async with self._open_cursor() as cursor:
 
-            # Insert the chunk
+            # Insert the chunks
+            await self._insert_chunks(cursor, items)
+
+            # Perform cleanup if necessary, without evicting the blocks that
+            # have just been inserted as they are typically about to be read
+            await self.cleanup(cursor, protected={chunk_id.bytes for chunk_id, _ in items})
+
+    async def clear_chunk(self, chunk_id: ChunkID) -> None:
+        self._pending_accessed_on.pop(chunk_id.bytes, None)
+        async with self._open_cursor() as cursor:
+            cursor.execute("SELECT size FROM chunks WHERE chunk_id = ?", (chunk_id.bytes,))
+            row = cursor.fetchone()
+            if not row:
+                raise FSLocalMissError(chunk_id)
             # Use a thread as executing a statement that modifies the content of the database might,
             # in some case, block for several hundreds of milliseconds
             await self.localdb.run_in_thread(
-                cursor.execute,
-                """INSERT OR REPLACE INTO
-                chunks (chunk_id, size, offline, accessed_on, data)
-                VALUES (?, ?, ?, ?, ?)""",
-                (chunk_id.bytes, len(ciphered), False, time.time(), ciphered),
+                cursor.execute, "DELETE FROM chunks WHERE chunk_id = ?", (chunk_id.bytes,)
             )
+            self._update_summary(cursor, -1, -row[0])
 
-            # Perform cleanup if necessary
-            await self.cleanup(cursor)
+    async def cleanup(
+        self, cursor: Cursor | None = None, protected: AbstractSet[bytes] = frozenset()
+    ) -> None:
 
-    async def cleanup(self, cursor: Cursor | None = None) -> None:
+        # No clean up is needed
+        if self._total_size <= self.cache_size:
+            return
 
         # Update database
         async with self._reenter_cursor(cursor) as cursor:
 
-            # Count the chunks
-            cursor.execute("SELECT COUNT(*) FROM chunks")
-            (nb_blocks,) = cursor.fetchone()
-            extra_blocks = nb_blocks - self.block_limit
-
-            # No clean up is needed
-            if extra_blocks <= 0:
-                return
+            # Make sure the eviction relies on up-to-date access times
+            await self._flush_accessed_on(cursor)
+
+            # Remove the extra data plus 10 % of the cache size
+            to_free = self._total_size - self.cache_size + self.cache_size // 10
+
+            def _thread_target() -> Tuple[int, int]:
+                evicted = []
+                freed = 0
+                # The index on `accessed_on` makes this query lazy, so only the
+                # evicted blocks (plus the protected ones) are actually visited
+                cursor.execute("SELECT chunk_id, size FROM chunks ORDER BY accessed_on ASC")
+                for chunk_id, size in cursor:
+                    if freed >= to_free:
+                        break
+                    if chunk_id in protected:
+                        continue
+                    evicted.append((chunk_id,))
+                    freed += size
+                cursor.executemany("DELETE FROM chunks WHERE chunk_id = ?", evicted)
+                return len(evicted), freed
 
-            # Remove the extra block plus 10 % of the cache size, i.e about 100 blocks
-            limit = extra_blocks + self.block_limit // 10
             # Use a thread as executing a statement that modifies the content of the database might,
             # in some case, block for several hundreds of milliseconds
-            await self.localdb.run_in_thread(
-                cursor.execute,
-                """
-                DELETE FROM chunks WHERE chunk_id IN (
-                    SELECT chunk_id FROM chunks ORDER BY accessed_on ASC LIMIT ?
-                )
-                """,
-                (limit,),
-            )
+            nb_evicted, freed = await self.localdb.run_in_thread(_thread_target)
+            self._update_summary(cursor, -nb_evicted, -freed)
+            self.metrics.increment("evictions", nb_evicted)
+            self.metrics.increment("evicted_bytes", freed)
@@ -1,29 +1,33 @@
 # Parsec Cloud (https://parsec.cloud) Copyright (c) AGPL-3.0 2016-present Scille SAS
 from __future__ import annotations
 
+import time
 from contextlib import asynccontextmanager
 from pathlib import Path
 from sqlite3 import Connection, Cursor, OperationalError
 from sqlite3 import connect as sqlite_connect
-from typing import AsyncIterator, Union
+from typing import Any, AsyncIterator, Callable, Dict, TypeVar, Union
 
 import trio
 from trio_typing import TaskStatus
 
 from parsec.core.fs.exceptions import FSLocalStorageClosedError, FSLocalStorageOperationalError
+from parsec.metrics import StorageMetrics
 from parsec.utils import open_service_nursery
 
+R = TypeVar("R")
+
 
 class LocalDatabase:
     """Base class for managing an sqlite3 connection."""
 
-    # Make the trio run_sync function patchable for the tests
-    run_in_thread = staticmethod(trio.to_thread.run_sync)
-
     def __init__(self, path: Union[str, Path, trio.Path], vacuum_threshold: int | None = None):
         # Make sure only a single task access the connection object at a time
         self._lock = trio.Lock()
 
+        # Time spent waiting for the lock, in threads, in commits and in vacuums
+        self.metrics = StorageMetrics()
+
         # Those attributes are set by the `run` async context manager
         self._conn: Connection
         self._abort_service_send_channel: trio.MemorySendChannel[Exception]
@@ -80,6 +84,23 @@ class LocalDatabase:
                 except FSLocalStorageClosedError:
                     pass
 
+    # Instrumentation
+
+    async def run_in_thread(self, fn: Callable[..., R], *args: Any) -> R:
+        # Patchable by the tests
+        with self.metrics.measure("thread"):
+            return await trio.to_thread.run_sync(fn, *args)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {**self.metrics.stats(), "vacuum_threshold": self.vacuum_threshold}
+
+    @asynccontextmanager
+    async def _acquire_lock(self) -> AsyncIterator[None]:
+        start = time.perf_counter()
+        async with self._lock:
+            self.metrics.observe("lock_wait", time.perf_counter() - start)
+            yield
+
     # Operational error protection
 
     @asynccontextmanager
@@ -159,14 +180,14 @@ class LocalDatabase:
 
     async def _connect(self) -> None:
         # Lock the access to the connection object
-        async with self._lock:
+        async with self._acquire_lock():
 
             # Connect and initialize database
             await self._create_connection()
 
     async def _close(self) -> None:
         # Lock the access to the connection object
-        async with self._lock:
+        async with self._acquire_lock():
 
             # Local database is already closed
             if self._is_closed():
@@ -191,7 +212,8 @@ class LocalDatabase:
     async def _commit(self) -> None:
         # Close the local database if an operational error is detected
         async with self._manage_operational_error(allow_commit=True):
-            await self.run_in_thread(self._conn.commit)
+            with self.metrics.measure("commit"):
+                await self.run_in_thread(self._conn.commit)
 
     def _is_closed(self) -> bool:
         return not hasattr(self, "_conn")
@@ -205,7 +227,7 @@ class LocalDatabase:
     @asynccontextmanager
     async def open_cursor(self, commit: bool = True) -> AsyncIterator[Cursor]:
         # Lock the access to the connection object
-        async with self._lock:
+        async with self._acquire_lock():
 
             # Check connection state
             self._check_open()
@@ -216,7 +238,8 @@ class LocalDatabase:
                 # Execute SQL commands
                 cursor = self._conn.cursor()
                 try:
-                    yield cursor
+                    with self.metrics.measure("query"):
+                        yield cursor
                 finally:
                     cursor.close()
 
@@ -226,7 +249,7 @@ class LocalDatabase:
 
     async def commit(self) -> None:
         # Lock the access to the connection object
-        async with self._lock:
+        async with self._acquire_lock():
 
             # Check connection state
             self._check_open()
@@ -250,7 +273,7 @@ class LocalDatabase:
     async def run_vacuum(self) -> None:
 
         # Lock the access to the connection object
-        async with self._lock:
+        async with self._acquire_lock():
 
             # Check connection state
             self._check_open()
@@ -267,7 +290,8 @@ class LocalDatabase:
                 return
 
             # Run vacuum
-            await self.run_in_thread(self._conn.execute, "VACUUM")
+            with self.metrics.measure("vacuum"):
+                await self.run_in_thread(self._conn.execute, "VACUUM")
 
             # The connection needs to be recreated
             try:
@@ -1,38 +1,91 @@
 # Parsec Cloud (https://parsec.cloud) Copyright (c) AGPL-3.0 2016-present Scille SAS
 from __future__ import annotations
 
+from collections import OrderedDict
 from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import AsyncContextManager, AsyncIterator, Dict, Set, Tuple, Union
+from typing import (
+    Any,
+    AsyncContextManager,
+    AsyncIterator,
+    Container,
+    Dict,
+    Iterable,
+    List,
+    Set,
+    Tuple,
+    Union,
+)
 
 import trio
 from structlog import get_logger
 
 from parsec._parsec import Regex
 from parsec.core.fs.exceptions import FSLocalMissError, FSLocalStorageClosedError
+from parsec.core.fs.storage.chunk_cache import ChunkCache
+from parsec.core.fs.storage.chunk_storage import SQLITE_BATCH_SIZE
 from parsec.core.fs.storage.local_database import Cursor, LocalDatabase
-from parsec.core.types import BlockID, ChunkID, EntryID, LocalDevice
+from parsec.core.types import (
+    BlockID,
+    ChunkID,
+    EntryID,
+    EntryName,
+    LocalDevice,
+    LocalFolderManifest,
+    LocalWorkspaceManifest,
+)
 from parsec.core.types.manifest import AnyLocalManifest, local_manifest_decrypt_and_load
+from parsec.metrics import StorageMetrics
+from parsec.utils import open_service_nursery
 
 logger = get_logger()
 
 EMPTY_PATTERN = r"^\b$"  # Do not match anything (https://stackoverflow.com/a/2302992/2846140)
 
+# Maximum number of manifests written in a single transaction
+MANIFEST_FLUSH_BATCH_SIZE = 1000
+
 
 class ManifestStorage:
     """Persistent storage with cache for storing manifests.
 
-    Also stores the checkpoint.
+    Also stores the checkpoint and a reverse index of the folderish manifests,
+    mapping each child entry id to its parent entry id and name.
+
+    The cache is an LRU bounded to `cache_max_entries` manifests (no limit if
+    `None`), not counting the pinned ones: the realm manifest, the manifests
+    not written to the localdb yet and the ones in `locked_entry_ids`.
     """
 
-    def __init__(self, device: LocalDevice, localdb: LocalDatabase, realm_id: EntryID):
+    def __init__(
+        self,
+        device: LocalDevice,
+        localdb: LocalDatabase,
+        realm_id: EntryID,
+        chunk_cache: ChunkCache | None = None,
+        cache_max_entries: int | None = None,
+    ):
         self.device = device
         self.localdb = localdb
         self.realm_id = realm_id
 
-        # This cache contains all the manifests that have been set or accessed
-        # since the last call to `clear_memory_cache`
-        self._cache: Dict[EntryID, AnyLocalManifest] = {}
+        # In-memory chunk cache to invalidate when chunks get removed from the localdb
+        self.chunk_cache = chunk_cache
+
+        # This cache contains the manifests that have been recently set or accessed
+        # since the last call to `clear_memory_cache`, least recently used first
+        self._cache: OrderedDict[EntryID, AnyLocalManifest] = OrderedDict()
+        self.cache_max_entries = cache_max_entries
+        self._cache_hits = 0
+        self._cache_misses = 0
+        self._cache_evictions = 0
+
+        # Manifests read from and written to the localdb (cache misses excluded)
+        self.metrics = StorageMetrics()
+
+        # Entries that must not be evicted from the cache while being modified,
+        # typically set by the workspace storage to its locked entries
+        self.locked_entry_ids: Container[EntryID] = ()
 
         # This dictionary keeps track of all the entry ids of the manifests
         # that have been added to the cache but still needs to be written to
@@ -49,12 +102,22 @@ class ManifestStorage:
     @classmethod
     @asynccontextmanager
     async def run(
-        cls, device: LocalDevice, localdb: LocalDatabase, realm_id: EntryID
+        cls,
+        device: LocalDevice,
+        localdb: LocalDatabase,
+        realm_id: EntryID,
+        chunk_cache: ChunkCache | None = None,
+        cache_max_entries: int | None = None,
+        flush_interval: float | None = None,
     ) -> AsyncIterator["ManifestStorage"]:
-        self = cls(device, localdb, realm_id)
+        self = cls(device, localdb, realm_id, chunk_cache, cache_max_entries)
         await self._create_db()
         try:
-            yield self
+            async with open_service_nursery() as nursery:
+                if flush_interval is not None:
+                    nursery.start_soon(self._periodic_flush, flush_interval)
+                yield self
+                nursery.cancel_scope.cancel()
         finally:
             with trio.CancelScope(shield=True):
                 # Flush the in-memory cache before closing the storage
@@ -64,6 +127,23 @@ class ManifestStorage:
                 except FSLocalStorageClosedError:
                     pass
 
+    async def _periodic_flush(self, flush_interval: float) -> None:
+        while True:
+            await trio.sleep(flush_interval)
+            try:
+                await self._flush_cache_ahead_of_persistance()
+            # The storage is being closed after an operational error
+            except FSLocalStorageClosedError:
+                return
+
+    def _invalidate_chunk_cache(self, chunk_ids: Iterable[Union[ChunkID, BlockID]]) -> None:
+        if self.chunk_cache is None:
+            return
+        for chunk_id in chunk_ids:
+            if isinstance(chunk_id, BlockID):
+                chunk_id = ChunkID.from_block_id(chunk_id)
+            self.chunk_cache.invalidate(chunk_id)
+
     def _open_cursor(self) -> AsyncContextManager[Cursor]:
         # We want the manifest to be written to the disk as soon as possible
         # (unless they are purposely kept out of the local database)
@@ -75,6 +155,55 @@ class ManifestStorage:
         self._cache_ahead_of_localdb.clear()
         self._cache.clear()
 
+    # Cache helpers
+
+    def _is_pinned(self, entry_id: EntryID) -> bool:
+        return (
+            entry_id == self.realm_id
+            or entry_id in self._cache_ahead_of_localdb
+            or entry_id in self.locked_entry_ids
+        )
+
+    def _evictable_count(self) -> int:
+        # Locked entries are not accounted for given there are only a few of them
+        count = len(self._cache) - len(self._cache_ahead_of_localdb)
+        if self.realm_id in self._cache and self.realm_id not in self._cache_ahead_of_localdb:
+            count -= 1
+        return count
+
+    def _set_cache(self, entry_id: EntryID, manifest: AnyLocalManifest) -> None:
+        self._cache[entry_id] = manifest
+        self._cache.move_to_end(entry_id)
+        self._evict_cache()
+
+    def _evict_cache(self) -> None:
+        if self.cache_max_entries is None:
+            return
+        # The most recently used entry (i.e. the one that triggered the
+        # eviction) is never a candidate
+        candidates = len(self._cache) - 1
+        while candidates > 0 and self._evictable_count() > self.cache_max_entries:
+            candidates -= 1
+            entry_id = next(iter(self._cache))
+            if self._is_pinned(entry_id):
+                self._cache.move_to_end(entry_id)
+            else:
+                del self._cache[entry_id]
+                self._cache_evictions += 1
+
+    def get_cache_stats(self) -> Dict[str, int]:
+        return {
+            "hits": self._cache_hits,
+            "misses": self._cache_misses,
+            "evictions": self._cache_evictions,
+            "entries": len(self._cache),
+            "pending_entries": len(self._cache_ahead_of_localdb),
+            "max_entries": -1 if self.cache_max_entries is None else self.cache_max_entries,
+        }
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {**self.metrics.stats(), "cache": self.get_cache_stats()}
+
     # Database initialization
 
     async def _create_db(self) -> None:
@@ -121,6 +250,118 @@ class ManifestStorage:
                 (EMPTY_PATTERN,),
             )
 
+            # Singleton storing the block size of the files created in the workspace
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS blocksize
+                (
+                  _id INTEGER PRIMARY KEY NOT NULL,
+                  blocksize INTEGER NOT NULL
+                );
+                """
+            )
+
+            # Reverse index of the folderish manifests children
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'entry_parents'"
+            )
+            index_exists = cursor.fetchone() is not None
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS entry_parents
+                (
+                  entry_id BLOB PRIMARY KEY NOT NULL, -- UUID
+                  parent_id BLOB NOT NULL, -- UUID
+                  name TEXT NOT NULL
+                );
+                """
+            )
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS entry_parents_parent_id_idx ON entry_parents (parent_id)"
+            )
+
+            # Populate the index from the manifests stored before its introduction
+            if not index_exists:
+                local_symkey = self.device.local_symkey
+
+                def _thread_target() -> None:
+                    cursor.execute("SELECT vlob_id, blob FROM vlobs")
+                    for vlob_id, blob in cursor.fetchall():
+                        manifest = local_manifest_decrypt_and_load(blob, key=local_symkey)
+                        self._update_entry_parents(cursor, EntryID.from_bytes(vlob_id), manifest)
+
+                await self.localdb.run_in_thread(_thread_target)
+
+    # Reverse index operations
+
+    @staticmethod
+    def _update_entry_parents(
+        cursor: Cursor, entry_id: EntryID, manifest: AnyLocalManifest | None
+    ) -> None:
+        """This internal helper must run in the database thread."""
+        children = {}
+        if isinstance(manifest, (LocalFolderManifest, LocalWorkspaceManifest)):
+            children = {child_id.bytes: name.str for name, child_id in manifest.children.items()}
+        cursor.execute(
+            "SELECT entry_id, name FROM entry_parents WHERE parent_id = ?", (entry_id.bytes,)
+        )
+        indexed = dict(cursor.fetchall())
+        cursor.executemany(
+            "DELETE FROM entry_parents WHERE entry_id = ? AND parent_id = ?",
+            ((child_id, entry_id.bytes) for child_id in indexed.keys() - children.keys()),
+        )
+        cursor.executemany(
+            "INSERT OR REPLACE INTO entry_parents (entry_id, parent_id, name) VALUES (?, ?, ?)",
+            (
+                (child_id, entry_id.bytes, name)
+                for child_id, name in children.items()
+                if indexed.get(child_id) != name
+            ),
+        )
+
+    async def get_entry_parents(
+        self, entry_ids: Iterable[EntryID]
+    ) -> Dict[EntryID, Tuple[EntryID, EntryName]]:
+        """Return the parent entry id and the name of the given entries.
+
+        Entries that are not referenced by any folderish manifest available
+        locally are omitted.
+
+        Raises: Nothing !
+        """
+        entry_ids = set(entry_ids)
+        result: Dict[EntryID, Tuple[EntryID, EntryName]] = {}
+
+        # The manifests that are not flushed yet take precedence over the localdb
+        pending_parents = set()
+        for parent_id in self._cache_ahead_of_localdb:
+            manifest = self._cache[parent_id]
+            if not isinstance(manifest, (LocalFolderManifest, LocalWorkspaceManifest)):
+                continue
+            pending_parents.add(parent_id)
+            for name, child_id in manifest.children.items():
+                if child_id in entry_ids:
+                    result[child_id] = (parent_id, name)
+
+        # Look into the database
+        missing = [entry_id.bytes for entry_id in entry_ids - result.keys()]
+        async with self._open_cursor() as cursor:
+            for i in range(0, len(missing), SQLITE_BATCH_SIZE):
+                batch = missing[i : i + SQLITE_BATCH_SIZE]
+                cursor.execute(
+                    "SELECT entry_id, parent_id, name FROM entry_parents "
+                    f"WHERE entry_id IN ({', '.join('?' * len(batch))})",
+                    batch,
+                )
+                for raw_entry_id, raw_parent_id, name in cursor.fetchall():
+                    parent_id = EntryID.from_bytes(raw_parent_id)
+                    # Removed from a parent that is not flushed yet
+                    if parent_id in pending_parents:
+                        continue
+                    result[EntryID.from_bytes(raw_entry_id)] = (parent_id, EntryName(name))
+
+        return result
+
     # "Prevent sync" pattern operations
 
     async def set_prevent_sync_pattern(self, pattern: Regex) -> bool:
@@ -156,6 +397,28 @@ class ManifestStorage:
             (fully_applied,) = reply
             return fully_applied
 
+    # Block size operations
+
+    async def get_blocksize(self) -> int | None:
+        """
+        Raises: Nothing !
+        """
+        async with self._open_cursor() as cursor:
+            cursor.execute("SELECT blocksize FROM blocksize WHERE _id = 0")
+            rep = cursor.fetchone()
+            return rep[0] if rep else None
+
+    async def set_blocksize(self, blocksize: int) -> None:
+        """
+        Raises: Nothing !
+        """
+        async with self._open_cursor() as cursor:
+            cursor.execute(
+                """INSERT OR REPLACE INTO blocksize(_id, blocksize)
+                VALUES (0, ?)""",
+                (blocksize,),
+            )
+
     # Checkpoint operations
 
     async def get_realm_checkpoint(self) -> int:
@@ -215,9 +478,13 @@ class ManifestStorage:
         """
         # Look in cache first
         try:
-            return self._cache[entry_id]
+            manifest = self._cache[entry_id]
         except KeyError:
-            pass
+            self._cache_misses += 1
+        else:
+            self._cache.move_to_end(entry_id)
+            self._cache_hits += 1
+            return manifest
 
         # Look into the database
         async with self._open_cursor() as cursor:
@@ -226,12 +493,16 @@ class ManifestStorage:
 
         # Not found
         if not manifest_row:
+            self.metrics.increment("misses")
             raise FSLocalMissError(entry_id)
+        self.metrics.increment("reads")
+        self.metrics.increment("bytes_read", len(manifest_row[0]))
 
         # Safely fill the cache
         if entry_id not in self._cache:
-            self._cache[entry_id] = local_manifest_decrypt_and_load(
-                manifest_row[0], key=self.device.local_symkey
+            self._set_cache(
+                entry_id,
+                local_manifest_decrypt_and_load(manifest_row[0], key=self.device.local_symkey),
             )
 
         # Always return the cached value
@@ -250,9 +521,9 @@ class ManifestStorage:
         assert isinstance(entry_id, EntryID)
 
         # Set the cache first
-        self._cache[entry_id] = manifest
+        self._set_cache(entry_id, manifest)
 
-        # Tag the entry as ahead of localdb
+        # Tag the entry as ahead of localdb, which also prevents its eviction
         self._cache_ahead_of_localdb.setdefault(entry_id, set())
 
         # Cleanup
@@ -264,27 +535,45 @@ class ManifestStorage:
             await self._ensure_manifest_persistent(entry_id)
 
     async def _ensure_manifest_persistent(self, entry_id: EntryID) -> None:
+        await self._ensure_manifests_persistent([entry_id])
+
+    async def _ensure_manifests_persistent(self, entry_ids: Iterable[EntryID]) -> None:
+        """Write the given manifests to the localdb in a single transaction."""
 
         # Get cursor
         async with self._open_cursor() as cursor:
 
-            # Flushing is not necessary
-            if entry_id not in self._cache_ahead_of_localdb:
+            # Safely get the manifests and other information,
+            # skipping the ones for which flushing is not necessary
+            manifests = {
+                entry_id: self._cache[entry_id]
+                for entry_id in entry_ids
+                if entry_id in self._cache_ahead_of_localdb
+            }
+            if not manifests:
                 return
-
-            # Safely get the manifest and other information
-            manifest = self._cache[entry_id]
-            pending_chunks_ids = [
-                (chunk_id.bytes,) for chunk_id in self._cache_ahead_of_localdb[entry_id]
-            ]
+            pending_chunks: List[Union[ChunkID, BlockID]] = []
+            for entry_id in manifests:
+                pending_chunks += self._cache_ahead_of_localdb[entry_id]
+            pending_chunks_ids = [(chunk_id.bytes,) for chunk_id in pending_chunks]
             local_symkey = self.device.local_symkey
 
-            def _thread_target() -> None:
-                # Dump and decrypt the manifest
-                ciphered = manifest.dump_and_encrypt(local_symkey)
+            def _thread_target() -> int:
+                # Dump and encrypt the manifests
+                rows = [
+                    (
+                        entry_id.bytes,
+                        manifest.dump_and_encrypt(local_symkey),
+                        manifest.need_sync,
+                        manifest.base_version,
+                        manifest.base_version,
+                        entry_id.bytes,
+                    )
+                    for entry_id, manifest in manifests.items()
+                ]
 
                 # Insert into the local database
-                cursor.execute(
+                cursor.executemany(
                     """INSERT OR REPLACE INTO vlobs (vlob_id, blob, need_sync, base_version, remote_version)
                     VALUES (
                     ?, ?, ?, ?,
@@ -293,26 +582,29 @@ class ManifestStorage:
                             IFNULL((SELECT remote_version FROM vlobs WHERE vlob_id=?), 0)
                         )
                     )""",
-                    (
-                        entry_id.bytes,
-                        ciphered,
-                        manifest.need_sync,
-                        manifest.base_version,
-                        manifest.base_version,
-                        entry_id.bytes,
-                    ),
+                    rows,
                 )
 
+                # Update the reverse index
+                for entry_id, manifest in manifests.items():
+                    self._update_entry_parents(cursor, entry_id, manifest)
+
                 # Clean all the pending chunks
                 if pending_chunks_ids:
                     cursor.executemany("DELETE FROM chunks WHERE chunk_id = ?", pending_chunks_ids)
 
+                return sum(len(row[1]) for row in rows)
+
             # Run CPU and IO expensive logic in a thread
-            await self.localdb.run_in_thread(_thread_target)
+            bytes_written = await self.localdb.run_in_thread(_thread_target)
+            self._invalidate_chunk_cache(pending_chunks)
+            self.metrics.increment("writes", len(manifests))
+            self.metrics.increment("bytes_written", bytes_written)
 
-        # Tag entry as up-to-date only if no new manifest has been written in the meantime
-        if manifest == self._cache[entry_id]:
-            self._cache_ahead_of_localdb.pop(entry_id)
+        # Tag entries as up-to-date only if no new manifest has been written in the meantime
+        for entry_id, manifest in manifests.items():
+            if entry_id in self._cache_ahead_of_localdb and manifest == self._cache.get(entry_id):
+                self._cache_ahead_of_localdb.pop(entry_id)
 
     async def ensure_manifest_persistent(self, entry_id: EntryID) -> None:
         """
@@ -324,10 +616,11 @@ class ManifestStorage:
             await self._ensure_manifest_persistent(entry_id)
 
     async def _flush_cache_ahead_of_persistance(self) -> None:
-        # Flush until the all the cache is gone
+        # Flush until the all the cache is gone, by batches to avoid holding
+        # the database for too long
         while self._cache_ahead_of_localdb:
-            entry_id = next(iter(self._cache_ahead_of_localdb))
-            await self._ensure_manifest_persistent(entry_id)
+            entry_ids = list(self._cache_ahead_of_localdb)[:MANIFEST_FLUSH_BATCH_SIZE]
+            await self._ensure_manifests_persistent(entry_ids)
 
     # This method is not used in the code base but it is still tested
     # as it might come handy in a cleanup routine later
@@ -347,12 +640,14 @@ class ManifestStorage:
             cursor.execute("DELETE FROM vlobs WHERE vlob_id = ?", (entry_id.bytes,))
             cursor.execute("SELECT changes()")
             (deleted,) = cursor.fetchone()
+            self._update_entry_parents(cursor, entry_id, None)
 
             # Clean all the pending chunks
             # TODO: should also add the content of the popped manifest
             pending_chunk_ids = self._cache_ahead_of_localdb.pop(entry_id, ())
             for chunk_id in pending_chunk_ids:
                 cursor.execute("DELETE FROM chunks WHERE chunk_id = ?", (chunk_id.bytes,))
+            self._invalidate_chunk_cache(pending_chunk_ids)
 
         # Raise a miss if the entry wasn't found
         if not deleted and not in_cache:
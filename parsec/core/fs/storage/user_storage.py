@@ -3,7 +3,7 @@ from __future__ import annotations
 
 from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import AsyncIterator, Dict, Set, Tuple, cast
+from typing import Any, AsyncIterator, Dict, Set, Tuple, cast
 
 from parsec.core.fs.exceptions import FSLocalMissError
 from parsec.core.fs.storage.local_database import LocalDatabase
@@ -118,6 +118,14 @@ class UserStorage:
         assert self.user_manifest_id == user_manifest.id
         await self.manifest_storage.set_manifest(self.user_manifest_id, user_manifest)
 
+    # Metrics
+
+    def get_storage_metrics(self) -> Dict[str, Any]:
+        return {
+            "data_localdb": self.manifest_storage.localdb.get_metrics(),
+            "manifest_storage": self.manifest_storage.get_metrics(),
+        }
+
     # No vacuuming (used in sync monitor)
 
     async def run_vacuum(self) -> None:
@@ -9,6 +9,7 @@ STORAGE_REVISION = 1
 USER_STORAGE_NAME = f"user_data-v{STORAGE_REVISION}.sqlite"
 WORKSPACE_DATA_STORAGE_NAME = f"workspace_data-v{STORAGE_REVISION}.sqlite"
 WORKSPACE_CACHE_STORAGE_NAME = f"workspace_cache-v{STORAGE_REVISION}.sqlite"
+STORAGE_METRICS_NAME = "storage_metrics.json"
 
 
 def get_user_data_storage_db_path(data_base_dir: Path, device: LocalDevice) -> Path:
@@ -25,3 +26,7 @@ def get_workspace_cache_storage_db_path(
     data_base_dir: Path, device: LocalDevice, workspace_id: EntryID
 ) -> Path:
     return data_base_dir / device.slug / workspace_id.hex / WORKSPACE_CACHE_STORAGE_NAME
+
+
+def get_storage_metrics_path(data_base_dir: Path, device: LocalDevice) -> Path:
+    return data_base_dir / device.slug / STORAGE_METRICS_NAME
@@ -4,15 +4,32 @@ from __future__ import annotations
 from collections import defaultdict
 from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import TYPE_CHECKING, AsyncIterator, Dict, List, NoReturn, Set, Tuple, cast
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Dict,
+    Iterable,
+    List,
+    NoReturn,
+    Sequence,
+    Set,
+    Tuple,
+    cast,
+)
 
 import trio
 from structlog import get_logger
 from trio import lowlevel
 
 from parsec._parsec import DateTime, Regex
-from parsec.core.config import DEFAULT_WORKSPACE_STORAGE_CACHE_SIZE
+from parsec.core.config import (
+    DEFAULT_WORKSPACE_STORAGE_CACHE_SIZE,
+    DEFAULT_WORKSPACE_STORAGE_CHUNK_CACHE_SIZE,
+    DEFAULT_WORKSPACE_STORAGE_MANIFEST_CACHE_SIZE,
+)
 from parsec.core.fs.exceptions import FSError, FSInvalidFileDescriptor, FSLocalMissError
+from parsec.core.fs.storage.chunk_cache import ChunkCache
 from parsec.core.fs.storage.chunk_storage import BlockStorage, ChunkStorage
 from parsec.core.fs.storage.local_database import LocalDatabase
 from parsec.core.fs.storage.manifest_storage import ManifestStorage
@@ -21,9 +38,11 @@ from parsec.core.fs.storage.version import (
     get_workspace_data_storage_db_path,
 )
 from parsec.core.types import (
+    DEFAULT_BLOCK_SIZE,
     BlockID,
     ChunkID,
     EntryID,
+    EntryName,
     FileDescriptor,
     LocalDevice,
     LocalFileManifest,
@@ -34,6 +53,8 @@ from parsec.core.types.manifest import AnyLocalManifest
 logger = get_logger()
 
 DEFAULT_CHUNK_VACUUM_THRESHOLD = 512 * 1024 * 1024
+# Period for writing the manifests kept in memory (e.g. files being written) to the disk
+DEFAULT_MANIFEST_FLUSH_INTERVAL = 30
 
 FAILSAFE_PATTERN_FILTER = Regex.from_regex_str(
     r"^\b$"
@@ -41,7 +62,7 @@ FAILSAFE_PATTERN_FILTER = Regex.from_regex_str(
 
 
 async def workspace_storage_non_speculative_init(
-    data_base_dir: Path, device: LocalDevice, workspace_id: EntryID
+    data_base_dir: Path, device: LocalDevice, workspace_id: EntryID, blocksize: int | None = None
 ) -> None:
     db_path = get_workspace_data_storage_db_path(data_base_dir, device, workspace_id)
 
@@ -56,6 +77,8 @@ async def workspace_storage_non_speculative_init(
                 author=device.device_id, id=workspace_id, timestamp=timestamp, speculative=False
             )
             await manifest_storage.set_manifest(workspace_id, manifest)
+            if blocksize is not None:
+                await manifest_storage.set_blocksize(blocksize)
 
 
 class BaseWorkspaceStorage:
@@ -69,6 +92,7 @@ class BaseWorkspaceStorage:
         workspace_id: EntryID,
         block_storage: ChunkStorage,
         chunk_storage: ChunkStorage,
+        chunk_cache: ChunkCache,
     ):
         self.device = device
         self.device_id = device.device_id
@@ -86,11 +110,18 @@ class BaseWorkspaceStorage:
         self.block_storage = block_storage
         self.chunk_storage = chunk_storage
 
+        # In-memory cache of decrypted chunks, shared by block and chunk storage
+        self.chunk_cache = chunk_cache
+
         # Pattern attributes
         # Set by `_load_prevent_sync_pattern` in WorkspaceStorage.run()
         self._prevent_sync_pattern: Regex
         self._prevent_sync_pattern_fully_applied: bool
 
+        # Block size of the files created in this workspace
+        # Set by `_load_blocksize` in WorkspaceStorage.run()
+        self._blocksize: int = DEFAULT_BLOCK_SIZE
+
     def _get_next_fd(self) -> FileDescriptor:
         self.fd_counter += 1
         return FileDescriptor(self.fd_counter)
@@ -119,6 +150,11 @@ class BaseWorkspaceStorage:
     async def ensure_manifest_persistent(self, entry_id: EntryID) -> None:
         raise NotImplementedError
 
+    async def get_entry_parents(
+        self, entry_ids: Iterable[EntryID]
+    ) -> Dict[EntryID, Tuple[EntryID, EntryName]]:
+        raise NotImplementedError
+
     # Prevent sync pattern interface
 
     async def set_prevent_sync_pattern(self, pattern: Regex) -> None:
@@ -181,33 +217,78 @@ class BaseWorkspaceStorage:
 
     async def set_clean_block(self, block_id: BlockID, block: bytes) -> None:
         assert isinstance(block_id, BlockID)
-        return await self.block_storage.set_chunk(ChunkID.from_block_id(block_id), block)
+        chunk_id = ChunkID.from_block_id(block_id)
+        await self.block_storage.set_chunk(chunk_id, block)
+        self.chunk_cache.set(chunk_id, block)
 
     async def clear_clean_block(self, block_id: BlockID) -> None:
         assert isinstance(block_id, BlockID)
+        chunk_id = ChunkID.from_block_id(block_id)
+        self.chunk_cache.invalidate(chunk_id)
         try:
-            await self.block_storage.clear_chunk(ChunkID.from_block_id(block_id))
+            await self.block_storage.clear_chunk(chunk_id)
         except FSLocalMissError:
             pass
 
     async def get_dirty_block(self, block_id: BlockID) -> bytes:
         return await self.chunk_storage.get_chunk(ChunkID.from_block_id(block_id))
 
+    async def get_dirty_blocks(self, block_ids: Sequence[BlockID]) -> Dict[BlockID, bytes]:
+        """Missing blocks are omitted from the result"""
+        chunk_to_block_ids = {ChunkID.from_block_id(block_id): block_id for block_id in block_ids}
+        chunks = await self.chunk_storage.get_chunks(chunk_to_block_ids)
+        return {chunk_to_block_ids[chunk_id]: data for chunk_id, data in chunks.items()}
+
     # Chunk interface
 
     async def get_chunk(self, chunk_id: ChunkID) -> bytes:
         assert isinstance(chunk_id, ChunkID)
+        data = self.chunk_cache.get(chunk_id)
+        if data is not None:
+            return data
         try:
-            return await self.chunk_storage.get_chunk(chunk_id)
+            data = await self.chunk_storage.get_chunk(chunk_id)
         except FSLocalMissError:
-            return await self.block_storage.get_chunk(chunk_id)
+            data = await self.block_storage.get_chunk(chunk_id)
+        self.chunk_cache.set(chunk_id, data)
+        return data
+
+    async def get_chunks(self, chunk_ids: Sequence[ChunkID]) -> Dict[ChunkID, bytes]:
+        """Missing chunks are omitted from the result"""
+        result = {}
+        remaining = []
+        for chunk_id in chunk_ids:
+            data = self.chunk_cache.get(chunk_id)
+            if data is None:
+                remaining.append(chunk_id)
+            else:
+                result[chunk_id] = data
+        if not remaining:
+            return result
+
+        fetched = await self.chunk_storage.get_chunks(remaining)
+        remaining = [chunk_id for chunk_id in remaining if chunk_id not in fetched]
+        if remaining:
+            fetched.update(await self.block_storage.get_chunks(remaining))
+        for chunk_id, data in fetched.items():
+            self.chunk_cache.set(chunk_id, data)
+        result.update(fetched)
+        return result
 
     async def set_chunk(self, chunk_id: ChunkID, block: bytes) -> None:
         assert isinstance(chunk_id, ChunkID)
-        return await self.chunk_storage.set_chunk(chunk_id, block)
+        await self.chunk_storage.set_chunk(chunk_id, block)
+        self.chunk_cache.set(chunk_id, block)
+
+    async def set_chunks(self, items: Iterable[Tuple[ChunkID, bytes]]) -> None:
+        items = list(items)
+        await self.chunk_storage.set_chunks(items)
+        for chunk_id, block in items:
+            self.chunk_cache.set(chunk_id, block)
 
     async def clear_chunk(self, chunk_id: ChunkID, miss_ok: bool = False) -> None:
         assert isinstance(chunk_id, ChunkID)
+        self.chunk_cache.invalidate(chunk_id)
         try:
             await self.chunk_storage.clear_chunk(chunk_id)
         except FSLocalMissError:
@@ -222,6 +303,11 @@ class BaseWorkspaceStorage:
     def get_prevent_sync_pattern_fully_applied(self) -> bool:
         return self._prevent_sync_pattern_fully_applied
 
+    # Block size interface
+
+    def get_blocksize(self) -> int:
+        return self._blocksize
+
     # Timestamped workspace
 
     def to_timestamped(self, timestamp: DateTime) -> "WorkspaceStorageTimestamped":
@@ -246,11 +332,14 @@ class WorkspaceStorage(BaseWorkspaceStorage):
         block_storage: ChunkStorage,
         chunk_storage: ChunkStorage,
         manifest_storage: ManifestStorage,
+        chunk_cache: ChunkCache,
     ):
-        super().__init__(device, workspace_id, block_storage, chunk_storage)
+        super().__init__(device, workspace_id, block_storage, chunk_storage, chunk_cache)
         self.data_localdb = data_localdb
         self.cache_localdb = cache_localdb
         self.manifest_storage = manifest_storage
+        # Manifests must stay in cache while their entry is locked
+        self.manifest_storage.locked_entry_ids = self.locking_tasks
 
     @classmethod
     @asynccontextmanager
@@ -262,6 +351,9 @@ class WorkspaceStorage(BaseWorkspaceStorage):
         prevent_sync_pattern: Regex = FAILSAFE_PATTERN_FILTER,
         cache_size: int = DEFAULT_WORKSPACE_STORAGE_CACHE_SIZE,
         data_vacuum_threshold: int = DEFAULT_CHUNK_VACUUM_THRESHOLD,
+        chunk_cache_size: int = DEFAULT_WORKSPACE_STORAGE_CHUNK_CACHE_SIZE,
+        manifest_cache_size: int = DEFAULT_WORKSPACE_STORAGE_MANIFEST_CACHE_SIZE,
+        manifest_flush_interval: float | None = DEFAULT_MANIFEST_FLUSH_INTERVAL,
     ) -> AsyncIterator["WorkspaceStorage"]:
         data_path = get_workspace_data_storage_db_path(data_base_dir, device, workspace_id)
         cache_path = get_workspace_cache_storage_db_path(data_base_dir, device, workspace_id)
@@ -291,9 +383,18 @@ class WorkspaceStorage(BaseWorkspaceStorage):
                     await block_storage.cleanup()
                     await cache_localdb.run_vacuum()
 
+                    # In-memory chunk cache, also invalidated by the manifest storage
+                    # when the chunks removed from a manifest get deleted
+                    chunk_cache = ChunkCache(chunk_cache_size)
+
                     # Manifest storage service
                     async with ManifestStorage.run(
-                        device, data_localdb, workspace_id
+                        device,
+                        data_localdb,
+                        workspace_id,
+                        chunk_cache=chunk_cache,
+                        cache_max_entries=manifest_cache_size,
+                        flush_interval=manifest_flush_interval,
                     ) as manifest_storage:
 
                         # Chunk storage service
@@ -308,6 +409,7 @@ class WorkspaceStorage(BaseWorkspaceStorage):
                                 block_storage=block_storage,
                                 chunk_storage=chunk_storage,
                                 manifest_storage=manifest_storage,
+                                chunk_cache=chunk_cache,
                             )
 
                             # Populate the cache with the workspace manifest to be able to
@@ -318,6 +420,9 @@ class WorkspaceStorage(BaseWorkspaceStorage):
                             # Load "prevent sync" pattern
                             await instance.set_prevent_sync_pattern(prevent_sync_pattern)
 
+                            # Load the block size chosen when the workspace got created
+                            await instance._load_blocksize()
+
                             # Yield point
                             yield instance
 
@@ -325,6 +430,30 @@ class WorkspaceStorage(BaseWorkspaceStorage):
 
     async def clear_memory_cache(self, flush: bool = True) -> None:
         await self.manifest_storage.clear_memory_cache(flush=flush)
+        self.chunk_cache.clear()
+
+    def get_chunk_cache_stats(self) -> Dict[str, int]:
+        return self.chunk_cache.stats()
+
+    def get_manifest_cache_stats(self) -> Dict[str, int]:
+        return self.manifest_storage.get_cache_stats()
+
+    def get_storage_metrics(self) -> Dict[str, Any]:
+        return {
+            "data_localdb": self.data_localdb.get_metrics(),
+            "cache_localdb": self.cache_localdb.get_metrics(),
+            "manifest_storage": self.manifest_storage.get_metrics(),
+            "chunk_storage": self.chunk_storage.get_metrics(),
+            "block_storage": self.block_storage.get_metrics(),
+            "chunk_cache": self.get_chunk_cache_stats(),
+        }
+
+    # Block size interface
+
+    async def _load_blocksize(self) -> None:
+        blocksize = await self.manifest_storage.get_blocksize()
+        if blocksize is not None:
+            self._blocksize = blocksize
 
     # Checkpoint interface
 
@@ -401,6 +530,11 @@ class WorkspaceStorage(BaseWorkspaceStorage):
         self._check_lock_status(entry_id)
         await self.manifest_storage.ensure_manifest_persistent(entry_id)
 
+    async def get_entry_parents(
+        self, entry_ids: Iterable[EntryID]
+    ) -> Dict[EntryID, Tuple[EntryID, EntryName]]:
+        return await self.manifest_storage.get_entry_parents(entry_ids)
+
     async def clear_manifest(self, entry_id: EntryID) -> None:
         self._check_lock_status(entry_id)
         await self.manifest_storage.clear_manifest(entry_id)
@@ -438,6 +572,8 @@ class WorkspaceStorage(BaseWorkspaceStorage):
     # Vacuum
 
     async def run_vacuum(self) -> None:
+        # Piggyback on the periodic vacuum to persist the block access times
+        await self.block_storage.flush_accessed_on()
         # Only the data storage needs to get vacuumed
         await self.data_localdb.run_vacuum()
 
@@ -468,6 +604,7 @@ class WorkspaceStorageTimestamped(BaseWorkspaceStorage):
             workspace_storage.workspace_id,
             block_storage=workspace_storage.block_storage,
             chunk_storage=workspace_storage.chunk_storage,
+            chunk_cache=workspace_storage.chunk_cache,
         )
 
         self._cache: Dict[EntryID, AnyLocalManifest] = {}
@@ -479,10 +616,14 @@ class WorkspaceStorageTimestamped(BaseWorkspaceStorage):
         self._prevent_sync_pattern_fully_applied = (
             workspace_storage._prevent_sync_pattern_fully_applied
         )
+        self._blocksize = workspace_storage._blocksize
 
     async def set_chunk(self, chunk_id: ChunkID, block: bytes) -> NoReturn:
         self._throw_permission_error()
 
+    async def set_chunks(self, items: Iterable[Tuple[ChunkID, bytes]]) -> NoReturn:
+        self._throw_permission_error()
+
     async def clear_chunk(self, chunk_id: ChunkID, miss_ok: bool = False) -> NoReturn:
         self._throw_permission_error()
 
@@ -542,5 +683,11 @@ class WorkspaceStorageTimestamped(BaseWorkspaceStorage):
     async def ensure_manifest_persistent(self, entry_id: EntryID) -> None:
         pass
 
+    async def get_entry_parents(
+        self, entry_ids: Iterable[EntryID]
+    ) -> Dict[EntryID, Tuple[EntryID, EntryName]]:
+        # Timestamped manifests are not indexed
+        return {}
+
     # def to_timestamped(self, timestamp: DateTime) -> "WorkspaceStorageTimestamped":
     #     return WorkspaceStorageTimestamped(self, timestamp)
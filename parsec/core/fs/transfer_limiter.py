@@ -0,0 +1,136 @@
+# Parsec Cloud (https://parsec.cloud) Copyright (c) AGPL-3.0 2016-present Scille SAS
+from __future__ import annotations
+
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+import trio
+
+from parsec.core.fs.exceptions import (
+    FSBackendOfflineError,
+    FSServerUploadTemporarilyUnavailableError,
+)
+
+__all__ = ("BlockTransferLimiter", "DEFAULT_BLOCK_TRANSFER_MAX_CONCURRENCY")
+
+
+DEFAULT_BLOCK_TRANSFER_MAX_CONCURRENCY = 4
+# Initial number of concurrent transfers before any feedback is available
+BLOCK_TRANSFER_INITIAL_CONCURRENCY = 4
+# A window whose throughput dropped below this ratio of the best one...
+THROUGHPUT_DROP_RATIO = 0.8
+# ...while its latency grew above this ratio is considered congested
+LATENCY_GROWTH_RATIO = 1.25
+
+
+class BlockTransferLimiter:
+    """AIMD controller bounding the number of concurrent block transfers.
+
+    The limit is increased by one each time a full window of transfers (i.e. as
+    many transfers as the current limit) completes without congestion, and is
+    halved on congestion. Congestion is either explicit (the server reports a
+    timeout or the backend is unreachable) or inferred when a window shows a
+    lower throughput and a higher latency than the best window since the last
+    decrease, meaning the extra transfers only added queueing delay. Transfers
+    that were already in flight when the limit got decreased are not taken into
+    account.
+
+    Throughput is computed over the time spent with at least one transfer in
+    flight, so idle periods between two synchronizations are not accounted for.
+    """
+
+    def __init__(self, max_concurrency: int = DEFAULT_BLOCK_TRANSFER_MAX_CONCURRENCY):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.max_concurrency = max_concurrency
+        self._limiter = trio.CapacityLimiter(
+            min(BLOCK_TRANSFER_INITIAL_CONCURRENCY, max_concurrency)
+        )
+        # Busy time tracking
+        self._in_flight = 0
+        self._busy_since = 0.0
+        # Current window
+        self._window_busy_time = 0.0
+        self._window_transfers = 0
+        self._window_bytes = 0
+        self._window_latency = 0.0
+        self._decreased_on = float("-inf")
+        # Best window since the last decrease
+        self._best_throughput: float | None = None
+        self._best_latency: float | None = None
+
+    @property
+    def limit(self) -> int:
+        return int(self._limiter.total_tokens)
+
+    def _set_limit(self, limit: int) -> None:
+        self._limiter.total_tokens = max(1, min(limit, self.max_concurrency))
+
+    def _reset_window(self) -> None:
+        self._window_busy_time = 0.0
+        self._window_transfers = 0
+        self._window_bytes = 0
+        self._window_latency = 0.0
+        if self._in_flight:
+            self._busy_since = trio.current_time()
+
+    def on_congestion(self, started_on: float | None = None) -> None:
+        # The limit has already been decreased since this transfer started
+        if started_on is not None and started_on <= self._decreased_on:
+            return
+        self._decreased_on = trio.current_time()
+        self._set_limit(self.limit // 2)
+        self._best_throughput = None
+        self._best_latency = None
+        self._reset_window()
+
+    def on_success(self, started_on: float, size: int) -> None:
+        # This transfer has been measured against a previous limit
+        if started_on <= self._decreased_on:
+            return
+        latency = trio.current_time() - started_on
+        self._window_transfers += 1
+        self._window_bytes += size
+        self._window_latency += latency
+        if self._window_transfers < self.limit:
+            return
+
+        # Window is complete, compare it with the best one
+        busy_time = self._window_busy_time
+        if self._in_flight:
+            busy_time += trio.current_time() - self._busy_since
+        latency = self._window_latency / self._window_transfers
+        if busy_time > 0:
+            throughput = self._window_bytes / busy_time
+            if self._best_throughput is None or throughput > self._best_throughput:
+                self._best_throughput = throughput
+                self._best_latency = latency
+            elif (
+                self._best_latency is not None
+                and throughput < self._best_throughput * THROUGHPUT_DROP_RATIO
+                and latency > self._best_latency * LATENCY_GROWTH_RATIO
+            ):
+                self.on_congestion()
+                return
+
+        self._set_limit(self.limit + 1)
+        self._reset_window()
+
+    @asynccontextmanager
+    async def transfer(self, size: int) -> AsyncIterator[None]:
+        async with self._limiter:
+            if not self._in_flight:
+                self._busy_since = trio.current_time()
+            self._in_flight += 1
+            started_on = trio.current_time()
+            try:
+                yield
+            except (FSBackendOfflineError, FSServerUploadTemporarilyUnavailableError):
+                self.on_congestion(started_on)
+                raise
+            else:
+                self.on_success(started_on, size)
+            finally:
+                self._in_flight -= 1
+                if not self._in_flight:
+                    self._window_busy_time += trio.current_time() - self._busy_since
@@ -5,6 +5,7 @@ from contextlib import asynccontextmanager
 from pathlib import Path
 from typing import (
     TYPE_CHECKING,
+    Any,
     AsyncIterator,
     Dict,
     List,
@@ -86,7 +87,12 @@ from parsec.api.protocol import DeviceID, MaintenanceType, RealmID, UserID, Vlob
 
 # TODO: handle exceptions status...
 from parsec.core.backend_connection import BackendConnectionError, BackendNotAvailable
-from parsec.core.config import DEFAULT_WORKSPACE_STORAGE_CACHE_SIZE
+from parsec.core.config import (
+    DEFAULT_WORKSPACE_READ_AHEAD_WINDOW,
+    DEFAULT_WORKSPACE_STORAGE_CACHE_SIZE,
+    DEFAULT_WORKSPACE_STORAGE_CHUNK_CACHE_SIZE,
+    DEFAULT_WORKSPACE_STORAGE_MANIFEST_CACHE_SIZE,
+)
 from parsec.core.fs.exceptions import (
     FSBackendOfflineError,
     FSError,
@@ -109,10 +115,16 @@ from parsec.core.fs.storage import (
     WorkspaceStorage,
     workspace_storage_non_speculative_init,
 )
+from parsec.core.fs.transfer_limiter import (
+    DEFAULT_BLOCK_TRANSFER_MAX_CONCURRENCY,
+    BlockTransferLimiter,
+)
 from parsec.core.fs.userfs.merging import merge_local_user_manifests, merge_workspace_entry
 from parsec.core.fs.workspacefs import WorkspaceFS
 from parsec.core.remote_devices_manager import RemoteDevicesManager
 from parsec.core.types import (
+    MAX_BLOCK_SIZE,
+    MIN_BLOCK_SIZE,
     EntryID,
     EntryName,
     LocalDevice,
@@ -274,6 +286,10 @@ class UserFS:
         prevent_sync_pattern: Regex,
         preferred_language: str,
         workspace_storage_cache_size: int,
+        workspace_storage_chunk_cache_size: int,
+        workspace_storage_manifest_cache_size: int,
+        workspace_read_ahead_window: int,
+        block_transfer_max_concurrency: int,
     ):
         self.data_base_dir = data_base_dir
         self.device = device
@@ -283,6 +299,11 @@ class UserFS:
         self.prevent_sync_pattern = prevent_sync_pattern
         self.preferred_language = preferred_language
         self.workspace_storage_cache_size = workspace_storage_cache_size
+        self.workspace_storage_chunk_cache_size = workspace_storage_chunk_cache_size
+        self.workspace_storage_manifest_cache_size = workspace_storage_manifest_cache_size
+        self.workspace_read_ahead_window = workspace_read_ahead_window
+        # Shared by all the workspaces given they use the same backend connection
+        self.block_transfer_limiter = BlockTransferLimiter(block_transfer_max_concurrency)
 
         self.storage: UserStorage  # Setup by UserStorage.run factory
 
@@ -330,6 +351,10 @@ class UserFS:
         prevent_sync_pattern: Regex,
         preferred_language: str | None = None,
         workspace_storage_cache_size: int = DEFAULT_WORKSPACE_STORAGE_CACHE_SIZE,
+        workspace_storage_chunk_cache_size: int = DEFAULT_WORKSPACE_STORAGE_CHUNK_CACHE_SIZE,
+        workspace_storage_manifest_cache_size: int = DEFAULT_WORKSPACE_STORAGE_MANIFEST_CACHE_SIZE,
+        workspace_read_ahead_window: int = DEFAULT_WORKSPACE_READ_AHEAD_WINDOW,
+        block_transfer_max_concurrency: int = DEFAULT_BLOCK_TRANSFER_MAX_CONCURRENCY,
     ) -> AsyncIterator[UserFSTypeVar]:
         if preferred_language is None:
             preferred_language = "en"
@@ -342,6 +367,10 @@ class UserFS:
             prevent_sync_pattern,
             preferred_language,
             workspace_storage_cache_size,
+            workspace_storage_chunk_cache_size,
+            workspace_storage_manifest_cache_size,
+            workspace_read_ahead_window,
+            block_transfer_max_concurrency,
         )
 
         # Run user storage
@@ -389,6 +418,18 @@ class UserFS:
 
         await self.storage.set_user_manifest(manifest)
 
+    def get_storage_metrics(self) -> Dict[str, Any]:
+        """
+        Raises: ValueError
+        """
+        if self.storage is None:
+            raise ValueError("Storage not set")
+        workspaces = {}
+        for workspace_id, workspace in self._workspaces.items():
+            if isinstance(workspace.local_storage, WorkspaceStorage):
+                workspaces[workspace_id.hex] = workspace.local_storage.get_storage_metrics()
+        return {"user": self.storage.get_storage_metrics(), "workspaces": workspaces}
+
     async def _instantiate_workspace(self, workspace_id: EntryID) -> WorkspaceFS:
         # Workspace entry can change at any time, so we provide a way for
         # WorkspaceFS to load it each time it is needed
@@ -428,6 +469,8 @@ class UserFS:
                 device=self.device,
                 workspace_id=workspace_id,
                 cache_size=self.workspace_storage_cache_size,
+                chunk_cache_size=self.workspace_storage_chunk_cache_size,
+                manifest_cache_size=self.workspace_storage_manifest_cache_size,
                 prevent_sync_pattern=self.prevent_sync_pattern,
             ) as workspace_storage:
                 task_status.started(workspace_storage)
@@ -446,6 +489,9 @@ class UserFS:
             event_bus=self.event_bus,
             remote_devices_manager=self.remote_devices_manager,
             preferred_language=self.preferred_language,
+            read_ahead_window=self.workspace_read_ahead_window,
+            read_ahead_nursery=self._workspace_storage_nursery,
+            transfer_limiter=self.block_transfer_limiter,
         )
 
         # Apply the current "prevent sync" pattern
@@ -482,8 +528,20 @@ class UserFS:
 
         return workspace
 
-    async def workspace_create(self, name: EntryName) -> EntryID:
+    async def workspace_create(self, name: EntryName, blocksize: int | None = None) -> EntryID:
+        """
+        `blocksize` is the size of the blocks the files created in this workspace
+        get split into (defaults to `DEFAULT_BLOCK_SIZE`), larger blocks mean less
+        round-trips to the server for bulk data.
+
+        Raises:
+            ValueError: if `blocksize` is not within `MIN_BLOCK_SIZE` and `MAX_BLOCK_SIZE`
+        """
         assert isinstance(name, EntryName)
+        if blocksize is not None and not MIN_BLOCK_SIZE <= blocksize <= MAX_BLOCK_SIZE:
+            raise ValueError(
+                f"blocksize must be between {MIN_BLOCK_SIZE} and {MAX_BLOCK_SIZE} bytes"
+            )
 
         async with self._update_user_manifest_lock:
             timestamp = self.device.timestamp()
@@ -510,6 +568,7 @@ class UserFS:
                 data_base_dir=self.data_base_dir,
                 device=self.device,
                 workspace_id=workspace_entry.id,
+                blocksize=blocksize,
             )
             await self.set_user_manifest(user_manifest)
             self.event_bus.send(CoreEvent.FS_ENTRY_UPDATED, id=self.user_manifest_id)
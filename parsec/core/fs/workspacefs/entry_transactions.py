@@ -34,6 +34,9 @@ from parsec.core.types import (
 
 WRITE_RIGHT_ROLES = (WorkspaceRole.OWNER, WorkspaceRole.MANAGER, WorkspaceRole.CONTRIBUTOR)
 
+# Maximum number of resolved paths kept in memory
+PATH_CACHE_MAX_SIZE = 4096
+
 
 class BlockInfo(NamedTuple):
     local_and_remote_blocks: List[BlockAccess | None]
@@ -86,6 +89,22 @@ class EntryTransactions(FileTransactions):
         async with self._load_and_lock_manifest(entry_id) as manifest:
             return manifest
 
+    def _invalidate_path_cache(self, path: FsPath | None = None) -> None:
+        """Forget the resolution of the given path and its descendants.
+
+        Without path, the whole cache is cleared. This is required when a
+        folderish manifest is modified without knowing its path (e.g. when
+        applying remote changes).
+        """
+        self._path_cache_generation += 1
+        if path is None:
+            self._path_cache.clear()
+            return
+        parts = path.parts
+        for cached_parts in list(self._path_cache):
+            if cached_parts[: len(parts)] == parts:
+                del self._path_cache[cached_parts]
+
     async def _entry_id_from_path(self, path: FsPath) -> Tuple[EntryID, EntryID | None]:
         """Returns a tuple (entry_id, confinement_point).
 
@@ -94,6 +113,25 @@ class EntryTransactions(FileTransactions):
 
         If the entry is not confined, the confinement point is `None`.
         """
+        # Cache lookup
+        try:
+            result = self._path_cache[path.parts]
+        except KeyError:
+            pass
+        else:
+            self._path_cache.move_to_end(path.parts)
+            return result
+
+        # Changes occurring during the resolution must prevent its caching
+        generation = self._path_cache_generation
+        result = await self._resolve_entry_id_from_path(path)
+        if generation == self._path_cache_generation:
+            self._path_cache[path.parts] = result
+            if len(self._path_cache) > PATH_CACHE_MAX_SIZE:
+                self._path_cache.popitem(last=False)
+        return result
+
+    async def _resolve_entry_id_from_path(self, path: FsPath) -> Tuple[EntryID, EntryID | None]:
         # Root entry_id and manifest
         entry_id = self.workspace_id
         confinement_point = None
@@ -314,6 +352,8 @@ class EntryTransactions(FileTransactions):
 
             # Atomic change
             await self.local_storage.set_manifest(parent.id, new_parent)
+            self._invalidate_path_cache(source)
+            self._invalidate_path_cache(destination)
 
         # Send event
         self._send_event(CoreEvent.FS_ENTRY_UPDATED, id=parent.id)
@@ -349,6 +389,7 @@ class EntryTransactions(FileTransactions):
 
             # Atomic change
             await self.local_storage.set_manifest(parent.id, new_parent)
+            self._invalidate_path_cache(path)
 
         # Send event
         self._send_event(CoreEvent.FS_ENTRY_UPDATED, id=parent.id)
@@ -380,6 +421,7 @@ class EntryTransactions(FileTransactions):
 
             # Atomic change
             await self.local_storage.set_manifest(parent.id, new_parent)
+            self._invalidate_path_cache(path)
 
         # Send event
         self._send_event(CoreEvent.FS_ENTRY_UPDATED, id=parent.id)
@@ -438,7 +480,10 @@ class EntryTransactions(FileTransactions):
             # Create file
             timestamp = self.device.timestamp()
             child = LocalFileManifest.new_placeholder(
-                self.local_author, parent=parent.id, timestamp=timestamp
+                self.local_author,
+                parent=parent.id,
+                timestamp=timestamp,
+                blocksize=self.local_storage.get_blocksize(),
             )
 
             # New parent manifest
@@ -460,6 +505,65 @@ class EntryTransactions(FileTransactions):
         # Return the entry id of the created file and the file descriptor
         return child.id, fd
 
+    async def file_copy(
+        self, source: FsPath, destination: FsPath, exist_ok: bool = False
+    ) -> EntryID | None:
+        """Copy a file by reusing the blocks of the source manifest.
+
+        This is only possible if the source is fully synchronized, i.e. all its
+        blocks are available in the realm. Otherwise `None` is returned and the
+        copy has to be performed by reading and writing the data.
+        """
+        # Check read and write rights
+        self.check_read_rights(source)
+        self.check_write_rights(destination)
+
+        # Fetch the source manifest
+        source_manifest, _ = await self._get_manifest_from_path(source)
+        if not isinstance(source_manifest, LocalFileManifest):
+            raise FSIsADirectoryError(filename=source)
+        if source_manifest.need_sync:
+            return None
+
+        # Lock parent in write mode
+        async with self._lock_parent_manifest_from_path(destination) as (parent, child):
+
+            # Destination already exists, let the caller overwrite it
+            if child is not None:
+                if not exist_ok:
+                    raise FSFileExistsError(filename=destination)
+                return None
+
+            # Create file, sharing the source blocks
+            timestamp = self.device.timestamp()
+            child = LocalFileManifest.new_placeholder(
+                self.local_author,
+                parent=parent.id,
+                timestamp=timestamp,
+                blocksize=source_manifest.blocksize,
+            )
+            child = child.evolve_and_mark_updated(
+                timestamp=timestamp, size=source_manifest.size, blocks=source_manifest.blocks
+            )
+
+            # New parent manifest
+            new_parent = parent.evolve_children_and_mark_updated(
+                {destination.name: child.id},
+                prevent_sync_pattern=self.local_storage.get_prevent_sync_pattern(),
+                timestamp=self.device.timestamp(),
+            )
+
+            # ~ Atomic change
+            await self.local_storage.set_manifest(child.id, child, check_lock_status=False)
+            await self.local_storage.set_manifest(parent.id, new_parent)
+
+        # Send events
+        self._send_event(CoreEvent.FS_ENTRY_UPDATED, id=parent.id)
+        self._send_event(CoreEvent.FS_ENTRY_UPDATED, id=child.id)
+
+        # Return the entry id of the created file
+        return child.id
+
     async def file_open(self, path: FsPath, write_mode: bool) -> Tuple[EntryID, FileDescriptor]:
         # Check read and write rights
         if write_mode:
@@ -1,14 +1,24 @@
 # Parsec Cloud (https://parsec.cloud) Copyright (c) AGPL-3.0 2016-present Scille SAS
 from __future__ import annotations
 
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
 from contextlib import asynccontextmanager
-from typing import AsyncIterator, Callable, Dict, List, Tuple, cast
+from typing import AsyncIterator, Callable, Dict, Iterable, List, Set, Tuple, cast
+
+import attr
+import trio
+from structlog import get_logger
 
 from parsec._parsec import CoreEvent
 from parsec.api.data import BlockAccess
 from parsec.api.protocol import DeviceID
-from parsec.core.fs.exceptions import FSEndOfFileError, FSInvalidFileDescriptor, FSLocalMissError
+from parsec.core.fs.exceptions import (
+    FSEndOfFileError,
+    FSError,
+    FSInvalidFileDescriptor,
+    FSLocalMissError,
+    FSLocalStorageClosedError,
+)
 from parsec.core.fs.remote_loader import RemoteLoader
 from parsec.core.fs.storage import BaseWorkspaceStorage
 from parsec.core.fs.workspacefs.file_operations import (
@@ -18,8 +28,11 @@ from parsec.core.fs.workspacefs.file_operations import (
     prepare_write,
 )
 from parsec.core.types import (
+    BlockID,
     Chunk,
+    ChunkID,
     EntryID,
+    EntryName,
     FileDescriptor,
     LocalDevice,
     LocalFileManifest,
@@ -29,9 +42,12 @@ from parsec.core.types import (
     WorkspaceEntry,
 )
 from parsec.event_bus import EventBus
+from parsec.utils import open_service_nursery
 
 __all__ = ("FSInvalidFileDescriptor", "FileTransactions")
 
+logger = get_logger()
+
 
 # Helpers
 
@@ -53,6 +69,21 @@ def padded_data(data: bytes, start: int, stop: int) -> bytes:
     return b"\x00" * (0 - start) + data[0:stop]
 
 
+@attr.s(slots=True, auto_attribs=True)
+class ReadAheadState:
+    """Access pattern of a file descriptor, used to detect sequential reads."""
+
+    next_offset: int = 0
+    prefetched_until: int = 0
+    cancel_scopes: Set[trio.CancelScope] = attr.ib(factory=set)
+
+    def cancel(self) -> None:
+        for cancel_scope in self.cancel_scopes:
+            cancel_scope.cancel()
+        self.cancel_scopes.clear()
+        self.prefetched_until = 0
+
+
 class FileTransactions:
     """A stateless class to centralize all file transactions.
 
@@ -73,6 +104,9 @@ class FileTransactions:
     - truncate -> affects file size and possibly file content
     - read     -> no side effect
     - flush    -> no-op
+
+    When a read-ahead nursery is provided, sequential reads on a file descriptor
+    trigger the download of the next `read_ahead_window` blocks in the background.
     """
 
     def __init__(
@@ -84,6 +118,8 @@ class FileTransactions:
         remote_loader: RemoteLoader,
         event_bus: EventBus,
         preferred_language: str,
+        read_ahead_window: int = 0,
+        read_ahead_nursery: trio.Nursery | None = None,
     ):
         self.workspace_id = workspace_id
         self.get_workspace_entry = get_workspace_entry
@@ -94,6 +130,18 @@ class FileTransactions:
         self._write_count: Dict[FileDescriptor, int] = defaultdict(int)
         self.preferred_language = preferred_language
 
+        # Read-ahead structures
+        self.read_ahead_window = read_ahead_window
+        self.read_ahead_nursery = read_ahead_nursery
+        self._read_ahead_states: Dict[FileDescriptor, ReadAheadState] = {}
+        self._prefetching_blocks: Dict[BlockID, trio.Event] = {}
+
+        # Path resolution cache (indexed by path parts), maintained by the entry transactions
+        self._path_cache: OrderedDict[
+            Tuple[EntryName, ...], Tuple[EntryID, EntryID | None]
+        ] = OrderedDict()
+        self._path_cache_generation = 0
+
     @property
     def local_author(self) -> DeviceID:
         return self.device.device_id
@@ -105,34 +153,148 @@ class FileTransactions:
 
     # Helper
 
-    async def _read_chunk(self, chunk: Chunk) -> bytes:
-        data = await self.local_storage.get_chunk(chunk.id)
-        return data[chunk.start - chunk.raw_offset : chunk.stop - chunk.raw_offset]
-
     async def _write_chunk(self, chunk: Chunk, content: bytes, offset: int = 0) -> int:
         data = padded_data(content, offset, offset + chunk.stop - chunk.start)
         await self.local_storage.set_chunk(chunk.id, data)
         return len(data)
 
+    async def _write_chunks(
+        self, write_operations: Iterable[Tuple[Chunk, int]], content: bytes
+    ) -> int:
+        items = [
+            (chunk.id, padded_data(content, offset, offset + chunk.stop - chunk.start))
+            for chunk, offset in write_operations
+        ]
+        await self.local_storage.set_chunks(items)
+        return sum(len(data) for _, data in items)
+
     async def _build_data(self, chunks: Tuple[Chunk, ...]) -> Tuple[bytes, List[BlockAccess]]:
         # Empty array
         if not chunks:
             return bytearray(), []
 
+        # Fetch all the chunks at once
+        datas = await self.local_storage.get_chunks([chunk.id for chunk in chunks])
+
         # Build byte array
         missing = []
         start, stop = chunks[0].start, chunks[-1].stop
         result = bytearray(stop - start)
         for chunk in chunks:
             try:
-                result[chunk.start - start : chunk.stop - start] = await self._read_chunk(chunk)
-            except FSLocalMissError:
+                data = datas[chunk.id]
+            except KeyError:
                 assert chunk.access is not None
                 missing.append(chunk.access)
+                continue
+            result[chunk.start - start : chunk.stop - start] = data[
+                chunk.start - chunk.raw_offset : chunk.stop - chunk.raw_offset
+            ]
 
         # Return byte array
         return result, missing
 
+    # Read-ahead helpers
+
+    def _read_ahead(
+        self, fd: FileDescriptor, manifest: LocalFileManifest, offset: int, size: int
+    ) -> None:
+        if not self.read_ahead_window or self.read_ahead_nursery is None:
+            return
+
+        # Detect the access pattern
+        state = self._read_ahead_states.setdefault(fd, ReadAheadState())
+        sequential = offset == state.next_offset
+        state.next_offset = offset + size
+
+        # Random access, stop prefetching
+        if not sequential:
+            state.cancel()
+            return
+
+        # Prefetch whole blocks past the ones covered by the current read, so
+        # the window only moves forward when a block boundary is crossed
+        blocksize = manifest.blocksize
+        next_block = -(-state.next_offset // blocksize)
+        start = max(next_block * blocksize, state.prefetched_until)
+        stop = min((next_block + self.read_ahead_window) * blocksize, manifest.size)
+        if stop <= start:
+            return
+        state.prefetched_until = stop
+
+        # Only remote blocks can be prefetched
+        accesses = {
+            chunk.access.id: chunk.access
+            for chunk in prepare_read(manifest, stop - start, start)
+            if chunk.access is not None
+        }
+        if not accesses:
+            return
+
+        cancel_scope = trio.CancelScope()
+        state.cancel_scopes.add(cancel_scope)
+        self.read_ahead_nursery.start_soon(
+            self._prefetch_blocks, list(accesses.values()), state, cancel_scope
+        )
+
+    async def _prefetch_blocks(
+        self, accesses: List[BlockAccess], state: ReadAheadState, cancel_scope: trio.CancelScope
+    ) -> None:
+        with cancel_scope:
+            try:
+                await self._download_prefetched_blocks(accesses)
+            # Prefetching is only an optimization, the actual read will deal with the errors
+            except (FSError, FSLocalStorageClosedError) as exc:
+                logger.info("Block prefetching has failed", exc_info=exc)
+        state.cancel_scopes.discard(cancel_scope)
+
+    async def _download_prefetched_blocks(self, accesses: List[BlockAccess]) -> None:
+        # Filter out the blocks that are already available or being downloaded,
+        # the chunk cache is checked first to save the local database queries
+        chunk_ids: Dict[ChunkID, BlockAccess] = {}
+        for access in accesses:
+            chunk_id = ChunkID.from_block_id(access.id)
+            if chunk_id not in self.local_storage.chunk_cache:
+                chunk_ids[chunk_id] = access
+        if not chunk_ids:
+            return
+        local_ids = set(await self.local_storage.get_local_block_ids(list(chunk_ids)))
+        local_ids |= set(await self.local_storage.get_local_chunk_ids(list(chunk_ids)))
+        missing = [
+            access
+            for chunk_id, access in chunk_ids.items()
+            if chunk_id not in local_ids and access.id not in self._prefetching_blocks
+        ]
+        if not missing:
+            return
+
+        # Register the downloads so concurrent reads can wait for them
+        events = {access.id: trio.Event() for access in missing}
+        self._prefetching_blocks.update(events)
+        try:
+            async with open_service_nursery() as nursery:
+                async with await self.remote_loader.receive_load_blocks(
+                    missing, nursery
+                ) as receive_channel:
+                    async for access in receive_channel:
+                        del self._prefetching_blocks[access.id]
+                        events.pop(access.id).set()
+        finally:
+            for block_id, event in events.items():
+                del self._prefetching_blocks[block_id]
+                event.set()
+
+    async def _load_blocks(self, accesses: List[BlockAccess]) -> None:
+        # Wait for the blocks being prefetched instead of downloading them twice
+        to_load = []
+        for access in accesses:
+            event = self._prefetching_blocks.get(access.id)
+            if event is None:
+                to_load.append(access)
+            else:
+                await event.wait()
+        await self.remote_loader.load_blocks(to_load)
+
     # Locking helper
 
     @asynccontextmanager
@@ -208,6 +370,11 @@ class FileTransactions:
             # Clear write count
             self._write_count.pop(fd, None)
 
+            # Stop prefetching
+            state = self._read_ahead_states.pop(fd, None)
+            if state is not None:
+                state.cancel()
+
     async def fd_write(
         self, fd: FileDescriptor, content: bytes, offset: int, constrained: bool = False
     ) -> int:
@@ -232,8 +399,7 @@ class FileTransactions:
             )
 
             # Writing
-            for chunk, offset in write_operations:
-                self._write_count[fd] += await self._write_chunk(chunk, content, offset)
+            self._write_count[fd] += await self._write_chunks(write_operations, content)
 
             # Atomic change
             await self.local_storage.set_manifest(
@@ -268,10 +434,11 @@ class FileTransactions:
     ) -> bytes:
         # Loop over attempts
         missing: List[BlockAccess] = []
+        first_attempt = True
         while True:
 
             # Load missing blocks
-            await self.remote_loader.load_blocks(missing)
+            await self._load_blocks(missing)
 
             # Fetch and lock
             async with self._load_and_lock_file(fd) as manifest:
@@ -288,6 +455,11 @@ class FileTransactions:
                 if offset > manifest.size:
                     return b""
 
+                # Detect sequential access and prefetch the next blocks
+                if first_attempt:
+                    first_attempt = False
+                    self._read_ahead(fd, manifest, offset, min(size, manifest.size - offset))
+
                 # Prepare
                 chunks = prepare_read(manifest, size, offset)
                 data, missing = await self._build_data(chunks)
@@ -316,8 +488,7 @@ class FileTransactions:
         manifest, write_operations, removed_ids = prepare_resize(manifest, length, updated)
 
         # Writing
-        for chunk, offset in write_operations:
-            await self._write_chunk(chunk, b"", offset)
+        await self._write_chunks(write_operations, b"")
 
         # Atomic change
         await self.local_storage.set_manifest(
@@ -343,8 +514,26 @@ class FileTransactions:
                 missing += extra_missing
                 continue
 
-            # Write data if necessary
+            # Reuse an identical block already available in the realm
             new_chunk = destination.evolve_as_block(data)
+            digest = cast(BlockAccess, new_chunk.access).digest
+            known_access = self.remote_loader.get_known_block(digest)
+            if known_access is not None and known_access.size == new_chunk.stop - new_chunk.start:
+                new_chunk = Chunk.from_block_access(
+                    BlockAccess(
+                        known_access.id,
+                        known_access.key,
+                        destination.start,
+                        known_access.size,
+                        known_access.digest,
+                    )
+                )
+                # The data of the pseudo-block is not needed anymore
+                if not write_back:
+                    removed_ids = removed_ids | {destination.id}
+                write_back = False
+
+            # Write data if necessary
             if write_back:
                 await self._write_chunk(new_chunk, data)
 
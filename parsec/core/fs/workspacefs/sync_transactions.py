@@ -189,6 +189,19 @@ def merge_folder_children(
     return children
 
 
+def _children_changed(
+    local_manifest: AnyLocalManifest, new_local_manifest: AnyLocalManifest
+) -> bool:
+    if not isinstance(local_manifest, (LocalFolderManifest, LocalWorkspaceManifest)):
+        return False
+    if not isinstance(new_local_manifest, (LocalFolderManifest, LocalWorkspaceManifest)):
+        return False
+    return (
+        local_manifest.children != new_local_manifest.children
+        or local_manifest.local_confinement_points != new_local_manifest.local_confinement_points
+    )
+
+
 def merge_manifests(
     local_author: DeviceID,
     timestamp: DateTime,
@@ -337,6 +350,7 @@ class SyncTransactions(EntryTransactions):
             # Set the new base manifest
             if new_local_manifest != local_manifest:
                 await self.local_storage.set_manifest(entry_id, new_local_manifest)
+                self._invalidate_path_cache()
 
     async def synchronization_step(
         self,
@@ -412,6 +426,9 @@ class SyncTransactions(EntryTransactions):
             # Set the new base manifest
             if new_local_manifest != local_manifest:
                 await self.local_storage.set_manifest(entry_id, new_local_manifest)
+                # Remote changes may have added, removed or renamed children
+                if _children_changed(local_manifest, new_local_manifest):
+                    self._invalidate_path_cache()
 
             # Send downsynced event
             if base_version != new_base_version and remote_author != self.local_author:
@@ -504,7 +521,10 @@ class SyncTransactions(EntryTransactions):
                     preferred_language=self.preferred_language,
                 )
                 new_manifest = LocalFileManifest.new_placeholder(
-                    self.local_author, parent=parent_id, timestamp=timestamp
+                    self.local_author,
+                    parent=parent_id,
+                    timestamp=timestamp,
+                    blocksize=current_manifest.blocksize,
                 ).evolve(size=current_manifest.size, blocks=tuple(new_blocks))
                 timestamp = self.device.timestamp()
                 new_parent_manifest = parent_manifest.evolve_children_and_mark_updated(
@@ -2,7 +2,17 @@
 from __future__ import annotations
 
 from collections import defaultdict
-from typing import TYPE_CHECKING, AsyncIterator, Awaitable, Callable, Dict, List, Tuple, cast
+from typing import (
+    TYPE_CHECKING,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Tuple,
+    cast,
+)
 
 import attr
 import structlog
@@ -18,6 +28,7 @@ from parsec.core.fs.exceptions import (
     FSBackendOfflineError,
     FSError,
     FSFileConflictError,
+    FSFileNotFoundError,
     FSInvalidArgumentError,
     FSLocalMissError,
     FSNoSynchronizationRequired,
@@ -33,13 +44,13 @@ from parsec.core.fs.exceptions import (
 from parsec.core.fs.path import AnyPath, FsPath
 from parsec.core.fs.remote_loader import RemoteLoader
 from parsec.core.fs.storage import BaseWorkspaceStorage
+from parsec.core.fs.transfer_limiter import BlockTransferLimiter
 from parsec.core.fs.workspacefs.entry_transactions import BlockInfo
 from parsec.core.fs.workspacefs.sync_transactions import SyncTransactions
 from parsec.core.fs.workspacefs.versioning_helpers import VersionLister
 from parsec.core.fs.workspacefs.workspacefile import WorkspaceFile
 from parsec.core.remote_devices_manager import RemoteDevicesManager
 from parsec.core.types import (
-    DEFAULT_BLOCK_SIZE,
     BackendOrganizationFileLinkAddr,
     EntryID,
     EntryName,
@@ -55,6 +66,7 @@ from parsec.core.types import (
 )
 from parsec.crypto import CryptoError
 from parsec.event_bus import EventBus
+from parsec.utils import open_service_nursery
 
 if TYPE_CHECKING:
     from parsec.core.backend_connection import BackendAuthenticatedCmds
@@ -62,6 +74,9 @@ if TYPE_CHECKING:
 
 logger = structlog.get_logger()
 
+# Maximum number of placeholder children synchronized at the same time
+SYNC_PLACEHOLDERS_MAX_CONCURRENCY = 8
+
 
 @attr.s(slots=True, frozen=True, auto_attribs=True)
 class ReencryptionNeed:
@@ -86,6 +101,9 @@ class WorkspaceFS:
         event_bus: EventBus,
         remote_devices_manager: RemoteDevicesManager,
         preferred_language: str = "en",
+        read_ahead_window: int = 0,
+        read_ahead_nursery: trio.Nursery | None = None,
+        transfer_limiter: BlockTransferLimiter | None = None,
     ):
         self.workspace_id = workspace_id
         self.get_workspace_entry = get_workspace_entry
@@ -105,6 +123,7 @@ class WorkspaceFS:
             self.backend_cmds,
             self.remote_devices_manager,
             self.local_storage,
+            transfer_limiter=transfer_limiter,
         )
         self.transactions = SyncTransactions(
             self.workspace_id,
@@ -114,6 +133,8 @@ class WorkspaceFS:
             self.remote_loader,
             self.event_bus,
             self.preferred_language,
+            read_ahead_window=read_ahead_window,
+            read_ahead_nursery=read_ahead_nursery,
         )
 
     def __repr__(self) -> str:
@@ -511,15 +532,28 @@ class WorkspaceFS:
         source_path: AnyPath,
         target_path: AnyPath,
         source_workspace: WorkspaceFS | None = None,
-        buffer_size: int = DEFAULT_BLOCK_SIZE,
+        buffer_size: int | None = None,
         exist_ok: bool = False,
     ) -> None:
         """
+        `buffer_size` defaults to the block size of the workspace.
+
         Raises:
             FSError
         """
 
         source_workspace = source_workspace or self
+        if buffer_size is None:
+            buffer_size = self.local_storage.get_blocksize()
+
+        # Blocks are bound to the realm, hence they can only be reused within the same workspace
+        if source_workspace is self:
+            entry_id = await self.transactions.file_copy(
+                FsPath(source_path), FsPath(target_path), exist_ok=exist_ok
+            )
+            if entry_id is not None:
+                return
+
         write_mode = "wb" if exist_ok else "xb"
         async with await source_workspace.open_file(source_path, mode="rb") as source:
             async with await self.open_file(target_path, mode=write_mode) as target:
@@ -545,8 +579,18 @@ class WorkspaceFS:
     # Sync helpers
 
     async def _synchronize_placeholders(self, manifest: RemoteFolderishManifests) -> None:
-        async for child in self.transactions.get_placeholder_children(manifest):
-            await self.minimal_sync(child)
+        children = [child async for child in self.transactions.get_placeholder_children(manifest)]
+        children_iter = iter(children)
+
+        async def _syncer() -> None:
+            for child in children_iter:
+                await self.minimal_sync(child)
+
+        # Children are synchronized concurrently so their vlob requests
+        # get pipelined over the backend connection
+        async with open_service_nursery() as nursery:
+            for _ in range(min(SYNC_PLACEHOLDERS_MAX_CONCURRENCY, len(children))):
+                nursery.start_soon(_syncer)
 
     async def _upload_blocks(self, manifest: RemoteFileManifest) -> None:
         await self.remote_loader.upload_blocks(list(manifest.blocks))
@@ -590,9 +634,53 @@ class WorkspaceFS:
         except FSLocalMissError:
             pass
 
+    async def entry_ids_to_paths(self, entry_ids: Iterable[EntryID]) -> Dict[EntryID, FsPath]:
+        """Resolve the paths of the given entries by walking up the parents index.
+
+        Entries that cannot be resolved from the local data (i.e. one of their
+        ancestors is not available locally) are omitted.
+        """
+        entry_ids = list(entry_ids)
+
+        # Fetch the parents level by level, for all the entries at once
+        parents: Dict[EntryID, Tuple[EntryID, EntryName]] = {}
+        to_resolve = set(entry_ids) - {self.workspace_id}
+        while to_resolve:
+            new_parents = await self.local_storage.get_entry_parents(to_resolve)
+            parents.update(new_parents)
+            to_resolve = {parent_id for parent_id, _ in new_parents.values()}
+            to_resolve -= parents.keys() | {self.workspace_id}
+
+        # Build the paths
+        paths = {}
+        for entry_id in entry_ids:
+            parts: List[EntryName] = []
+            current_id = entry_id
+            while current_id != self.workspace_id:
+                # Unknown ancestor (or cycle in a corrupted index)
+                if current_id not in parents or len(parts) > len(parents):
+                    break
+                current_id, name = parents[current_id]
+                parts.append(name)
+            else:
+                paths[entry_id] = FsPath(parts[::-1])
+        return paths
+
     async def entry_id_to_path(
         self, needle_entry_id: EntryID
     ) -> Tuple[FsPath, Dict[str, object]] | None:
+        # Fast path using the parents index
+        path = (await self.entry_ids_to_paths([needle_entry_id])).get(needle_entry_id)
+        if path is not None:
+            try:
+                entry_info = await self.path_info(path=path)
+            except (FSFileNotFoundError, FSNotADirectoryError):
+                pass
+            else:
+                if entry_info["id"] == needle_entry_id:
+                    return path, entry_info
+
+        # Fall back to a full search, loading the missing manifests on the way
         async def _recursive_search(
             path: FsPath,
         ) -> Tuple[FsPath, Dict[str, object]] | None:
@@ -2,12 +2,14 @@
 from __future__ import annotations
 
 import importlib.resources
+import json
 from contextlib import asynccontextmanager
 from functools import partial
 from pathlib import Path
-from typing import AsyncIterator, List, Tuple, Union
+from typing import Any, AsyncIterator, Dict, List, Tuple, Union
 
 import attr
+import trio
 from structlog import get_logger
 
 from parsec._parsec import (
@@ -31,6 +33,7 @@ from parsec._parsec import (
 )
 from parsec.api.data import EntryName, RevokedUserCertificate
 from parsec.api.protocol import InvitationToken, UserID
+from parsec.api.transport import PIPELINING_MAX_IN_FLIGHT
 from parsec.core import resources as core_resources
 from parsec.core.backend_connection import (
     BackendAuthenticatedConn,
@@ -45,6 +48,7 @@ from parsec.core.backend_connection import (
 from parsec.core.config import CoreConfig
 from parsec.core.fs import UserFS
 from parsec.core.fs.exceptions import FSWorkspaceNotFoundError
+from parsec.core.fs.storage.version import get_storage_metrics_path
 from parsec.core.fs.storage.workspace_storage import FAILSAFE_PATTERN_FILTER
 from parsec.core.invite import (
     DeviceGreetInitialCtx,
@@ -68,9 +72,13 @@ from parsec.core.remote_devices_manager import (
 from parsec.core.sync_monitor import monitor_sync
 from parsec.core.types import BackendInvitationAddr, DeviceInfo, LocalDevice, UserInfo
 from parsec.event_bus import EventBus
+from parsec.utils import open_service_nursery
 
 logger = get_logger()
 
+# The storage metrics of a running core are periodically dumped in its logs
+STORAGE_METRICS_LOG_INTERVAL = 300  # seconds
+
 
 def _get_prevent_sync_pattern(prevent_sync_pattern_path: Path) -> Regex | None:
     try:
@@ -122,6 +130,9 @@ class LoggedCore:
     def backend_status_exc(self) -> Exception | None:
         return self._backend_conn.status_exc
 
+    def get_storage_metrics(self) -> Dict[str, Any]:
+        return self.user_fs.get_storage_metrics()
+
     def find_workspace_from_name(self, workspace_name: EntryName) -> WorkspaceEntry:
         for workspace in self.user_fs.get_user_manifest().workspaces:
             if workspace_name == workspace.name:
@@ -366,6 +377,36 @@ class LoggedCore:
         )
 
 
+def _write_storage_metrics(metrics_path: Path, metrics: Dict[str, Any]) -> None:
+    # Write then rename, so that a reader never gets a partially written file
+    tmp_path = metrics_path.with_name(f"{metrics_path.name}.tmp")
+    tmp_path.write_text(json.dumps(metrics))
+    tmp_path.replace(metrics_path)
+
+
+async def _dump_storage_metrics(user_fs: UserFS, metrics_path: Path) -> None:
+    metrics = user_fs.get_storage_metrics()
+    logger.info("Storage metrics", metrics=metrics)
+    metrics["dumped_on"] = user_fs.device.time_provider.now().to_rfc3339()
+    try:
+        await trio.to_thread.run_sync(_write_storage_metrics, metrics_path, metrics)
+    except OSError as exc:
+        logger.warning("Cannot write the storage metrics", exc_info=exc)
+
+
+async def _log_storage_metrics(user_fs: UserFS, metrics_path: Path) -> None:
+    # The metrics are also written in the device's data directory, where the
+    # `storage_metrics` CLI command reads them. They are written one last time
+    # when the core stops, so that they cover the whole session.
+    try:
+        while True:
+            await user_fs.device.time_provider.sleep(STORAGE_METRICS_LOG_INTERVAL)
+            await _dump_storage_metrics(user_fs, metrics_path)
+    finally:
+        with trio.CancelScope(shield=True):
+            await _dump_storage_metrics(user_fs, metrics_path)
+
+
 @asynccontextmanager
 async def logged_core_factory(
     config: CoreConfig, device: LocalDevice, event_bus: EventBus | None = None
@@ -378,8 +419,17 @@ async def logged_core_factory(
         max_cooldown=config.backend_max_cooldown,
         max_pool=config.backend_max_connections,
         keepalive=config.backend_connection_keepalive,
+        pipelining=config.backend_pipelining,
     )
 
+    if config.backend_pipelining:
+        # Block transfers go through the shared pipelined connection, keep one
+        # of its in-flight requests for the other commands (e.g. sync)
+        block_transfer_max_concurrency = PIPELINING_MAX_IN_FLIGHT - 1
+    else:
+        # One connection of the pool is kept busy by the event listener
+        block_transfer_max_concurrency = max(1, config.backend_max_connections - 1)
+
     remote_devices_manager = RemoteDevicesManager(
         backend_conn.cmds, device.root_verify_key, device.time_provider
     )
@@ -392,29 +442,43 @@ async def logged_core_factory(
         prevent_sync_pattern=prevent_sync_pattern,
         preferred_language=config.gui_language,
         workspace_storage_cache_size=config.workspace_storage_cache_size,
+        workspace_storage_chunk_cache_size=config.workspace_storage_chunk_cache_size,
+        workspace_storage_manifest_cache_size=config.workspace_storage_manifest_cache_size,
+        workspace_read_ahead_window=config.workspace_read_ahead_window,
+        block_transfer_max_concurrency=block_transfer_max_concurrency,
     ) as user_fs:
 
         backend_conn.register_monitor(partial(monitor_messages, user_fs, event_bus))
         backend_conn.register_monitor(partial(monitor_sync, user_fs, event_bus))
 
-        async with backend_conn.run():
-            async with mountpoint_manager_factory(
+        async with open_service_nursery() as nursery:
+            nursery.start_soon(
+                _log_storage_metrics,
                 user_fs,
-                event_bus,
-                config.mountpoint_base_dir,
-                mount_all=config.mountpoint_enabled,
-                mount_on_workspace_created=config.mountpoint_enabled,
-                mount_on_workspace_shared=config.mountpoint_enabled,
-                unmount_on_workspace_revoked=config.mountpoint_enabled,
-                exclude_from_mount_all=config.disabled_workspaces,
-            ) as mountpoint_manager:
-
-                yield LoggedCore(
-                    config=config,
-                    device=device,
-                    event_bus=event_bus,
-                    mountpoint_manager=mountpoint_manager,
-                    user_fs=user_fs,
-                    remote_devices_manager=remote_devices_manager,
-                    backend_conn=backend_conn,
-                )
+                get_storage_metrics_path(config.data_base_dir, device),
+            )
+
+            try:
+                async with backend_conn.run():
+                    async with mountpoint_manager_factory(
+                        user_fs,
+                        event_bus,
+                        config.mountpoint_base_dir,
+                        mount_all=config.mountpoint_enabled,
+                        mount_on_workspace_created=config.mountpoint_enabled,
+                        mount_on_workspace_shared=config.mountpoint_enabled,
+                        unmount_on_workspace_revoked=config.mountpoint_enabled,
+                        exclude_from_mount_all=config.disabled_workspaces,
+                    ) as mountpoint_manager:
+
+                        yield LoggedCore(
+                            config=config,
+                            device=device,
+                            event_bus=event_bus,
+                            mountpoint_manager=mountpoint_manager,
+                            user_fs=user_fs,
+                            remote_devices_manager=remote_devices_manager,
+                            backend_conn=backend_conn,
+                        )
+            finally:
+                nursery.cancel_scope.cancel()
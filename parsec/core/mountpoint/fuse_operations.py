@@ -183,12 +183,14 @@ class FuseOperations(LoggingMixIn, Operations):  # type: ignore[no-any-unimporte
         # We have currently no way of easily getting the size of workspace
         # Also, the total size of a workspace is not limited
         # For the moment let's settle on 0 MB used for 1 TB available
+        blocksize = self.fs_access.get_blocksize()
+        blocks = 1024**4 // blocksize
         return {
-            "f_bsize": 512 * 1024,  # 512 KB, i.e the default block size
-            "f_frsize": 512 * 1024,  # 512 KB, i.e the default block size
-            "f_blocks": 2 * 1024**2,  # 2 MBlocks is 1 TB
-            "f_bfree": 2 * 1024**2,  # 2 MBlocks is 1 TB
-            "f_bavail": 2 * 1024**2,  # 2 MBlocks is 1 TB
+            "f_bsize": blocksize,  # The block size of the workspace (512 KB by default)
+            "f_frsize": blocksize,
+            "f_blocks": blocks,  # 1 TB
+            "f_bfree": blocks,  # 1 TB
+            "f_bavail": blocks,  # 1 TB
             "f_namemax": 255,  # 255 bytes as maximum length for filenames
         }
 
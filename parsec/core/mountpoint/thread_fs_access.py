@@ -131,6 +131,13 @@ class ThreadFSAccess:
         # This also means that there is no risk of deadlock.
         self._trio_token.run_sync_soon(callback)
 
+    # Workspace info
+
+    def get_blocksize(self) -> int:
+        # The block size never changes once the workspace storage is loaded,
+        # so there is no need to go through the trio thread
+        return self.workspace_fs.local_storage.get_blocksize()
+
     # Rights check
 
     def check_read_rights(self, path: FsPath) -> None:
@@ -1,9 +1,11 @@
 # Parsec Cloud (https://parsec.cloud) Copyright (c) AGPL-3.0 2016-present Scille SAS
 from __future__ import annotations
 
+import heapq
 import math
 from collections import defaultdict
-from typing import TYPE_CHECKING, Any, Dict, Iterable, Union, cast
+from itertools import count
+from typing import TYPE_CHECKING, Dict, Iterable, List, Tuple, Union, cast
 
 import trio
 from structlog import get_logger
@@ -47,6 +49,13 @@ MAX_WAIT = 60
 MAINTENANCE_MIN_WAIT = 30
 TICK_CRASH_COOLDOWN = 5
 TICK_SERVER_UPLOAD_TEMPORARILY_UNAVAILABLE_COOLDOWN = 30
+# Outdated items are lazily dropped from the due time queues, which are
+# rebuilt once they hold this many times more items than actual changes
+QUEUE_COMPACTION_RATIO = 2
+QUEUE_COMPACTION_MIN_SIZE = 64
+
+# (due time, insertion counter, item), the counter avoids comparing items
+_QueueItem = Tuple[float, int, "EntryID"]
 
 
 async def freeze_sync_monitor_mockpoint() -> None:
@@ -81,6 +90,11 @@ class SyncContext:
     - Otherwise (typically when the application starts or when back online after
       an disconnection) it uses the realm's checkpoint stored in the persistent
       storage to get the list of changes (entry id + version) it has missed
+
+    Note the backend coalesces the `realm.vlobs_updated` events a client hasn't
+    fetched yet, hence an event whose checkpoint is not the one following the
+    last known checkpoint means some changes may have been missed and must be
+    polled from the backend.
     """
 
     def __init__(self, user_fs: UserFS, id: EntryID, read_only: bool = False) -> None:
@@ -90,7 +104,14 @@ class SyncContext:
         self.read_only = read_only
         self.due_time = math.inf
         self._changes_loaded = False
+        # Last realm checkpoint known, and whether changes may have been missed since then
+        self._checkpoint = 0
+        self._missed_remote_changes = False
         self._local_changes: dict[EntryID, LocalChange] = {}
+        # Local changes indexed by due time, an item is outdated if its due time
+        # doesn't match the corresponding local change anymore
+        self._local_changes_queue: List[_QueueItem] = []
+        self._local_changes_counter = count()
         self._remote_changes: set[EntryID] = set()
         self._local_confinement_points: dict[EntryID, set[EntryID]] = defaultdict(set)
 
@@ -106,16 +127,8 @@ class SyncContext:
     def __repr__(self) -> str:
         return f"{type(self).__name__}(id={self.id!r})"
 
-    async def _load_changes(self) -> bool:
-        if self._changes_loaded:
-            return True
-
-        # Initialize due_time so that if we cannot retrieve the changes, we
-        # will wait until an external event (most likely a `sharing.updated`)
-        # make it worth to retry
-        self.due_time = math.inf
-
-        # 1) Fetch new checkpoint and changes
+    async def _poll_changes(self) -> bool:
+        # Fetch changes since the checkpoint stored in the persistent storage
         realm_checkpoint: int = await self._get_local_storage().get_realm_checkpoint()
         try:
             rep = await self._get_backend_cmds().vlob_poll_changes(
@@ -142,25 +155,77 @@ class SyncContext:
             new_checkpoint = rep.current_checkpoint
             changes = rep.changes
 
-        # 2) Store new checkpoint and changes
+        # Store new checkpoint and changes
         await self._get_local_storage().update_realm_checkpoint(
             new_checkpoint, {EntryID.from_hex(name.hex): val for name, val in changes.items()}
         )
+        self._checkpoint = max(self._checkpoint, new_checkpoint)
+        return True
 
-        # 3) Compute local and remote changes that need to be synced
+    async def _load_changes(self) -> bool:
+        if self._changes_loaded:
+            return True
+
+        # Initialize due_time so that if we cannot retrieve the changes, we
+        # will wait until an external event (most likely a `sharing.updated`)
+        # make it worth to retry
+        self.due_time = math.inf
+
+        # 1) Fetch and store new checkpoint and changes
+        self._missed_remote_changes = False
+        if not await self._poll_changes():
+            return False
+
+        # 2) Compute local and remote changes that need to be synced
         need_sync_local, need_sync_remote = await self._get_local_storage().get_need_sync_entries()
         now = self.device.timestamp().timestamp()
         # Ignore local changes in read only mode
         if not self.read_only:
             self._local_changes = {entry_id: LocalChange(now) for entry_id in need_sync_local}
+            self._rebuild_local_changes_queue()
         self._remote_changes = need_sync_remote
 
-        # 4) Finally refresh due time according to the changes
+        # 3) Finally refresh due time according to the changes
         self._compute_due_time()
 
         self._changes_loaded = True
         return True
 
+    def _rebuild_local_changes_queue(self) -> None:
+        self._local_changes_queue = [
+            (change_info.due_time, next(self._local_changes_counter), entry_id)
+            for entry_id, change_info in self._local_changes.items()
+        ]
+        heapq.heapify(self._local_changes_queue)
+
+    def _schedule_local_change(self, entry_id: EntryID, change_info: LocalChange) -> None:
+        if len(self._local_changes_queue) >= max(
+            QUEUE_COMPACTION_MIN_SIZE, QUEUE_COMPACTION_RATIO * len(self._local_changes)
+        ):
+            # The rebuilt queue already contains the change
+            self._rebuild_local_changes_queue()
+            return
+        heapq.heappush(
+            self._local_changes_queue,
+            (change_info.due_time, next(self._local_changes_counter), entry_id),
+        )
+
+    def _add_local_change(self, entry_id: EntryID, now: float) -> None:
+        change_info = LocalChange(now)
+        self._local_changes[entry_id] = change_info
+        self._schedule_local_change(entry_id, change_info)
+
+    def _peek_local_change(self) -> Tuple[float, EntryID] | None:
+        queue = self._local_changes_queue
+        while queue:
+            due_time, _, entry_id = queue[0]
+            change_info = self._local_changes.get(entry_id)
+            if change_info is not None and change_info.due_time == due_time:
+                return due_time, entry_id
+            # Outdated item
+            heapq.heappop(queue)
+        return None
+
     def set_local_change(self, entry_id: EntryID) -> bool:
         # Ignore local changes in read only mode
         wake_up = False
@@ -178,11 +243,14 @@ class SyncContext:
         # Update local_changes dictionary
         now = self.device.timestamp().timestamp()
         try:
-            new_due_time = self._local_changes[entry_id].changed(now)
+            change_info = self._local_changes[entry_id]
         except KeyError:
-            local_change = LocalChange(now)
-            self._local_changes[entry_id] = local_change
-            new_due_time = local_change.due_time
+            change_info = LocalChange(now)
+            self._local_changes[entry_id] = change_info
+        else:
+            change_info.changed(now)
+        self._schedule_local_change(entry_id, change_info)
+        new_due_time = change_info.due_time
 
         # Trigger a wake up if necessary
         if new_due_time <= self.due_time:
@@ -191,8 +259,14 @@ class SyncContext:
 
         return wake_up
 
-    def set_remote_change(self, entry_id: EntryID) -> bool:
+    def set_remote_change(self, entry_id: EntryID, checkpoint: int | None = None) -> bool:
         self._remote_changes.add(entry_id)
+        if checkpoint is not None and self._changes_loaded:
+            # Changes done by our own device also lead to a gap (given we don't
+            # receive events about them), in which case the poll is useless but cheap
+            if checkpoint > self._checkpoint + 1:
+                self._missed_remote_changes = True
+            self._checkpoint = max(self._checkpoint, checkpoint)
         self.due_time = self.device.timestamp().timestamp()
         return True
 
@@ -202,15 +276,11 @@ class SyncContext:
     def _compute_due_time(
         self, now: float | None = None, min_due_time: float | None = None
     ) -> float:
-        if self._remote_changes:
+        if self._remote_changes or self._missed_remote_changes:
             self.due_time = now or self.device.timestamp().timestamp()
-        elif self._local_changes:
-            # TODO: index changes by due_time to avoid this O(n) operation
-            self.due_time = min(
-                change_info.due_time for change_info in self._local_changes.values()
-            )
         else:
-            self.due_time = math.inf
+            next_local_change = self._peek_local_change()
+            self.due_time = next_local_change[0] if next_local_change else math.inf
 
         if min_due_time:
             self.due_time = max(self.due_time, min_due_time)
@@ -233,6 +303,18 @@ class SyncContext:
 
         min_due_time = None
 
+        # Some `realm.vlobs_updated` events have been coalesced by the backend
+        if self._missed_remote_changes:
+            # Cleared before polling so a gap detected meanwhile is not lost
+            self._missed_remote_changes = False
+            if await self._poll_changes():
+                _, need_sync_remote = await self._get_local_storage().get_need_sync_entries()
+                self._remote_changes |= need_sync_remote
+            else:
+                # The missed changes are still to be fetched, retry later
+                self._missed_remote_changes = True
+                min_due_time = now + MAINTENANCE_MIN_WAIT
+
         # Remote changes sync have priority over local changes
         if self._remote_changes:
             entry_id = self._remote_changes.pop()
@@ -260,16 +342,11 @@ class SyncContext:
                 min_due_time = now + MAINTENANCE_MIN_WAIT
                 self._remote_changes.add(entry_id)
 
-        elif self._local_changes:
-            entry_id = next(
-                (
-                    entry_id
-                    for entry_id, change_info in self._local_changes.items()
-                    if change_info.due_time <= now
-                ),
-                None,  # type: ignore[arg-type]
-            )
-            if entry_id:
+        else:
+            next_local_change = self._peek_local_change()
+            if next_local_change and next_local_change[0] <= now:
+                _, entry_id = next_local_change
+                heapq.heappop(self._local_changes_queue)
                 del self._local_changes[entry_id]
                 try:
                     await self._sync(entry_id)
@@ -282,14 +359,14 @@ class SyncContext:
                     # We keep track of the change (given we may be given back
                     # the write access in the future) but pretend it just occurred
                     # to avoid a busy sync loop until `read_only` flag is updated.
-                    self._local_changes[entry_id] = LocalChange(now)
+                    self._add_local_change(entry_id, now)
                 except (FSWorkspaceInMaintenance, FSBadEncryptionRevision):
                     # Not the right time for the sync, retry later.
                     # `FSBadEncryptionRevision` occurs if the reencryption is quick
                     # enough to start and finish before we process the sharing.reencrypted
                     # message so we try a sync with the old encryption revision.
                     min_due_time = now + MAINTENANCE_MIN_WAIT
-                    self._local_changes[entry_id] = LocalChange(now)
+                    self._add_local_change(entry_id, now)
 
                 # This is where we plug our vacuuming routine
                 # as it corresponds to a fresh synchronized state
@@ -340,6 +417,11 @@ class SyncContextStore:
     def __init__(self, user_fs: UserFS) -> None:
         self.user_fs = user_fs
         self._ctxs: Dict[EntryID, SyncContext] = {}
+        # Contexts indexed by due time, an item is outdated if the context has
+        # been discarded or rescheduled since then
+        self._queue: List[_QueueItem] = []
+        self._scheduled: Dict[EntryID, float] = {}
+        self._counter = count()
 
     def iter(self) -> Iterable[SyncContext]:
         return self._ctxs.copy().values()
@@ -365,6 +447,53 @@ class SyncContextStore:
 
     def discard(self, entry_id: EntryID) -> None:
         self._ctxs.pop(entry_id, None)
+        self._scheduled.pop(entry_id, None)
+
+    def schedule(self, ctx: SyncContext) -> None:
+        """
+        Must be called each time the context's due time may have changed
+        """
+        if self._ctxs.get(ctx.id) is not ctx or self._scheduled.get(ctx.id) == ctx.due_time:
+            return
+        if ctx.due_time == math.inf:
+            # Nothing to do until an external event changes the due time
+            self._scheduled.pop(ctx.id, None)
+            return
+        if len(self._queue) >= max(
+            QUEUE_COMPACTION_MIN_SIZE, QUEUE_COMPACTION_RATIO * len(self._scheduled)
+        ):
+            self._queue = [
+                (due_time, next(self._counter), entry_id)
+                for entry_id, due_time in self._scheduled.items()
+            ]
+            heapq.heapify(self._queue)
+        self._scheduled[ctx.id] = ctx.due_time
+        heapq.heappush(self._queue, (ctx.due_time, next(self._counter), ctx.id))
+
+    def _is_outdated(self, item: _QueueItem) -> bool:
+        due_time, _, entry_id = item
+        return self._scheduled.get(entry_id) != due_time
+
+    def next_due_time(self) -> float:
+        while self._queue:
+            if not self._is_outdated(self._queue[0]):
+                return self._queue[0][0]
+            heapq.heappop(self._queue)
+        return math.inf
+
+    def pop_due(self, now: float) -> List[SyncContext]:
+        """
+        Return the contexts that are due, they must be rescheduled once ticked
+        """
+        due_ctxs = []
+        while self._queue and self._queue[0][0] <= now:
+            item = heapq.heappop(self._queue)
+            if self._is_outdated(item):
+                continue
+            entry_id = item[2]
+            del self._scheduled[entry_id]
+            due_ctxs.append(self._ctxs[entry_id])
+        return due_ctxs
 
 
 async def monitor_sync(
@@ -390,13 +519,15 @@ async def monitor_sync(
         else:
             ctx = ctxs.get(workspace_id)
         if ctx and ctx.set_local_change(id):
+            ctxs.schedule(ctx)
             _trigger_early_wakeup()
 
     def _on_realm_vlobs_updated(
         sender: str, realm_id: EntryID, checkpoint: int, src_id: EntryID, src_version: int
     ) -> None:
         ctx = ctxs.get(realm_id)
-        if ctx and ctx.set_remote_change(src_id):
+        if ctx and ctx.set_remote_change(src_id, checkpoint):
+            ctxs.schedule(ctx)
             _trigger_early_wakeup()
 
     def _on_sharing_updated(
@@ -411,6 +542,7 @@ async def monitor_sync(
                 # Change the due_time so the context understands the early
                 # wakeup is for him
                 ctx.due_time = user_fs.device.timestamp().timestamp()
+                ctxs.schedule(ctx)
                 _trigger_early_wakeup()
 
     def _on_entry_confined(
@@ -420,9 +552,11 @@ async def monitor_sync(
         if ctx is not None:
             ctx.set_confined_entry(entry_id, cause_id)
 
-    async def _ctx_action(ctx: SyncContext, meth: str) -> Any:
+    async def _ctx_action(ctx: SyncContext, meth: str) -> None:
         try:
-            return await getattr(ctx, meth)()
+            await getattr(ctx, meth)()
+            ctxs.schedule(ctx)
+            return
         except BackendNotAvailable:
             raise
         except FSServerUploadTemporarilyUnavailableError as exc:
@@ -442,9 +576,7 @@ async def monitor_sync(
         if undefined_ctx:
             # Add small cooldown just to be sure not end up in a crazy busy error loop
             undefined_ctx.due_time = user_fs.device.timestamp().timestamp() + delay
-            return undefined_ctx.due_time
-        else:
-            return math.inf
+            ctxs.schedule(undefined_ctx)
 
     with event_bus.connect_in_context(
         (CoreEvent.FS_ENTRY_UPDATED, cast(EventCallback, _on_entry_updated)),
@@ -452,22 +584,21 @@ async def monitor_sync(
         (CoreEvent.SHARING_UPDATED, cast(EventCallback, _on_sharing_updated)),
         (CoreEvent.FS_ENTRY_CONFINED, cast(EventCallback, _on_entry_confined)),
     ):
-        due_times = []
         # Init userfs sync context
         ctx = ctxs.get(user_fs.user_manifest_id)
         assert ctx is not None
-        due_times.append(await _ctx_action(ctx, "bootstrap"))
+        await _ctx_action(ctx, "bootstrap")
         # Init workspaces sync context
         user_manifest = user_fs.get_user_manifest()
         for entry in user_manifest.workspaces:
             if entry.role is not None:
                 ctx = ctxs.get(entry.id)
                 if ctx:
-                    due_times.append(await _ctx_action(ctx, "bootstrap"))
+                    await _ctx_action(ctx, "bootstrap")
 
         task_status.started()
         while True:
-            next_due_time = min(due_times)
+            next_due_time = ctxs.next_due_time()
             if next_due_time == math.inf:
                 task_status.idle()
             async with trio.open_nursery() as nursery:
@@ -486,7 +617,8 @@ async def monitor_sync(
             # Reset early wakeup event
             early_wakeup = trio.Event()
 
-            due_times.clear()
             await freeze_sync_monitor_mockpoint()
-            for ctx in ctxs.iter():
-                due_times.append(await _ctx_action(ctx, "tick"))
+            # Only tick the contexts that are due
+            now = user_fs.device.timestamp().timestamp()
+            for ctx in ctxs.pop_due(now):
+                await _ctx_action(ctx, "tick")
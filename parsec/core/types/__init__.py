@@ -19,6 +19,8 @@ from parsec.core.types.backend_address import (
 )
 from parsec.core.types.manifest import (
     DEFAULT_BLOCK_SIZE,
+    MAX_BLOCK_SIZE,
+    MIN_BLOCK_SIZE,
     AnyLocalManifest,
     BlockAccess,
     BlockID,
@@ -64,6 +66,8 @@ __all__ = (
     "DeviceInfo",
     # "manifest"
     "DEFAULT_BLOCK_SIZE",
+    "MIN_BLOCK_SIZE",
+    "MAX_BLOCK_SIZE",
     "LocalFileManifest",
     "LocalFolderManifest",
     "LocalWorkspaceManifest",
@@ -46,6 +46,10 @@ __all__ = (
 
 
 DEFAULT_BLOCK_SIZE = 512 * 1024  # 512 KB
+# Bounds of a custom workspace block size: smaller blocks lead to huge manifests,
+# bigger ones don't fit in a single request (see `parsec.serde.packing.MAX_BIN_LEN`)
+MIN_BLOCK_SIZE = 64 * 1024  # 64 KB
+MAX_BLOCK_SIZE = 4 * 1024 * 1024  # 4 MB
 
 
 # Cheap rename
@@ -0,0 +1,77 @@
+# Parsec Cloud (https://parsec.cloud) Copyright (c) AGPL-3.0 2016-present Scille SAS
+from __future__ import annotations
+
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List
+
+__all__ = ("LatencyHistogram", "StorageMetrics")
+
+
+# Upper bounds (in seconds) of the latency histogram buckets, an extra bucket
+# collects the durations above the last bound
+LATENCY_BUCKETS = (0.0001, 0.001, 0.01, 0.1, 1.0, 10.0)
+
+
+class LatencyHistogram:
+    """Fixed-bucket histogram of durations, in seconds."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets: List[int] = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def observe(self, duration: float) -> None:
+        self.count += 1
+        self.total += duration
+        self.max = max(self.max, duration)
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if duration <= bound:
+                self.buckets[i] += 1
+                return
+        self.buckets[-1] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        buckets = {f"<={bound}s": count for bound, count in zip(LATENCY_BUCKETS, self.buckets)}
+        buckets[f">{LATENCY_BUCKETS[-1]}s"] = self.buckets[-1]
+        return {
+            "count": self.count,
+            "total": self.total,
+            "max": self.max,
+            "buckets": buckets,
+        }
+
+
+class StorageMetrics:
+    """In-memory counters and latency histograms of a storage component.
+
+    Accounting only updates a few integers and nothing is persisted: the metrics
+    are meant to be queried (e.g. through `LoggedCore.get_storage_metrics` for the
+    client local storages) and are reset along with the component.
+    """
+
+    def __init__(self) -> None:
+        self.counters: Dict[str, int] = defaultdict(int)
+        self.latencies: Dict[str, LatencyHistogram] = defaultdict(LatencyHistogram)
+
+    def increment(self, name: str, value: int = 1) -> None:
+        self.counters[name] += value
+
+    def observe(self, name: str, duration: float) -> None:
+        self.latencies[name].observe(duration)
+
+    @contextmanager
+    def measure(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "counters": dict(self.counters),
+            "latencies": {name: histogram.stats() for name, histogram in self.latencies.items()},
+        }
@@ -15,7 +15,8 @@ from msgpack.exceptions import ExtraData, FormatError, StackError
 from parsec._parsec import ApiVersion, DateTime, DeviceFileType
 from parsec.serde.exceptions import SerdePackingError
 
-MAX_BIN_LEN = 1024 * 1024  # 1 MB
+# Must fit the biggest blocks once encrypted (see `parsec.core.types.MAX_BLOCK_SIZE`)
+MAX_BIN_LEN = 5 * 1024 * 1024  # 5 MB
 
 
 def packb(data: Mapping[str, Any], exc_cls: Any = SerdePackingError) -> bytes:
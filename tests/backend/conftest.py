@@ -53,9 +53,11 @@ def backend_authenticated_ws_factory():
     # APIv2's invited handshake is not compatible with this
     # fixture because it requires purpose information (invitation_type/token)
     @asynccontextmanager
-    async def _backend_authenticated_ws_factory(backend_asgi_app, auth_as: LocalDevice):
+    async def _backend_authenticated_ws_factory(
+        backend_asgi_app, auth_as: LocalDevice, subprotocols=None
+    ):
         client = backend_asgi_app.test_client()
-        async with client.websocket("/ws") as ws:
+        async with client.websocket("/ws", subprotocols=subprotocols) as ws:
             # Handshake
             ch = AuthenticatedClientHandshake(
                 auth_as.organization_id,
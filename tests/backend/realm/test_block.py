@@ -25,6 +25,7 @@ from parsec.api.protocol import (
     block_create_serializer,
     block_read_serializer,
     packb,
+    unpackb,
 )
 from parsec.backend.block import BlockStoreError
 from parsec.backend.raid5_blockstore import (
@@ -145,6 +146,42 @@ async def test_block_create_check_access_rights(backend, alice, bob, bob_ws, rea
     assert isinstance(rep, BlockCreateRepNotAllowed)
 
 
+@pytest.mark.trio
+async def test_block_create_access_lost_during_upload(
+    backend, alice, bob, alice_ws, bob_ws, realm, next_timestamp
+):
+    async def _update_bob_role(role):
+        await backend.realm.update_roles(
+            alice.organization_id,
+            RealmGrantedRole(
+                certificate=b"<dummy>",
+                realm_id=realm,
+                user_id=bob.user_id,
+                role=role,
+                granted_by=alice.device_id,
+                granted_on=next_timestamp(),
+            ),
+        )
+
+    await _update_bob_role(RealmRole.CONTRIBUTOR)
+
+    # Bob's access is revoked while the block data is being uploaded
+    vanilla_create = backend.blockstore.create
+
+    async def _create_and_revoke(organization_id, block_id, block):
+        await vanilla_create(organization_id, block_id, block)
+        await _update_bob_role(None)
+
+    backend.blockstore.create = _create_and_revoke
+
+    rep = await block_create(bob_ws, BLOCK_ID, realm, BLOCK_DATA, check_rep=False)
+    assert isinstance(rep, BlockCreateRepNotAllowed)
+
+    # The block metadata hasn't been inserted
+    rep = await block_read(alice_ws, BLOCK_ID)
+    assert isinstance(rep, BlockReadRepNotFound)
+
+
 @pytest.mark.trio
 async def test_block_create_and_read(alice_ws, realm):
     await block_create(alice_ws, BLOCK_ID, realm, BLOCK_DATA)
@@ -458,6 +495,61 @@ async def test_access_during_maintenance(backend, alice, alice_ws, realm, block)
     assert rep == BlockReadRepOk(BLOCK_DATA)
 
 
+@pytest.mark.trio
+async def test_block_streamed_read(backend, alice, alice_rpc, bob_rpc, realm):
+    block_id = BlockID.new()
+    block_data = bytes(range(256)) * 10
+    await backend.block.create(
+        organization_id=alice.organization_id,
+        author=alice.device_id,
+        block_id=block_id,
+        realm_id=realm,
+        block=block_data,
+    )
+
+    rep = await alice_rpc.read_block(block_id)
+    assert rep.status_code == 200
+    assert rep.headers["Content-Length"] == str(len(block_data))
+    assert await rep.get_data() == block_data
+
+    rep = await alice_rpc.read_block(block_id, range="bytes=100-1099")
+    assert rep.status_code == 206
+    assert rep.headers["Content-Range"] == "bytes 100-1099/2560"
+    assert await rep.get_data() == block_data[100:1100]
+
+    rep = await alice_rpc.read_block(block_id, range="bytes=-10")
+    assert rep.status_code == 206
+    assert await rep.get_data() == block_data[-10:]
+
+    rep = await alice_rpc.read_block(block_id, range="bytes=2560-")
+    assert rep.status_code == 416
+    assert rep.headers["Content-Range"] == "bytes */2560"
+
+    # The blockstore streams the block by chunks
+    chunks = [
+        chunk
+        async for chunk in backend.blockstore.iter_read(
+            alice.organization_id, block_id, 10, 1000, chunk_size=100
+        )
+    ]
+    assert len(chunks) == 10
+    assert b"".join(chunks) == block_data[10:1010]
+
+    # Same access checks as the `block_read` command
+    rep = await bob_rpc.read_block(block_id)
+    assert rep.status_code == 403
+    assert unpackb(await rep.get_data()) == {"status": "not_allowed"}
+    rep = await alice_rpc.read_block(BlockID.new())
+    assert rep.status_code == 404
+    assert unpackb(await rep.get_data()) == {"status": "not_found"}
+
+
+@pytest.mark.trio
+@customize_fixtures(blockstore_mode="RAID5")
+async def test_raid5_block_streamed_read(backend, alice, alice_rpc, bob_rpc, realm):
+    await test_block_streamed_read(backend, alice, alice_rpc, bob_rpc, realm)
+
+
 @given(block=st.binary(max_size=2**8), nb_blockstores=st.integers(min_value=3, max_value=16))
 def test_split_block(block, nb_blockstores):
     nb_chunks = nb_blockstores - 1
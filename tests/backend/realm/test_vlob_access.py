@@ -42,6 +42,12 @@ from parsec.api.protocol import (
     vlob_update_serializer,
 )
 from parsec.backend.realm import RealmGrantedRole
+from parsec.backend.vlob import (
+    VlobAccessError,
+    VlobAlreadyExistsError,
+    VlobNotFoundError,
+    VlobVersionError,
+)
 from parsec.utils import BALLPARK_CLIENT_EARLY_OFFSET, BALLPARK_CLIENT_LATE_OFFSET
 from tests.backend.common import vlob_create, vlob_list_versions, vlob_read, vlob_update
 from tests.backend.realm.test_roles import realm_generate_certif_and_update_roles_or_fail
@@ -662,3 +668,106 @@ async def test_vlob_updates_causality_checks(
         check_rep=False,
     )
     assert rep == VlobUpdateRepRequireGreaterTimestamp(ref)
+
+
+@pytest.mark.trio
+async def test_batch_create_read_update(backend, alice, bob, realm, other_realm, vlobs):
+    new_vlob_ids = [VlobID.new(), VlobID.new()]
+    other_realm_vlob_id = VlobID.new()
+    await backend.vlob.create(
+        alice.organization_id,
+        alice.device_id,
+        other_realm,
+        1,
+        other_realm_vlob_id,
+        DateTime(2000, 1, 4),
+        b"other realm",
+    )
+
+    # Batch is atomic: nothing is created if one of the vlobs already exists
+    with pytest.raises(VlobAlreadyExistsError):
+        await backend.vlob.create_batch(
+            alice.organization_id,
+            alice.device_id,
+            realm,
+            1,
+            DateTime(2000, 1, 5),
+            [(new_vlob_ids[0], b"new 1", None), (vlobs[0], b"already exists", None)],
+        )
+    await backend.vlob.create_batch(
+        alice.organization_id,
+        alice.device_id,
+        realm,
+        1,
+        DateTime(2000, 1, 5),
+        [(vlob_id, b"new", None) for vlob_id in new_vlob_ids],
+    )
+
+    # Unknown vlobs and vlobs from other realms are omitted
+    result = await backend.vlob.read_batch(
+        alice.organization_id,
+        alice.device_id,
+        realm,
+        1,
+        [*vlobs, *new_vlob_ids, other_realm_vlob_id, VlobID.new()],
+    )
+    assert result == {
+        vlobs[0]: (2, b"r:A b:1 v:2", alice.device_id, DateTime(2000, 1, 3), DateTime(2000, 1, 2)),
+        vlobs[1]: (1, b"r:A b:2 v:1", alice.device_id, DateTime(2000, 1, 4), DateTime(2000, 1, 2)),
+        new_vlob_ids[0]: (1, b"new", alice.device_id, DateTime(2000, 1, 5), DateTime(2000, 1, 2)),
+        new_vlob_ids[1]: (1, b"new", alice.device_id, DateTime(2000, 1, 5), DateTime(2000, 1, 2)),
+    }
+    result = await backend.vlob.read_batch(
+        alice.organization_id, alice.device_id, realm, 1, list(vlobs), DateTime(2000, 1, 3)
+    )
+    assert result == {
+        vlobs[0]: (2, b"r:A b:1 v:2", alice.device_id, DateTime(2000, 1, 3), DateTime(2000, 1, 2))
+    }
+
+    # Batch is atomic: nothing is updated if one of the versions is wrong
+    with pytest.raises(VlobVersionError):
+        await backend.vlob.update_batch(
+            alice.organization_id,
+            alice.device_id,
+            realm,
+            1,
+            DateTime(2000, 1, 6),
+            [(vlobs[0], 3, b"v3", None), (vlobs[1], 3, b"v3", None)],
+        )
+    with pytest.raises(VlobNotFoundError):
+        await backend.vlob.update_batch(
+            alice.organization_id,
+            alice.device_id,
+            realm,
+            1,
+            DateTime(2000, 1, 6),
+            [(vlobs[0], 3, b"v3", None), (other_realm_vlob_id, 2, b"v2", None)],
+        )
+    await backend.vlob.update_batch(
+        alice.organization_id,
+        alice.device_id,
+        realm,
+        1,
+        DateTime(2000, 1, 6),
+        [(vlobs[0], 3, b"v3", None), (vlobs[1], 2, b"v2", None)],
+    )
+    result = await backend.vlob.read_batch(
+        alice.organization_id, alice.device_id, realm, 1, list(vlobs)
+    )
+    assert {vlob_id: (version, blob) for vlob_id, (version, blob, *_) in result.items()} == {
+        vlobs[0]: (3, b"v3"),
+        vlobs[1]: (2, b"v2"),
+    }
+
+    # Access is checked once for the whole realm
+    with pytest.raises(VlobAccessError):
+        await backend.vlob.read_batch(bob.organization_id, bob.device_id, realm, 1, list(vlobs))
+    with pytest.raises(VlobAccessError):
+        await backend.vlob.update_batch(
+            bob.organization_id,
+            bob.device_id,
+            realm,
+            1,
+            DateTime(2000, 1, 7),
+            [(vlobs[0], 4, b"v4", None)],
+        )
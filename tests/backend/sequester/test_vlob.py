@@ -9,6 +9,7 @@ from urllib.parse import parse_qs, urlsplit
 import pytest
 
 from parsec._parsec import (
+    DateTime,
     VlobCreateRepOk,
     VlobCreateRepRejectedBySequesterService,
     VlobCreateRepSequesterInconsistency,
@@ -24,6 +25,7 @@ from parsec.backend.sequester import (
     SequesterServiceNotFoundError,
     SequesterServiceType,
 )
+from parsec.backend.vlob import VlobAlreadyExistsError, VlobVersionError
 from tests.backend.common import vlob_create, vlob_update
 from tests.common import OrganizationFullData, customize_fixtures, sequester_service_factory
 
@@ -265,6 +267,55 @@ async def test_webhook_vlob_create_update(
         _assert_webhook_posted(sequester_blob)
 
 
+@customize_fixtures(coolorg_is_sequestered_organization=True)
+@pytest.mark.trio
+async def test_webhook_vlob_batch(coolorg: OrganizationFullData, alice, alice_ws, realm, backend):
+    vlob_id = VlobID.from_hex("00000000000000000000000000000001")
+    new_vlob_id = VlobID.from_hex("00000000000000000000000000000002")
+    blob = b"<encrypted with workspace's key>"
+    sequester_blob = b"<encrypted sequester blob>"
+
+    url = "http://somewhere.post"
+
+    with patch("parsec.backend.http_utils.urllib.request") as mock:
+        service = await _register_service_and_create_vlob(
+            coolorg, backend, alice_ws, realm, vlob_id, blob, sequester_blob, url
+        )
+        mock.reset_mock()
+        sequester_blobs = {service.service_id: sequester_blob}
+
+        # Nothing is sent to the webhook if the batch is rejected
+        with pytest.raises(VlobAlreadyExistsError):
+            await backend.vlob.create_batch(
+                alice.organization_id,
+                alice.device_id,
+                realm,
+                1,
+                DateTime.now(),
+                [(new_vlob_id, blob, sequester_blobs), (vlob_id, blob, sequester_blobs)],
+            )
+        with pytest.raises(VlobVersionError):
+            await backend.vlob.update_batch(
+                alice.organization_id,
+                alice.device_id,
+                realm,
+                1,
+                DateTime.now(),
+                [(vlob_id, 3, blob, sequester_blobs)],
+            )
+        mock.Request.assert_not_called()
+
+        await backend.vlob.update_batch(
+            alice.organization_id,
+            alice.device_id,
+            realm,
+            1,
+            DateTime.now(),
+            [(vlob_id, 2, blob, sequester_blobs)],
+        )
+        mock.Request.assert_called_once()
+
+
 @customize_fixtures(coolorg_is_sequestered_organization=True)
 @pytest.mark.trio
 async def test_webhook_errors(caplog, coolorg: OrganizationFullData, alice_ws, realm, backend):
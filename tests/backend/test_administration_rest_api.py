@@ -698,6 +698,27 @@ async def test_organization_stats_users(
     }
 
 
+@pytest.mark.trio
+@customize_fixtures(blockstore_mode="RAID1")
+async def test_blockstore_metrics(backend_asgi_app, coolorg):
+    blockstore = backend_asgi_app.backend.blockstore
+    block_id = BlockID.new()
+    await blockstore.create(coolorg.organization_id, block_id, b"<block>")
+    assert await blockstore.read(coolorg.organization_id, block_id) == b"<block>"
+
+    client = backend_asgi_app.test_client()
+    response = await client.get(
+        "/administration/blockstore/metrics",
+        headers={"Authorization": f"Bearer {backend_asgi_app.backend.config.administration_token}"},
+    )
+    assert response.status_code == 200
+    metrics = await response.get_json()
+    # Each RAID node has its health stats along with the metrics of its blockstore
+    assert len(metrics["nodes"]) == 2
+    assert sum(node["successes"] for node in metrics["nodes"]) == 1
+    assert all(node["healthy"] and node["blockstore"] == {} for node in metrics["nodes"])
+
+
 @pytest.mark.trio
 async def test_handles_escaped_path(backend_asgi_app):
     organization_id = "CéTACé"
@@ -2,8 +2,15 @@
 from __future__ import annotations
 
 import pytest
+from quart.testing.connections import WebsocketDisconnectError
 
-from parsec.api.protocol import packb, unpackb
+from parsec.api.protocol import invite_1_greeter_wait_peer_serializer, packb, unpackb
+from parsec.api.transport import (
+    PIPELINING_HEADER,
+    PIPELINING_MAX_IN_FLIGHT,
+    PIPELINING_SUBPROTOCOL,
+)
+from parsec.crypto import PrivateKey
 
 
 @pytest.mark.trio
@@ -34,3 +41,73 @@ async def test_bad_msg_format(alice_ws, kind):
         await alice_ws.send(b"\xc1")  # Never used value according to msgpack spec
     rep = await alice_ws.receive()
     assert unpackb(rep) == {"status": "invalid_msg_format", "reason": "Invalid message format"}
+
+
+@pytest.mark.trio
+async def test_pipelined_requests(backend_asgi_app, alice, backend_authenticated_ws_factory):
+    async with backend_authenticated_ws_factory(
+        backend_asgi_app, alice, subprotocols=[PIPELINING_SUBPROTOCOL]
+    ) as ws:
+        # A long command doesn't prevent the next ones from being processed
+        await ws.send(PIPELINING_HEADER.pack(1) + packb({"cmd": "events_subscribe"}))
+        await ws.send(PIPELINING_HEADER.pack(2) + packb({"cmd": "events_listen", "wait": True}))
+        await ws.send(PIPELINING_HEADER.pack(3) + packb({"cmd": "ping", "ping": "42"}))
+        await ws.send(PIPELINING_HEADER.pack(4) + packb({"cmd": "dummy"}))
+
+        reps = {}
+        for _ in range(3):
+            raw_rep = await ws.receive()
+            (request_id,) = PIPELINING_HEADER.unpack_from(raw_rep)
+            reps[request_id] = unpackb(raw_rep[PIPELINING_HEADER.size :])
+        assert reps == {
+            1: {"status": "ok"},
+            3: {"status": "ok", "pong": "42"},
+            4: {"status": "unknown_command", "reason": "Unknown command"},
+        }
+
+
+@pytest.mark.trio
+@pytest.mark.parametrize("kind", ["string_message", "too_short"])
+async def test_pipelined_bad_frame_closes_connection(
+    backend_asgi_app, alice, backend_authenticated_ws_factory, kind
+):
+    async with backend_authenticated_ws_factory(
+        backend_asgi_app, alice, subprotocols=[PIPELINING_SUBPROTOCOL]
+    ) as ws:
+        # The request id cannot be retrieved, so the request cannot be answered
+        if kind == "string_message":
+            await ws.send("hello")
+        else:
+            await ws.send(b"\x00")
+        with pytest.raises(WebsocketDisconnectError):
+            await ws.receive()
+
+
+@pytest.mark.trio
+async def test_pipelined_long_waiting_cmds_dont_hold_slots(
+    backend, backend_asgi_app, alice, backend_authenticated_ws_factory
+):
+    invitation = await backend.invite.new_for_device(
+        organization_id=alice.organization_id, greeter_user_id=alice.user_id
+    )
+    greeter_privkey = PrivateKey.generate()
+    raw_wait_peer = invite_1_greeter_wait_peer_serializer.req_dumps(
+        {
+            "cmd": "invite_1_greeter_wait_peer",
+            "token": invitation.token,
+            "greeter_public_key": greeter_privkey.public_key,
+        }
+    )
+
+    async with backend_authenticated_ws_factory(
+        backend_asgi_app, alice, subprotocols=[PIPELINING_SUBPROTOCOL]
+    ) as ws:
+        # Greeter waiting for a claimer that never comes
+        for request_id in range(1, PIPELINING_MAX_IN_FLIGHT + 1):
+            await ws.send(PIPELINING_HEADER.pack(request_id) + raw_wait_peer)
+
+        request_id = PIPELINING_MAX_IN_FLIGHT + 1
+        await ws.send(PIPELINING_HEADER.pack(request_id) + packb({"cmd": "ping", "ping": "42"}))
+        raw_rep = await ws.receive()
+        assert PIPELINING_HEADER.unpack_from(raw_rep) == (request_id,)
+        assert unpackb(raw_rep[PIPELINING_HEADER.size :]) == {"status": "ok", "pong": "42"}
@@ -0,0 +1,110 @@
+# Parsec Cloud (https://parsec.cloud) Copyright (c) AGPL-3.0 2016-present Scille SAS
+from __future__ import annotations
+
+import pytest
+import trio
+
+from parsec.api.protocol import BlockID, OrganizationID
+from parsec.backend.block import BlockStoreError
+from parsec.backend.cached_blockstore import CachedBlockStoreComponent
+from parsec.backend.memory import MemoryBlockStoreComponent
+
+ORG_ID = OrganizationID("org42")
+
+
+def _count_reads(blockstore: MemoryBlockStoreComponent) -> list:
+    reads = []
+    vanilla_read = blockstore.read
+
+    async def _read(organization_id, block_id):
+        reads.append(block_id)
+        await trio.sleep(1)
+        return await vanilla_read(organization_id, block_id)
+
+    blockstore.read = _read
+    return reads
+
+
+@pytest.mark.trio
+async def test_cached_blockstore_coalesced_reads(autojump_clock):
+    memory_blockstore = MemoryBlockStoreComponent()
+    blockstore = CachedBlockStoreComponent(memory_blockstore, memory_cache_size=1024)
+    block_id = BlockID.new()
+    await blockstore.create(ORG_ID, block_id, b"a" * 100)
+    reads = _count_reads(memory_blockstore)
+
+    results = []
+
+    async def _read():
+        results.append(await blockstore.read(ORG_ID, block_id))
+
+    async with trio.open_nursery() as nursery:
+        for _ in range(10):
+            nursery.start_soon(_read)
+    assert results == [b"a" * 100] * 10
+    assert len(reads) == 1
+
+    # Now served from the cache
+    assert await blockstore.read(ORG_ID, block_id) == b"a" * 100
+    assert await blockstore.read_range(ORG_ID, block_id, 10, 5) == b"a" * 5
+    assert len(reads) == 1
+    metrics = blockstore.get_metrics()
+    assert metrics["counters"]["misses"] == 1
+    assert metrics["counters"]["coalesced"] == 9
+
+    # Errors are shared by the coalesced reads
+    unknown_block_id = BlockID.new()
+
+    async def _failing_read():
+        with pytest.raises(BlockStoreError):
+            await blockstore.read(ORG_ID, unknown_block_id)
+
+    async with trio.open_nursery() as nursery:
+        for _ in range(2):
+            nursery.start_soon(_failing_read)
+    assert len(reads) == 2
+
+
+@pytest.mark.trio
+async def test_cached_blockstore_memory_eviction():
+    memory_blockstore = MemoryBlockStoreComponent()
+    blockstore = CachedBlockStoreComponent(memory_blockstore, memory_cache_size=250)
+    block_ids = [BlockID.new() for _ in range(4)]
+    for block_id in block_ids:
+        await memory_blockstore.create(ORG_ID, block_id, b"a" * 100)
+    big_block_id = BlockID.new()
+    await memory_blockstore.create(ORG_ID, big_block_id, b"a" * 1000)
+
+    for block_id in block_ids:
+        await blockstore.read(ORG_ID, block_id)
+    # Too big to be cached, nothing gets evicted
+    await blockstore.read(ORG_ID, big_block_id)
+    metrics = blockstore.get_metrics()
+    assert metrics["memory_cache_entries"] == 2
+    assert metrics["memory_cache_size"] == 200
+    assert metrics["counters"]["memory_evictions"] == 2
+
+
+@pytest.mark.trio
+async def test_cached_blockstore_disk_tier(tmp_path):
+    memory_blockstore = MemoryBlockStoreComponent()
+    blockstore = CachedBlockStoreComponent(
+        memory_blockstore, memory_cache_size=0, disk_cache_dir=tmp_path, disk_cache_size=250
+    )
+    block_ids = [BlockID.new() for _ in range(3)]
+    for i, block_id in enumerate(block_ids):
+        await memory_blockstore.create(ORG_ID, block_id, bytes([i]) * 100)
+        assert await blockstore.read(ORG_ID, block_id) == bytes([i]) * 100
+    # First block has been evicted from the disk
+    assert not (tmp_path / ORG_ID.str / block_ids[0].hex).exists()
+    assert blockstore.get_metrics()["disk_cache_entries"] == 2
+
+    # The disk cache is kept across restarts
+    reads = _count_reads(memory_blockstore)
+    blockstore = CachedBlockStoreComponent(
+        memory_blockstore, memory_cache_size=0, disk_cache_dir=tmp_path, disk_cache_size=250
+    )
+    assert await blockstore.read(ORG_ID, block_ids[2]) == b"\x02" * 100
+    assert await blockstore.read_range(ORG_ID, block_ids[1], 50, 10) == b"\x01" * 10
+    assert not reads
+    assert blockstore.get_metrics()["counters"]["disk_hits"] == 2
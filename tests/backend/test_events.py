@@ -170,6 +170,24 @@ async def test_events_close_connection_on_backpressure(
                     break
 
 
+@pytest.mark.trio
+async def test_events_unsubscribe_on_disconnect(
+    backend_asgi_app, backend_authenticated_ws_factory, alice, alice2_ws
+):
+    events = backend_asgi_app.backend.events
+    async with backend_authenticated_ws_factory(backend_asgi_app, alice) as alice_ws:
+        await events_subscribe(alice_ws)
+        await events_subscribe(alice2_ws)
+        assert len(events._organization_clients[alice.organization_id]) == 2
+        assert len(events._user_clients[(alice.organization_id, alice.user_id)]) == 2
+
+    # Dispatching an event no longer visits the disconnected client
+    async with real_clock_timeout():
+        while len(events._organization_clients[alice.organization_id]) != 1:
+            await trio.sleep(0.01)
+    assert len(events._user_clients[(alice.organization_id, alice.user_id)]) == 1
+
+
 # TODO: test message.received and beacon.updated events
 
 
@@ -12,9 +12,16 @@ import trio
 import triopg
 
 from parsec._parsec import ActiveUsersLimit, DateTime, EntryID
+from parsec.api.protocol import BlockID, OrganizationID, RealmID, RealmRole, UserID, VlobID
+from parsec.backend.backend_events import BackendEvent
+from parsec.backend.block import BlockInMaintenanceError
 from parsec.backend.cli.run import RetryPolicy, _run_backend
 from parsec.backend.config import BackendConfig, PostgreSQLBlockStoreConfig
 from parsec.backend.postgresql.handler import handle_datetime, handle_integer, handle_uuid
+from parsec.backend.postgresql.realm_access_cache import RealmAccessCache
+from parsec.backend.realm import RealmStatus
+from parsec.backend.vlob import VlobInMaintenanceError
+from parsec.event_bus import EventBus
 from tests.common import real_clock_timeout
 
 
@@ -359,3 +366,110 @@ async def test_rust_uuid_correctly_serialized(postgresql_url, backend_factory):
                 == id_py.hex
                 == id_rs.hex
             )
+
+
+@pytest.mark.trio
+async def test_realm_access_cache(autojump_clock):
+    event_bus = EventBus()
+    cache = RealmAccessCache(event_bus, ttl=10)
+    org_id = OrganizationID("Org")
+    realm_id = RealmID.new()
+    user_id = UserID("alice")
+    status = RealmStatus(None, None, None, 1)
+    now = DateTime.now()
+
+    cache.set_realm_status(org_id, realm_id, status, cache.generation)
+    cache.set_realm_role(org_id, realm_id, user_id, RealmRole.OWNER, now, cache.generation)
+    assert cache.get_realm_status(org_id, realm_id) == status
+    assert cache.get_realm_role(org_id, realm_id, user_id) == (RealmRole.OWNER, now)
+
+    # Notifications invalidate the corresponding entries
+    event_bus.send(
+        BackendEvent.REALM_ROLES_UPDATED,
+        organization_id=org_id,
+        author=None,
+        realm_id=realm_id,
+        user=user_id,
+        role=None,
+    )
+    assert cache.get_realm_role(org_id, realm_id, user_id) is None
+    assert cache.get_realm_status(org_id, realm_id) == status
+    event_bus.send(
+        BackendEvent.REALM_MAINTENANCE_STARTED,
+        organization_id=org_id,
+        author=None,
+        realm_id=realm_id,
+        encryption_revision=2,
+    )
+    assert cache.get_realm_status(org_id, realm_id) is None
+
+    # A value fetched before an invalidation is not stored
+    generation = cache.generation
+    cache.invalidate_realm_role(org_id, realm_id, UserID("bob"))
+    cache.set_realm_role(org_id, realm_id, user_id, RealmRole.OWNER, now, generation)
+    assert cache.get_realm_role(org_id, realm_id, user_id) is None
+
+    # Entries expire
+    cache.set_realm_status(org_id, realm_id, status, cache.generation)
+    await trio.sleep(11)
+    assert cache.get_realm_status(org_id, realm_id) is None
+
+
+@pytest.mark.trio
+@pytest.mark.postgresql
+async def test_realm_access_cache_not_used_for_writes(
+    postgresql_url, backend_factory, alice, realm_factory, next_timestamp
+):
+    async with backend_factory(config={"db_url": postgresql_url}) as backend1:
+        async with backend_factory(config={"db_url": postgresql_url}, populated=False) as backend2:
+            realm_id = await realm_factory(backend1, alice)
+            vlob_id = VlobID.new()
+            await backend1.vlob.create(
+                organization_id=alice.organization_id,
+                author=alice.device_id,
+                realm_id=realm_id,
+                encryption_revision=1,
+                vlob_id=vlob_id,
+                timestamp=next_timestamp(),
+                blob=b"v1",
+            )
+            # Reading fills the realm access cache of the first backend
+            await backend1.vlob.read(
+                organization_id=alice.organization_id,
+                author=alice.device_id,
+                encryption_revision=1,
+                vlob_id=vlob_id,
+            )
+
+            # Simulate a notification not received yet by the first backend
+            cache = backend1.vlob.dbh.realm_access_cache
+            cache.invalidate_realm_status = lambda *args, **kwargs: None
+            await backend2.realm.start_reencryption_maintenance(
+                organization_id=alice.organization_id,
+                author=alice.device_id,
+                realm_id=realm_id,
+                encryption_revision=2,
+                per_participant_message={alice.user_id: b"foo"},
+                timestamp=next_timestamp(),
+            )
+            assert not cache.get_realm_status(alice.organization_id, realm_id).in_maintenance
+
+            # Still, writes check the realm status in the database
+            with pytest.raises(VlobInMaintenanceError):
+                await backend1.vlob.update(
+                    organization_id=alice.organization_id,
+                    author=alice.device_id,
+                    encryption_revision=1,
+                    vlob_id=vlob_id,
+                    version=2,
+                    timestamp=next_timestamp(),
+                    blob=b"v2",
+                )
+            with pytest.raises(BlockInMaintenanceError):
+                await backend1.block.create(
+                    organization_id=alice.organization_id,
+                    author=alice.device_id,
+                    block_id=BlockID.new(),
+                    realm_id=realm_id,
+                    block=b"data",
+                )
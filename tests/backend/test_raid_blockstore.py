@@ -0,0 +1,84 @@
+# Parsec Cloud (https://parsec.cloud) Copyright (c) AGPL-3.0 2016-present Scille SAS
+from __future__ import annotations
+
+import pytest
+import trio
+
+from parsec.api.protocol import BlockID, OrganizationID
+from parsec.backend.block import BlockStoreError
+from parsec.backend.memory import MemoryBlockStoreComponent
+from parsec.backend.raid1_blockstore import RAID1BlockStoreComponent
+from parsec.backend.raid5_blockstore import RAID5BlockStoreComponent
+
+ORG_ID = OrganizationID("org42")
+BLOCK_ID = BlockID.from_hex("0694a21176354e8295e28a543e5887f9")
+BLOCK_DATA = b"Hodi ho !" * 100
+
+
+def _make_slow(blockstore: MemoryBlockStoreComponent, delay: float) -> list:
+    reads = []
+    vanilla_read = blockstore.read
+
+    async def _slow_read(organization_id, block_id):
+        reads.append(block_id)
+        await trio.sleep(delay)
+        return await vanilla_read(organization_id, block_id)
+
+    blockstore.read = _slow_read
+    return reads
+
+
+@pytest.mark.trio
+async def test_raid1_hedged_read(autojump_clock):
+    nodes = [MemoryBlockStoreComponent(), MemoryBlockStoreComponent()]
+    blockstore = RAID1BlockStoreComponent(nodes)
+    await blockstore.create(ORG_ID, BLOCK_ID, BLOCK_DATA)
+    slow_reads = _make_slow(nodes[0], 10)
+
+    # The slow node is tried first, but the other one is queried once the
+    # hedge deadline is reached
+    start = trio.current_time()
+    assert await blockstore.read(ORG_ID, BLOCK_ID) == BLOCK_DATA
+    assert trio.current_time() - start < 1
+    assert len(slow_reads) == 1
+
+    # The slow node is no longer the preferred one
+    assert await blockstore.read(ORG_ID, BLOCK_ID) == BLOCK_DATA
+    assert len(slow_reads) == 1
+
+    metrics = blockstore.get_metrics()
+    assert metrics["nodes"][0]["cancelled"] == 1
+    assert metrics["nodes"][1]["successes"] == 2
+
+
+@pytest.mark.trio
+async def test_raid5_hedged_read(autojump_clock):
+    nodes = [MemoryBlockStoreComponent() for _ in range(3)]
+    blockstore = RAID5BlockStoreComponent(nodes)
+    await blockstore.create(ORG_ID, BLOCK_ID, BLOCK_DATA)
+    checksum_reads = _make_slow(nodes[2], 0)
+
+    # Fast data nodes, no need for the checksum
+    assert await blockstore.read(ORG_ID, BLOCK_ID) == BLOCK_DATA
+    assert not checksum_reads
+
+    # Slow data node, the block is rebuilt from the checksum
+    _make_slow(nodes[0], 10)
+    start = trio.current_time()
+    assert await blockstore.read(ORG_ID, BLOCK_ID) == BLOCK_DATA
+    assert trio.current_time() - start < 1
+    assert len(checksum_reads) == 1
+    assert blockstore.get_metrics()["nodes"][0]["cancelled"] == 1
+
+    # Failing data node, the checksum is fetched right away from now on
+    async def _failing_read(organization_id, block_id):
+        raise BlockStoreError()
+
+    nodes[0].read = _failing_read
+    assert await blockstore.read(ORG_ID, BLOCK_ID) == BLOCK_DATA
+    assert len(checksum_reads) == 2
+    assert not blockstore.get_metrics()["nodes"][0]["healthy"]
+    start = trio.current_time()
+    assert await blockstore.read(ORG_ID, BLOCK_ID) == BLOCK_DATA
+    assert trio.current_time() == start
+    assert len(checksum_reads) == 3
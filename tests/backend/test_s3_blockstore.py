@@ -1,12 +1,15 @@
 # Parsec Cloud (https://parsec.cloud) Copyright (c) AGPL-3.0 2016-present Scille SAS
 from __future__ import annotations
 
+import threading
 from unittest import mock
 from unittest.mock import Mock
 
 import pytest
+import trio
 from botocore.exceptions import ClientError as S3ClientError
 from botocore.exceptions import EndpointConnectionError as S3EndpointConnectionError
+from trio.testing import wait_all_tasks_blocked
 
 from parsec.api.protocol import BlockID, OrganizationID
 from parsec.backend.block import BlockStoreError
@@ -64,6 +67,59 @@ async def test_s3_read(caplog):
         _assert_log()
 
 
+@pytest.mark.trio
+async def test_s3_read_in_worker_pool():
+    org_id = OrganizationID("org42")
+    block_id = BlockID.from_hex("0694a21176354e8295e28a543e5887f9")
+    release = threading.Event()
+    lock = threading.Lock()
+    in_flight = max_in_flight = 0
+
+    def _get_object(**kwargs):
+        nonlocal in_flight, max_in_flight
+        with lock:
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+        release.wait()
+        with lock:
+            in_flight -= 1
+        response_mock = Mock()
+        response_mock.read.return_value = b"content"
+        return {"Body": response_mock}
+
+    with mock.patch("boto3.client") as client_mock:
+        client_mock.return_value = Mock()
+        client_mock().head_bucket.return_value = True
+        blockstore = S3BlockStoreComponent(
+            "europe", "parsec", "john", "secret", max_pool_connections=2, read_timeout=5
+        )
+        config = client_mock.call_args.kwargs["config"]
+        assert config.max_pool_connections == 2
+        assert config.read_timeout == 5
+
+        client_mock().get_object.side_effect = _get_object
+        results = []
+
+        async def _read():
+            results.append(await blockstore.read(org_id, block_id))
+
+        async with trio.open_nursery() as nursery:
+            for _ in range(4):
+                nursery.start_soon(_read)
+            # Pending requests don't block the event loop, and are bounded by the pool
+            await wait_all_tasks_blocked()
+            metrics = blockstore.get_metrics()
+            assert metrics["pool_in_use"] == 2
+            assert metrics["pool_waiting"] == 2
+            release.set()
+
+        assert results == [b"content"] * 4
+        assert max_in_flight == 2
+        metrics = blockstore.get_metrics()
+        assert metrics["latencies"]["read"]["count"] == 4
+        assert metrics["pool_in_use"] == 0
+
+
 # This test has been detected as flaky.
 # Using re-runs is a valid temporary solutions but the problem should be investigated in the future.
 @pytest.mark.trio
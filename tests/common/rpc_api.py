@@ -14,7 +14,11 @@ from quart.typing import TestClientProtocol, TestHTTPConnectionProtocol
 from werkzeug.datastructures import Headers
 
 from parsec._parsec import DateTime, EventsListenRep, OrganizationID
-from parsec.api.protocol import authenticated_ping_serializer, invited_ping_serializer
+from parsec.api.protocol import (
+    BlockID,
+    authenticated_ping_serializer,
+    invited_ping_serializer,
+)
 from parsec.api.version import API_VERSION
 from parsec.core.types import LocalDevice
 from tests.common import OrganizationFullData
@@ -83,6 +87,17 @@ class AuthenticatedRpcApiClient(BaseRpcApiClient):
             {"cmd": "ping", "ping": ping}, authenticated_ping_serializer, **kwargs
         )
 
+    async def read_block(self, block_id: BlockID, range: Optional[str] = None):
+        headers = self.base_headers.copy()
+        signature = self.device.signing_key.sign_only_signature(b"")
+        headers["Signature"] = b64encode(signature).decode("ascii")
+        if range is not None:
+            headers["Range"] = range
+        return await self.client.get(
+            path=f"/authenticated/{self.device.organization_id.str}/block/{block_id.hex}",
+            headers=headers,
+        )
+
     @asynccontextmanager
     async def connect_sse_events(
         self,
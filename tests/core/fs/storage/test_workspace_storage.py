@@ -1,7 +1,10 @@
 # Parsec Cloud (https://parsec.cloud) Copyright (c) AGPL-3.0 2016-present Scille SAS
 from __future__ import annotations
 
+import json
+
 import pytest
+import trio
 
 from parsec._parsec import DateTime
 from parsec.api.data.manifest import LOCAL_AUTHOR_LEGACY_PLACEHOLDER
@@ -11,6 +14,7 @@ from parsec.core.fs.storage import WorkspaceStorage
 from parsec.core.types import (
     DEFAULT_BLOCK_SIZE,
     Chunk,
+    ChunkID,
     EntryID,
     LocalFileManifest,
     LocalFolderManifest,
@@ -189,6 +193,50 @@ async def test_chunk_clearing(alice_workspace_storage, cache_only, clear_manifes
         await aws.manifest_storage._ensure_manifest_persistent(manifest.id)
 
 
+@pytest.mark.trio
+@customize_fixtures(real_data_storage=True)
+async def test_group_flush(data_base_dir, alice, workspace_id, monkeypatch):
+    manifests = [create_manifest(alice, LocalFileManifest) for _ in range(10)]
+
+    async with WorkspaceStorage.run(
+        data_base_dir, alice, workspace_id, manifest_flush_interval=None
+    ) as aws:
+        for manifest in manifests:
+            await aws.set_manifest(manifest.id, manifest, cache_only=True)
+
+        commits = []
+        vanilla_commit = aws.data_localdb._commit
+
+        async def _commit():
+            commits.append(None)
+            await vanilla_commit()
+
+        monkeypatch.setattr(aws.data_localdb, "_commit", _commit)
+
+        # All the manifests are written in a single transaction
+        await aws.clear_memory_cache(flush=True)
+        assert len(commits) == 1
+        for manifest in manifests:
+            assert await aws.get_manifest(manifest.id) == manifest
+
+
+@pytest.mark.trio
+@customize_fixtures(real_data_storage=True)
+async def test_periodic_flush(autojump_clock, data_base_dir, alice, workspace_id):
+    manifest = create_manifest(alice, LocalFileManifest)
+
+    async with WorkspaceStorage.run(
+        data_base_dir, alice, workspace_id, manifest_flush_interval=10
+    ) as aws:
+        await aws.set_manifest(manifest.id, manifest, cache_only=True)
+        assert aws.get_manifest_cache_stats()["pending_entries"] == 1
+        await trio.sleep(11)
+        assert aws.get_manifest_cache_stats()["pending_entries"] == 0
+
+        async with WorkspaceStorage.run(data_base_dir, alice, workspace_id) as aws2:
+            assert await aws2.get_manifest(manifest.id) == manifest
+
+
 @pytest.mark.trio
 @customize_fixtures(real_data_storage=True)
 async def test_cache_flushed_on_exit(data_base_dir, alice, workspace_id):
@@ -430,6 +478,194 @@ async def test_chunk_many(alice_workspace_storage):
     assert len(ret) == chunks_number
 
 
+@pytest.mark.trio
+@customize_fixtures(real_data_storage=True)
+async def test_chunk_batch_interface(alice_workspace_storage):
+    aws = alice_workspace_storage
+    dirty_chunks = [Chunk.new(0, 7) for _ in range(3)]
+    clean_chunk = Chunk.new(0, 7).evolve_as_block(b"clean")
+    missing_chunk = Chunk.new(0, 7)
+
+    assert await aws.get_chunks([c.id for c in dirty_chunks]) == {}
+
+    await aws.set_chunks([(c.id, f"dirty{i}".encode()) for i, c in enumerate(dirty_chunks)])
+    await aws.set_clean_block(clean_chunk.access.id, b"clean")
+
+    # Chunks are looked up in both the chunk storage and the block storage,
+    # missing chunks are omitted from the result
+    ids = [c.id for c in dirty_chunks] + [clean_chunk.id, missing_chunk.id]
+    assert await aws.get_chunks(ids) == {
+        dirty_chunks[0].id: b"dirty0",
+        dirty_chunks[1].id: b"dirty1",
+        dirty_chunks[2].id: b"dirty2",
+        clean_chunk.id: b"clean",
+    }
+
+    # Clean blocks are not dirty blocks
+    assert await aws.get_dirty_blocks([clean_chunk.access.id]) == {}
+
+    # More than the sqlite max argument limit to prevent regression
+    many_chunks = [Chunk.new(0, 1) for _ in range(2000)]
+    await aws.set_chunks([(c.id, b"x") for c in many_chunks])
+    result = await aws.get_chunks([c.id for c in many_chunks])
+    assert len(result) == 2000
+
+
+@pytest.mark.trio
+@customize_fixtures(real_data_storage=True)
+async def test_chunk_cache(data_base_dir, alice, workspace_id):
+    data = b"0123456"
+    chunk = Chunk.new(0, 7)
+    block = Chunk.new(0, 7).evolve_as_block(data)
+
+    async with WorkspaceStorage.run(
+        data_base_dir, alice, workspace_id, chunk_cache_size=1024
+    ) as aws:
+        await aws.set_chunk(chunk.id, data)
+        await aws.set_clean_block(block.access.id, data)
+        assert chunk.id in aws.chunk_cache
+        assert block.id in aws.chunk_cache
+
+        # Served from memory
+        assert await aws.get_chunks([chunk.id, block.id]) == {chunk.id: data, block.id: data}
+        assert aws.get_chunk_cache_stats()["hits"] == 2
+        assert aws.get_chunk_cache_stats()["misses"] == 0
+
+        # Clearing invalidates the cache
+        await aws.clear_chunk(chunk.id)
+        await aws.clear_clean_block(block.access.id)
+        assert not aws.chunk_cache
+        with pytest.raises(FSLocalMissError):
+            await aws.get_chunk(chunk.id)
+        assert await aws.get_chunks([block.id]) == {}
+        assert aws.get_chunk_cache_stats()["misses"] == 2
+
+        # Cache is size bounded
+        for _ in range(1024 // len(data) + 1):
+            await aws.set_chunk(Chunk.new(0, 7).id, data)
+        assert aws.get_chunk_cache_stats()["size"] <= 1024
+
+    # Cache can be disabled
+    async with WorkspaceStorage.run(data_base_dir, alice, workspace_id, chunk_cache_size=0) as aws:
+        await aws.set_chunk(chunk.id, data)
+        assert await aws.get_chunk(chunk.id) == data
+        assert not aws.chunk_cache
+
+
+@pytest.mark.trio
+@customize_fixtures(real_data_storage=True)
+async def test_storage_metrics(data_base_dir, alice, workspace_id):
+    data = b"0123456"
+    chunk = Chunk.new(0, 7)
+    block = Chunk.new(0, 7).evolve_as_block(data)
+
+    async with WorkspaceStorage.run(data_base_dir, alice, workspace_id, chunk_cache_size=0) as aws:
+        await aws.set_chunk(chunk.id, data)
+        await aws.set_clean_block(block.access.id, data)
+        assert await aws.get_chunk(chunk.id) == data
+        assert await aws.get_chunks([block.id, ChunkID.new()]) == {block.id: data}
+        manifest = create_manifest(alice, LocalFileManifest)
+        async with aws.lock_entry_id(manifest.id):
+            await aws.set_manifest(manifest.id, manifest)
+
+        metrics = aws.get_storage_metrics()
+        assert metrics["chunk_storage"]["counters"] == {
+            "reads": 1,
+            "misses": 2,
+            "writes": 1,
+            "bytes_read": len(data),
+            "bytes_written": len(data),
+        }
+        block_storage_metrics = metrics["block_storage"]
+        assert block_storage_metrics["counters"] == {
+            "reads": 1,
+            "misses": 1,
+            "writes": 1,
+            "bytes_read": len(data),
+            "bytes_written": len(data),
+        }
+        assert block_storage_metrics["nb_blocks"] == 1
+        assert metrics["manifest_storage"]["counters"]["writes"] >= 1
+        assert metrics["manifest_storage"]["cache"]["entries"] >= 1
+
+        for localdb_metrics in (metrics["data_localdb"], metrics["cache_localdb"]):
+            assert localdb_metrics["latencies"]["lock_wait"]["count"] > 0
+            assert localdb_metrics["latencies"]["query"]["count"] > 0
+            assert localdb_metrics["latencies"]["commit"]["count"] > 0
+            histogram = localdb_metrics["latencies"]["query"]
+            assert sum(histogram["buckets"].values()) == histogram["count"]
+
+        # Metrics are meant to be dumped
+        json.dumps(metrics)
+
+
+@pytest.mark.trio
+@customize_fixtures(real_data_storage=True)
+async def test_manifest_cache(data_base_dir, alice, workspace_id):
+    async with WorkspaceStorage.run(
+        data_base_dir, alice, workspace_id, manifest_cache_size=2
+    ) as aws:
+        manifests = [create_manifest(alice, LocalFileManifest) for _ in range(5)]
+        for manifest in manifests:
+            await aws.set_manifest(manifest.id, manifest)
+        stats = aws.get_manifest_cache_stats()
+        # The workspace manifest is always cached
+        assert stats["entries"] == 3
+        assert stats["evictions"] == 3
+
+        # Evicted manifests are loaded back from the local database
+        previous_stats = stats
+        assert await aws.get_manifest(manifests[0].id) == manifests[0]
+        assert await aws.get_manifest(manifests[0].id) == manifests[0]
+        stats = aws.get_manifest_cache_stats()
+        assert stats["misses"] == previous_stats["misses"] + 1
+        assert stats["hits"] == previous_stats["hits"] + 1
+        assert stats["entries"] == 3
+
+        # Manifests not yet flushed and locked entries are never evicted
+        async with aws.lock_entry_id(manifests[1].id):
+            assert await aws.get_manifest(manifests[1].id) == manifests[1]
+            for manifest in manifests[2:]:
+                await aws.set_manifest(manifest.id, manifest, cache_only=True)
+            for manifest in manifests[1:]:
+                assert manifest.id in aws.manifest_storage._cache
+            assert aws.get_manifest_cache_stats()["pending_entries"] == 3
+
+        # Once flushed, the cache is bounded again
+        await aws.manifest_storage._flush_cache_ahead_of_persistance()
+        for manifest in manifests:
+            await aws.get_manifest(manifest.id)
+        assert aws.get_manifest_cache_stats()["entries"] == 3
+
+
+@pytest.mark.trio
+@customize_fixtures(real_data_storage=True)
+async def test_deferred_accessed_on(alice_workspace_storage):
+    aws = alice_workspace_storage
+    data = b"0123456"
+    block = Chunk.new(0, 7).evolve_as_block(data)
+    await aws.set_clean_block(block.access.id, data)
+
+    async def get_accessed_on():
+        async with aws.cache_localdb.open_cursor() as cursor:
+            cursor.execute("SELECT accessed_on FROM chunks WHERE chunk_id = ?", (block.id.bytes,))
+            (accessed_on,) = cursor.fetchone()
+            return accessed_on
+
+    # Reading a block doesn't write to the database
+    accessed_on = await get_accessed_on()
+    assert await aws.block_storage.get_chunk(block.id) == data
+    assert await aws.block_storage.get_chunks([block.id]) == {block.id: data}
+    assert not aws.cache_localdb._conn.in_transaction
+    assert await get_accessed_on() == accessed_on
+    pending_accessed_on = aws.block_storage._pending_accessed_on[block.id.bytes]
+
+    # Access times are written at vacuum time
+    await aws.run_vacuum()
+    assert not aws.block_storage._pending_accessed_on
+    assert await get_accessed_on() == pending_accessed_on
+
+
 @pytest.mark.trio
 @customize_fixtures(real_data_storage=True)
 async def test_file_descriptor(alice_workspace_storage):
@@ -472,6 +708,9 @@ async def test_timestamped_storage(alice_workspace_storage):
     with pytest.raises(FSError):
         await taws.set_chunk("chunk id", "data")
 
+    with pytest.raises(FSError):
+        await taws.set_chunks([("chunk id", "data")])
+
     with pytest.raises(FSError):
         await taws.clear_chunk("chunk id")
 
@@ -574,6 +813,49 @@ async def test_garbage_collection(data_base_dir, alice, workspace_id):
         assert await aws.block_storage.get_nb_blocks() == 0
 
 
+@pytest.mark.trio
+@customize_fixtures(real_data_storage=True)
+async def test_garbage_collection_small_blocks(data_base_dir, alice, workspace_id):
+    # Eviction is based on the actual size of the blocks, not on their number
+    block_size = 1024
+    cache_size = 10 * block_size
+    data = b"\x00" * block_size
+    chunks = [Chunk.new(0, block_size).evolve_as_block(data) for _ in range(20)]
+
+    async with WorkspaceStorage.run(
+        data_base_dir, alice, workspace_id, cache_size=cache_size
+    ) as aws:
+        for chunk in chunks:
+            await aws.set_clean_block(chunk.access.id, data)
+            assert await aws.block_storage.get_total_size() <= cache_size
+        nb_blocks = await aws.block_storage.get_nb_blocks()
+        total_size = await aws.block_storage.get_total_size()
+        assert 0 < nb_blocks < 10
+
+        # Most recently used blocks are kept
+        assert await aws.block_storage.is_chunk(chunks[-1].id)
+        assert not await aws.block_storage.is_chunk(chunks[0].id)
+
+    # Summary is persisted
+    async with WorkspaceStorage.run(
+        data_base_dir, alice, workspace_id, cache_size=cache_size
+    ) as aws:
+        assert await aws.block_storage.get_nb_blocks() == nb_blocks
+        assert await aws.block_storage.get_total_size() == total_size
+
+    # Reducing the cache size triggers a cleanup at startup
+    async with WorkspaceStorage.run(
+        data_base_dir, alice, workspace_id, cache_size=cache_size // 2
+    ) as aws:
+        assert await aws.block_storage.get_total_size() <= cache_size // 2
+        async with aws.cache_localdb.open_cursor() as cursor:
+            cursor.execute("SELECT COUNT(*), SUM(size) FROM chunks")
+            assert cursor.fetchone() == (
+                await aws.block_storage.get_nb_blocks(),
+                await aws.block_storage.get_total_size(),
+            )
+
+
 @pytest.mark.trio
 @customize_fixtures(real_data_storage=True)
 async def test_storage_file_tree(data_base_dir, alice, workspace_id):
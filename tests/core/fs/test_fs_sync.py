@@ -192,6 +192,24 @@ async def test_simple_sync(running_backend, alice_user_fs, alice2_user_fs):
     assert data == data2
 
 
+@pytest.mark.trio
+async def test_uploaded_blocks_stay_in_chunk_cache(running_backend, alice_user_fs):
+    wid = await alice_user_fs.workspace_create(EntryName("w"))
+    workspace = alice_user_fs.get_workspace(wid)
+    await workspace.write_bytes("/foo.txt", b"hello world !")
+    await workspace.sync()
+
+    # The uploaded block shares its id with the dirty chunk it replaces
+    entry_id = (await workspace.path_info("/foo.txt"))["id"]
+    manifest = await workspace.local_storage.get_manifest(entry_id)
+    chunks = [chunk for chunks in manifest.blocks for chunk in chunks]
+    assert chunks
+    for chunk in chunks:
+        assert chunk.access is not None
+        assert chunk.id in workspace.local_storage.chunk_cache
+    assert await workspace.read_bytes("/foo.txt") == b"hello world !"
+
+
 @pytest.mark.trio
 async def test_fs_recursive_sync(running_backend, alice_user_fs):
     with freeze_time("2000-01-01"):
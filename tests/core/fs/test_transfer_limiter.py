@@ -0,0 +1,73 @@
+# Parsec Cloud (https://parsec.cloud) Copyright (c) AGPL-3.0 2016-present Scille SAS
+from __future__ import annotations
+
+import pytest
+import trio
+
+from parsec.core.fs.exceptions import FSServerUploadTemporarilyUnavailableError
+from parsec.core.fs.transfer_limiter import BlockTransferLimiter
+
+
+async def _run_transfers(limiter: BlockTransferLimiter, count: int, duration: float) -> int:
+    max_in_flight = 0
+    in_flight = 0
+
+    async def _transfer() -> None:
+        nonlocal in_flight, max_in_flight
+        async with limiter.transfer(1024):
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await trio.sleep(duration)
+            in_flight -= 1
+
+    async with trio.open_nursery() as nursery:
+        for _ in range(count):
+            nursery.start_soon(_transfer)
+    return max_in_flight
+
+
+@pytest.mark.trio
+async def test_transfer_limiter_aimd(autojump_clock):
+    limiter = BlockTransferLimiter(max_concurrency=8)
+    assert limiter.limit == 4
+
+    # Stable latency: the limit grows up to the maximum concurrency
+    max_in_flight = await _run_transfers(limiter, 100, 1)
+    assert limiter.limit == 8
+    assert max_in_flight == 8
+
+    # Server timeout: the limit is halved once for all the transfers in flight
+    async def _failing_transfer() -> None:
+        with pytest.raises(FSServerUploadTemporarilyUnavailableError):
+            async with limiter.transfer(1024):
+                await trio.sleep(1)
+                raise FSServerUploadTemporarilyUnavailableError()
+
+    async with trio.open_nursery() as nursery:
+        for _ in range(8):
+            nursery.start_soon(_failing_transfer)
+    assert limiter.limit == 4
+
+    # Latency grows with concurrency: more transfers only add queueing delay
+    limiter = BlockTransferLimiter(max_concurrency=8)
+    in_flight = 0
+    limits = set()
+
+    async def _congested_transfer() -> None:
+        nonlocal in_flight
+        async with limiter.transfer(1024):
+            limits.add(limiter.limit)
+            in_flight += 1
+            await trio.sleep(in_flight**2)
+            in_flight -= 1
+
+    async with trio.open_nursery() as nursery:
+        for _ in range(100):
+            nursery.start_soon(_congested_transfer)
+    # The limit has been decreased below its initial value at some point
+    assert min(limits) < 4
+
+
+def test_transfer_limiter_bad_concurrency():
+    with pytest.raises(ValueError):
+        BlockTransferLimiter(max_concurrency=0)
@@ -154,6 +154,48 @@ async def test_rename_non_empty_folder(alice_entry_transactions):
     assert info["id"] == spam_id
 
 
+@pytest.mark.trio
+async def test_path_resolution_cache(alice_entry_transactions, monkeypatch):
+    entry_transactions = alice_entry_transactions
+
+    foo_id = await entry_transactions.folder_create(FsPath("/foo"))
+    bar_id = await entry_transactions.folder_create(FsPath("/foo/bar"))
+    zob_id, _ = await entry_transactions.file_create(FsPath("/foo/bar/zob.txt"), open=False)
+    info = await entry_transactions.entry_info(FsPath("/foo/bar/zob.txt"))
+    assert info["id"] == zob_id
+
+    # Resolved paths no longer load the intermediate manifests
+    loaded = []
+    vanilla_load_manifest = entry_transactions._load_manifest
+
+    async def _load_manifest(entry_id):
+        loaded.append(entry_id)
+        return await vanilla_load_manifest(entry_id)
+
+    monkeypatch.setattr(entry_transactions, "_load_manifest", _load_manifest)
+    info = await entry_transactions.entry_info(FsPath("/foo/bar/zob.txt"))
+    assert info["id"] == zob_id
+    assert loaded == [zob_id]
+
+    # Renaming invalidates the path and its descendants
+    await entry_transactions.entry_rename(FsPath("/foo/bar"), FsPath("/foo/baz"))
+    with pytest.raises(FileNotFoundError):
+        await entry_transactions.entry_info(FsPath("/foo/bar/zob.txt"))
+    info = await entry_transactions.entry_info(FsPath("/foo/baz/zob.txt"))
+    assert info["id"] == zob_id
+    info = await entry_transactions.entry_info(FsPath("/foo"))
+    assert info["id"] == foo_id
+
+    # So does deleting
+    await entry_transactions.file_delete(FsPath("/foo/baz/zob.txt"))
+    with pytest.raises(FileNotFoundError):
+        await entry_transactions.entry_info(FsPath("/foo/baz/zob.txt"))
+    await entry_transactions.folder_delete(FsPath("/foo/baz"))
+    with pytest.raises(FileNotFoundError):
+        await entry_transactions.entry_info(FsPath("/foo/baz"))
+    assert bar_id not in [entry_id for entry_id, _ in entry_transactions._path_cache.values()]
+
+
 @pytest.mark.trio
 async def test_cannot_replace_root(alice_entry_transactions):
     entry_transactions = alice_entry_transactions
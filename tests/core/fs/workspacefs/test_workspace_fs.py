@@ -7,6 +7,7 @@ from unittest.mock import ANY
 
 import pytest
 from trio import open_nursery
+from trio.testing import wait_all_tasks_blocked
 
 from parsec._parsec import (
     FileManifest,
@@ -22,7 +23,7 @@ from parsec.backend.block import BlockNotFoundError
 from parsec.core.fs import FsPath
 from parsec.core.fs.exceptions import FSBackendOfflineError, FSError, FSLocalMissError
 from parsec.core.fs.workspacefs.workspacefs import ReencryptionNeed, WorkspaceFS
-from parsec.core.types import DEFAULT_BLOCK_SIZE, EntryID
+from parsec.core.types import DEFAULT_BLOCK_SIZE, MAX_BLOCK_SIZE, MIN_BLOCK_SIZE, ChunkID, EntryID
 
 
 @pytest.mark.trio
@@ -329,6 +330,47 @@ async def test_copyfile(alice_workspace):
     assert await alice_workspace.read_bytes("/copied") == b"a" * 9000 + b"b" * 40000
 
 
+@pytest.mark.trio
+async def test_copyfile_reuses_synced_blocks(alice_workspace):
+    data = b"a" * DEFAULT_BLOCK_SIZE + b"b" * 9000
+
+    async def get_accesses(path):
+        entry_id = await alice_workspace.path_id(path)
+        manifest = await alice_workspace.local_storage.get_manifest(entry_id)
+        return [
+            (chunk.access.id, chunk.access.offset) if chunk.access else None
+            for chunks in manifest.blocks
+            for chunk in chunks
+        ]
+
+    # Blocks that are not synchronized yet cannot be shared
+    await alice_workspace.write_bytes("/foo/bar", data)
+    await alice_workspace.copyfile("/foo/bar", "/copied")
+    assert await alice_workspace.read_bytes("/copied") == data
+    assert all(access is None for access in await get_accesses("/copied"))
+
+    # Synchronized blocks are shared by the copy
+    await alice_workspace.sync()
+    await alice_workspace.copyfile("/foo/bar", "/copied2")
+    assert await alice_workspace.read_bytes("/copied2") == data
+    assert await get_accesses("/copied2") == await get_accesses("/foo/bar")
+    info = await alice_workspace.path_info("/copied2")
+    assert info["need_sync"] is True
+    assert info["size"] == len(data)
+
+    # Existing destination
+    with pytest.raises(FileExistsError):
+        await alice_workspace.copyfile("/foo/bar", "/copied2")
+    await alice_workspace.copyfile("/copied", "/copied2", exist_ok=True)
+    assert await alice_workspace.read_bytes("/copied2") == data
+
+    # Identical data written after the synchronization reuses the uploaded blocks
+    await alice_workspace.write_bytes("/rewritten", data)
+    await alice_workspace.sync()
+    assert await get_accesses("/rewritten") == await get_accesses("/foo/bar")
+    assert await alice_workspace.read_bytes("/rewritten") == data
+
+
 @pytest.mark.trio
 async def test_rmtree(alice_workspace):
     await alice_workspace.mkdir("/foz")
@@ -350,6 +392,42 @@ async def test_rmtree(alice_workspace):
         await alice_workspace.rmtree("/")
 
 
+@pytest.mark.trio
+async def test_entry_id_to_path(alice_workspace):
+    await alice_workspace.mkdir("/foo/foz/faz", parents=True)
+    await alice_workspace.touch("/foo/foz/faz/baz")
+    foz_id = (await alice_workspace.path_info("/foo/foz"))["id"]
+    baz_id = (await alice_workspace.path_info("/foo/foz/faz/baz"))["id"]
+
+    path, info = await alice_workspace.entry_id_to_path(baz_id)
+    assert path == FsPath("/foo/foz/faz/baz")
+    assert info["id"] == baz_id
+
+    # Flushed manifests are resolved from the persisted index
+    await alice_workspace.local_storage.clear_memory_cache(flush=True)
+    assert await alice_workspace.entry_ids_to_paths(
+        [alice_workspace.workspace_id, foz_id, baz_id, EntryID.new()]
+    ) == {
+        alice_workspace.workspace_id: FsPath("/"),
+        foz_id: FsPath("/foo/foz"),
+        baz_id: FsPath("/foo/foz/faz/baz"),
+    }
+
+    # The index follows renames and deletions
+    await alice_workspace.rename("/foo/foz", "/foo/fiz")
+    path, _ = await alice_workspace.entry_id_to_path(baz_id)
+    assert path == FsPath("/foo/fiz/faz/baz")
+    await alice_workspace.local_storage.clear_memory_cache(flush=True)
+    assert await alice_workspace.entry_ids_to_paths([baz_id]) == {
+        baz_id: FsPath("/foo/fiz/faz/baz")
+    }
+
+    await alice_workspace.unlink("/foo/fiz/faz/baz")
+    assert await alice_workspace.entry_id_to_path(baz_id) is None
+    await alice_workspace.local_storage.clear_memory_cache(flush=True)
+    assert await alice_workspace.entry_ids_to_paths([baz_id]) == {}
+
+
 @pytest.mark.trio
 async def test_dump(alice_workspace):
     baz_id = await alice_workspace.path_id("/foo/baz")
@@ -734,3 +812,82 @@ async def test_backend_block_upload_error_during_sync(
 
     await alice2_workspace.sync()
     assert await alice2_workspace.read_bytes(fspath) == b"a" * TAZ_V2_BLOCKS * DEFAULT_BLOCK_SIZE
+
+
+@pytest.mark.trio
+async def test_read_ahead_on_sequential_reads(alice_user_fs, alice2_user_fs, running_backend):
+    wid = await alice_user_fs.workspace_create(EntryName("w"))
+    await alice_user_fs.sync()
+    await alice2_user_fs.sync()
+
+    alice_workspace = alice_user_fs.get_workspace(wid)
+    alice2_workspace = alice2_user_fs.get_workspace(wid)
+    assert alice2_workspace.transactions.read_ahead_window > 0
+
+    fspath = "/taz"
+    TAZ_BLOCKS = 4
+    await alice_workspace.write_bytes(fspath, b"a" * TAZ_BLOCKS * DEFAULT_BLOCK_SIZE)
+    await alice_workspace.sync()
+    await alice2_workspace.sync()
+
+    async def get_local_block_ids():
+        local_and_remote_blocks, _, remote_blocks, *_ = await alice2_workspace.get_blocks_by_type(
+            fspath
+        )
+        blocks = local_and_remote_blocks + remote_blocks
+        chunk_ids = [ChunkID.from_block_id(block.id) for block in blocks]
+        return await alice2_workspace.local_storage.get_local_block_ids(chunk_ids)
+
+    assert await get_local_block_ids() == []
+
+    # A random access does not trigger the read-ahead
+    async with await alice2_workspace.open_file(fspath, "rb") as f:
+        await f.seek(2 * DEFAULT_BLOCK_SIZE)
+        assert await f.read(10) == b"a" * 10
+        await wait_all_tasks_blocked()
+        assert len(await get_local_block_ids()) == 1
+
+    # Reading the start of the file prefetches the following blocks
+    async with await alice2_workspace.open_file(fspath, "rb") as f:
+        assert await f.read(10) == b"a" * 10
+        await wait_all_tasks_blocked()
+        assert len(await get_local_block_ids()) == TAZ_BLOCKS
+        assert await f.read() == b"a" * (TAZ_BLOCKS * DEFAULT_BLOCK_SIZE - 10)
+
+
+@pytest.mark.trio
+async def test_workspace_custom_blocksize(running_backend, alice_user_fs, alice2_user_fs):
+    blocksize = MAX_BLOCK_SIZE
+    wid = await alice_user_fs.workspace_create(EntryName("w"), blocksize=blocksize)
+    workspace = alice_user_fs.get_workspace(wid)
+    assert workspace.local_storage.get_blocksize() == blocksize
+
+    # Files created in the workspace are split according to its block size
+    data = b"a" * (blocksize + DEFAULT_BLOCK_SIZE)
+    await workspace.write_bytes("/foo", data)
+    manifest, _ = await workspace.transactions._get_manifest_from_path(FsPath("/foo"))
+    assert manifest.blocksize == blocksize
+    assert len(manifest.blocks) == 2
+    assert await workspace.read_bytes("/foo") == data
+
+    # The block size is also honored by the copied files
+    await workspace.copyfile("/foo", "/bar")
+    manifest, _ = await workspace.transactions._get_manifest_from_path(FsPath("/bar"))
+    assert manifest.blocksize == blocksize
+
+    # The biggest blocks fit in the requests to the backend
+    await workspace.sync()
+    await alice_user_fs.sync()
+    await alice2_user_fs.sync()
+    workspace2 = alice2_user_fs.get_workspace(wid)
+    await workspace2.sync()
+    assert await workspace2.read_bytes("/foo") == data
+
+    # Other workspaces keep the default block size
+    wid = await alice_user_fs.workspace_create(EntryName("w2"))
+    workspace = alice_user_fs.get_workspace(wid)
+    assert workspace.local_storage.get_blocksize() == DEFAULT_BLOCK_SIZE
+
+    for bad_blocksize in (0, MIN_BLOCK_SIZE - 1, MAX_BLOCK_SIZE + 1):
+        with pytest.raises(ValueError):
+            await alice_user_fs.workspace_create(EntryName("w3"), blocksize=bad_blocksize)
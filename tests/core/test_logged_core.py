@@ -1,6 +1,7 @@
 # Parsec Cloud (https://parsec.cloud) Copyright (c) AGPL-3.0 2016-present Scille SAS
 from __future__ import annotations
 
+import json
 from unittest.mock import ANY
 
 import pytest
@@ -15,6 +16,7 @@ from parsec.core.backend_connection import (
     BackendNotAvailable,
     BackendNotFoundError,
 )
+from parsec.core.fs.storage.version import get_storage_metrics_path
 from parsec.core.types import DeviceInfo, UserInfo
 from tests.common import correct_addr, customize_fixtures, real_clock_timeout, server_factory
 
@@ -166,6 +168,23 @@ async def test_find_get_info_and_revoke_offline(alice_core, bob):
         await alice_core.revoke_user(bob.user_id)
 
 
+@pytest.mark.trio
+async def test_storage_metrics_logged(monkeypatch, caplog, core_config, alice):
+    monkeypatch.setattr("parsec.core.logged_core.STORAGE_METRICS_LOG_INTERVAL", 0.01)
+
+    async with real_clock_timeout():
+        async with logged_core_factory(config=core_config, device=alice):
+            # The metrics are dumped in the logs while the core is running
+            while "Storage metrics" not in caplog.text:
+                await trio.sleep(0.01)
+    caplog.assert_occurred("Storage metrics")
+
+    # They are also written in the data directory, for the `storage_metrics` CLI command
+    metrics_path = get_storage_metrics_path(core_config.data_base_dir, alice)
+    metrics = json.loads(metrics_path.read_text())
+    assert metrics.keys() == {"user", "workspaces", "dumped_on"}
+
+
 @pytest.mark.trio
 @pytest.mark.parametrize("user_cached", [False, True])
 async def test_revoke_user(running_backend, alice_core, bob, user_cached):
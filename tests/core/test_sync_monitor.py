@@ -1,13 +1,19 @@
 # Parsec Cloud (https://parsec.cloud) Copyright (c) AGPL-3.0 2016-present Scille SAS
 from __future__ import annotations
 
-from unittest.mock import ANY, Mock
+import math
+from unittest.mock import ANY, AsyncMock, Mock
 from urllib.error import HTTPError, URLError
 
 import pytest
 import trio
 
-from parsec._parsec import CoreEvent, Regex
+from parsec._parsec import (
+    CoreEvent,
+    Regex,
+    VlobPollChangesRepInMaintenance,
+    VlobPollChangesRepOk,
+)
 from parsec.api.data import EntryName
 from parsec.api.protocol import RealmID, VlobID
 from parsec.backend.backend_events import BackendEvent
@@ -15,7 +21,8 @@ from parsec.backend.sequester import SequesterServiceType
 from parsec.core.backend_connection import BackendConnStatus
 from parsec.core.fs.exceptions import FSReadOnlyError
 from parsec.core.logged_core import logged_core_factory
-from parsec.core.types import WorkspaceRole
+from parsec.core.sync_monitor import MAINTENANCE_MIN_WAIT, SyncContext
+from parsec.core.types import EntryID, WorkspaceRole
 from tests.common import create_shared_workspace, customize_fixtures, sequester_service_factory
 
 
@@ -254,23 +261,17 @@ async def test_autosync_on_remote_modifications(
 
         alice2_w = alice2_user_fs.get_workspace(wid)
         await alice2_w.mkdir("/foo")
-        foo_id = await alice2_w.path_id("/foo")
         await alice2_w.sync()
 
         # Wait for event to come back to alice_core
         await frozen_clock.sleep_with_autojump(60)
         async with frozen_clock.real_clock_timeout():
-            await spy.wait_multiple(
-                [
-                    (
-                        CoreEvent.BACKEND_REALM_VLOBS_UPDATED,
-                        {"realm_id": wid, "checkpoint": 2, "src_id": foo_id, "src_version": 1},
-                    ),
-                    (
-                        CoreEvent.BACKEND_REALM_VLOBS_UPDATED,
-                        {"realm_id": wid, "checkpoint": 3, "src_id": wid, "src_version": 2},
-                    ),
-                ]
+            # The event about the folder creation (checkpoint 2) may have been
+            # coalesced by the backend, in which case alice_core has to poll
+            # the changes to find out about the folder
+            await spy.wait(
+                CoreEvent.BACKEND_REALM_VLOBS_UPDATED,
+                {"realm_id": wid, "checkpoint": 3, "src_id": wid, "src_version": 2},
             )
             await alice_core.wait_idle_monitors()
 
@@ -744,3 +745,109 @@ async def test_sync_timeout_and_rejected_by_sequester_service(
     await _wait_sync_is_done()
     um = alice_core.user_fs.get_user_manifest()
     assert um.need_sync is False
+
+
+def _fake_sync_context(local_storage=None, backend_cmds=None):
+    """Sync context with a controllable clock (`clock.now`), synced entries are recorded"""
+    clock = Mock(now=0.0)
+    device = Mock()
+    device.timestamp.side_effect = lambda: Mock(timestamp=lambda: clock.now)
+    local_storage = local_storage or Mock(run_vacuum=AsyncMock())
+    synced = []
+
+    class FakeSyncContext(SyncContext):
+        async def _sync(self, entry_id):
+            synced.append(entry_id)
+
+        def _get_backend_cmds(self):
+            return backend_cmds
+
+        def _get_local_storage(self):
+            return local_storage
+
+    ctx = FakeSyncContext(Mock(device=device), EntryID.new())
+    ctx._changes_loaded = True
+    return ctx, clock, synced
+
+
+@pytest.mark.trio
+async def test_sync_context_local_changes_scheduling():
+    ctx, clock, synced = _fake_sync_context()
+    foo, bar, baz = EntryID.new(), EntryID.new(), EntryID.new()
+
+    assert ctx.set_local_change(foo)
+    assert ctx.due_time == 1
+    clock.now = 0.5
+    assert not ctx.set_local_change(bar)
+    # Changing an entry again postpones its sync
+    clock.now = 0.8
+    assert not ctx.set_local_change(foo)
+    assert not ctx.set_local_change(baz)
+    # Many changes on the same entry do not grow the queue unbounded
+    for _ in range(1000):
+        ctx.set_local_change(baz)
+    assert len(ctx._local_changes_queue) < 100
+    assert ctx._compute_due_time() == 1.5
+
+    # Entries are synced by due time, one per tick
+    clock.now = 10
+    for _ in range(3):
+        await ctx.tick()
+    assert synced == [bar, foo, baz]
+    assert ctx.due_time == math.inf
+
+
+@pytest.mark.trio
+async def test_sync_context_poll_coalesced_remote_changes():
+    foo, bar, baz = EntryID.new(), EntryID.new(), EntryID.new()
+    backend_cmds = Mock(vlob_poll_changes=AsyncMock(return_value=VlobPollChangesRepOk({}, 5)))
+    local_storage = Mock(
+        get_realm_checkpoint=AsyncMock(return_value=1),
+        update_realm_checkpoint=AsyncMock(),
+        get_need_sync_entries=AsyncMock(return_value=(set(), {bar, baz})),
+        run_vacuum=AsyncMock(),
+    )
+    ctx, _, synced = _fake_sync_context(local_storage, backend_cmds)
+    ctx._checkpoint = 1
+
+    # Following checkpoint, nothing has been missed
+    assert ctx.set_remote_change(foo, 2)
+    await ctx.tick()
+    assert synced == [foo]
+    backend_cmds.vlob_poll_changes.assert_not_called()
+
+    # Checkpoints 3 and 4 have been coalesced into checkpoint 5
+    assert ctx.set_remote_change(baz, 5)
+    for _ in range(2):
+        await ctx.tick()
+    backend_cmds.vlob_poll_changes.assert_awaited_once()
+    assert sorted(synced[1:]) == sorted([bar, baz])
+    assert ctx.due_time == math.inf
+
+
+@pytest.mark.trio
+async def test_sync_context_poll_coalesced_remote_changes_retried():
+    foo, bar = EntryID.new(), EntryID.new()
+    backend_cmds = Mock(vlob_poll_changes=AsyncMock(return_value=VlobPollChangesRepInMaintenance()))
+    local_storage = Mock(
+        get_realm_checkpoint=AsyncMock(return_value=1),
+        update_realm_checkpoint=AsyncMock(),
+        get_need_sync_entries=AsyncMock(return_value=(set(), {bar})),
+        run_vacuum=AsyncMock(),
+    )
+    ctx, clock, synced = _fake_sync_context(local_storage, backend_cmds)
+    ctx._checkpoint = 1
+
+    # The poll fails, the gap is kept and the poll retried later
+    assert ctx.set_remote_change(foo, 5)
+    await ctx.tick()
+    assert synced == [foo]
+    assert ctx.due_time == MAINTENANCE_MIN_WAIT
+
+    clock.now = MAINTENANCE_MIN_WAIT
+    backend_cmds.vlob_poll_changes.return_value = VlobPollChangesRepOk({}, 5)
+    for _ in range(2):
+        await ctx.tick()
+    assert backend_cmds.vlob_poll_changes.await_count == 2
+    assert synced == [foo, bar]
+    assert ctx.due_time == math.inf
@@ -0,0 +1,74 @@
+#! /usr/bin/env python3
+# Parsec Cloud (https://parsec.cloud) Copyright (c) AGPL-3.0 2016-present Scille SAS
+"""Micro-benchmark of the RAID5 blockstore chunking and parity computation.
+
+Usage: python tests/scripts/bench_raid5.py [--repeat N]
+"""
+from __future__ import annotations
+
+import argparse
+import os
+from timeit import Timer
+
+from parsec.backend.raid5_blockstore import (
+    generate_checksum_chunk,
+    rebuild_block_from_chunks,
+    split_block_in_chunks,
+)
+
+NODE_COUNTS = (3, 4, 5, 6)
+BLOCK_SIZES = (64 * 1024, 512 * 1024, 4 * 1024 * 1024)
+
+
+def bench(label: str, fn, number: int, repeat: int, block_size: int) -> None:
+    best = min(Timer(fn).repeat(repeat=repeat, number=number)) / number
+    throughput = block_size / best / 1024**2
+    print(f"  {label:<18} {best * 1e6:>10.1f} us  {throughput:>8.1f} MiB/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for block_size in BLOCK_SIZES:
+        block = os.urandom(block_size)
+        number = max(1, 64 * 1024 * 1024 // block_size)
+        for nb_nodes in NODE_COUNTS:
+            nb_chunks = nb_nodes - 1
+            chunks = split_block_in_chunks(block, nb_chunks)
+            checksum = generate_checksum_chunk(chunks)
+            assert rebuild_block_from_chunks(list(chunks), None) == block
+            print(f"block size: {block_size // 1024}KB, nodes: {nb_nodes}")
+            bench(
+                "split",
+                lambda: split_block_in_chunks(block, nb_chunks),
+                number,
+                args.repeat,
+                block_size,
+            )
+            bench(
+                "checksum",
+                lambda: generate_checksum_chunk(chunks),
+                number,
+                args.repeat,
+                block_size,
+            )
+            bench(
+                "rebuild",
+                lambda: rebuild_block_from_chunks(list(chunks), None),
+                number,
+                args.repeat,
+                block_size,
+            )
+            bench(
+                "degraded rebuild",
+                lambda: rebuild_block_from_chunks([None, *chunks[1:]], checksum),
+                number,
+                args.repeat,
+                block_size,
+            )
+
+
+if __name__ == "__main__":
+    main()
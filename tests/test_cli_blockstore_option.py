@@ -4,11 +4,17 @@ from __future__ import annotations
 import pytest
 from click import BadParameter
 
-from parsec.backend.cli.utils import _parse_blockstore_params
+from parsec.backend.cli.utils import (
+    _apply_cache_options,
+    _apply_s3_options,
+    _parse_blockstore_params,
+)
 from parsec.backend.config import (
+    CachedBlockStoreConfig,
     MockedBlockStoreConfig,
     PostgreSQLBlockStoreConfig,
     RAID0BlockStoreConfig,
+    RAID1BlockStoreConfig,
     S3BlockStoreConfig,
     SWIFTBlockStoreConfig,
 )
@@ -154,3 +160,38 @@ def test_invalid_mix_raid_params(param):
 def test_bad_raid_params(params):
     with pytest.raises(BadParameter):
         _parse_blockstore_params(params)
+
+
+def test_apply_s3_options():
+    config = _parse_blockstore_params(
+        ["raid1:0:s3::region1:bucketA:key123:S3cr3t", "raid1:1:MOCKED"]
+    )
+    config = _apply_s3_options(
+        config, max_pool_connections=32, connect_timeout=5.0, read_timeout=10.0
+    )
+    assert config == RAID1BlockStoreConfig(
+        blockstores=[
+            S3BlockStoreConfig(
+                s3_endpoint_url=None,
+                s3_region="region1",
+                s3_bucket="bucketA",
+                s3_key="key123",
+                s3_secret="S3cr3t",
+                s3_max_pool_connections=32,
+                s3_connect_timeout=5.0,
+                s3_read_timeout=10.0,
+            ),
+            MockedBlockStoreConfig(),
+        ]
+    )
+
+
+def test_apply_cache_options(tmp_path):
+    config = _parse_blockstore_params(["MOCKED"])
+    assert _apply_cache_options(config, 0, None, 1024) == config
+    assert _apply_cache_options(config, 1024, tmp_path, 4096) == CachedBlockStoreConfig(
+        blockstore=MockedBlockStoreConfig(),
+        memory_cache_size=1024,
+        disk_cache_dir=tmp_path,
+        disk_cache_size=4096,
+    )